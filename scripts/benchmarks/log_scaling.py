@@ -0,0 +1,76 @@
+"""
+Benchmark log throughput of AWS log handlers versus number of logging threads.
+
+Uses a fake transport which simulates API latency, so no TrailWatch
+instance is needed. Throughput is measured from the logging threads' point
+of view (records logged per second until all threads are done logging).
+
+Usage:
+    python scripts/benchmarks/log_scaling.py [--records 200] [--latency 0.002]
+
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+from trailwatch.connectors.aws.api import TrailwatchApi
+from trailwatch.connectors.aws.handler import AwsHandler, BufferedAwsHandler
+from trailwatch.connectors.aws.transport import Transport, TransportResponse
+
+THREAD_COUNTS = [1, 2, 4, 8, 16, 32]
+
+
+class FakeTransport(Transport):
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def request(self, method, url, headers=None, json=None, **kwargs):
+        time.sleep(self.latency)
+        return TransportResponse(status_code=200, headers={}, content=b"{}", url=url)
+
+
+def run(handler: logging.Handler, threads: int, records: int) -> float:
+    logger = logging.getLogger("trailwatch.benchmark")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    barrier = threading.Barrier(threads + 1)
+
+    def work() -> None:
+        barrier.wait()
+        for i in range(records):
+            logger.info("Processed record %d", i)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    logger.removeHandler(handler)
+    handler.close()
+    return threads * records / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=200, help="records per thread")
+    parser.add_argument(
+        "--latency", type=float, default=0.002, help="simulated API latency, seconds"
+    )
+    args = parser.parse_args()
+
+    api = TrailwatchApi(FakeTransport(args.latency), "http://localhost", "key")
+    print(f"{'threads':>8} {'AwsHandler':>14} {'Buffered':>14}   (records/s)")
+    for threads in THREAD_COUNTS:
+        synchronous = run(AwsHandler("execution", api), threads, args.records)
+        buffered = run(BufferedAwsHandler("execution", api), threads, args.records)
+        print(f"{threads:>8} {synchronous:>14,.0f} {buffered:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
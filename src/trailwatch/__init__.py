@@ -1,14 +1,18 @@
 __all__ = [
     "configure",
+    "flush",
     "TrailwatchContext",
     "watch",
 ]
 
 import functools
 import inspect
+import time
 
+from .background import flush
 from .config import DEFAULT, Default, configure
 from .context import TrailwatchContext
+from .memory import DEFAULT_GROWTH_THRESHOLD
 
 
 def watch(
@@ -19,6 +23,23 @@ def watch(
     log_ttl: int | Default | None = DEFAULT,
     error_ttl: int | Default | None = DEFAULT,
     timeout: int | None = None,
+    soft_timeout: float | None = None,
+    track_resources: bool = False,
+    trace_memory: bool = False,
+    track_memory_growth: bool = False,
+    memory_growth_threshold: int = DEFAULT_GROWTH_THRESHOLD,
+    trace_allocations: bool = False,
+    profile: str | None = None,
+    profile_sample_rate: int = 1,
+    profile_threshold: float | None = None,
+    metrics_interval: float | None = None,
+    heartbeat_interval: float | None = None,
+    background_finalize: bool = False,
+    background_uploads: int | None = None,
+    instrument_http: bool = False,
+    parent_execution_id: str | None = None,
+    shard: str | int | None = None,
+    shards: int | None = None,
 ):
     """
     Watch a callable (function or method).
@@ -27,6 +48,12 @@ def watch(
     and send execution statistics (start, end, name, logs, exceptions, etc.)
     to configured connectors.
 
+    Generator functions (sync and async) are also supported. The execution starts
+    when iteration starts and ends when the generator is exhausted, closed,
+    or raises an exception. Stopping iteration early is not treated as a failure.
+    Number of items, items per second, and per-item latency percentiles
+    are sent with the execution.
+
     If decorated function takes a keyword argument named `trailwatch_execution_context`,
     the context object is passed to the function. You can ignore static analysis
     warnings about this argument not being used.
@@ -53,6 +80,87 @@ def watch(
         Timeout in seconds. If the callable takes longer than this to execute,
         an execution timeout error is raised and execution is marked as timed out.
         By default, no timeout is set.
+        Stacks of all threads at the moment the timeout expired are sent
+        as the 'timeout-stacks.txt' execution file.
+    soft_timeout : float, optional
+        Seconds after which a warning is issued and stacks of all threads
+        are captured without interrupting the execution. Stacks are sent
+        as the 'soft-timeout-stacks.txt' execution file. Set it lower than
+        `timeout` to see where a slow execution spent its time before it
+        was timed out. By default, no soft timeout is set.
+    track_resources : bool, optional
+        Measure resources consumed by the execution (wall and CPU time,
+        peak memory, garbage collection, threads) and attach them
+        to the execution record. By default, False.
+    trace_memory : bool, optional
+        Trace Python memory allocations to measure peak memory usage
+        during the execution. Has a noticeable performance impact.
+        Only used when `track_resources` is True. By default, False.
+    track_memory_growth : bool, optional
+        Measure memory retained by the process at the end of the execution
+        (after a full garbage collection) and compare it with the lowest retained
+        memory over the recent executions of the same job in this process.
+        A growth report is attached to the execution when it grows by more than
+        `memory_growth_threshold`. Useful to find leaking jobs in long-lived
+        workers. By default, False.
+    memory_growth_threshold : int, optional
+        Growth of retained memory in bytes which produces a growth report.
+        Only used when `track_memory_growth` is True. By default, 32 MiB.
+    trace_allocations : bool, optional
+        Trace allocations with tracemalloc for the rest of the process lifetime,
+        so growth reports include allocation sites which grew the most.
+        Has a noticeable performance impact.
+        Only used when `track_memory_growth` is True. By default, False.
+    profile : str, optional
+        Profile the execution and send the profile as an execution file.
+        Either 'sampling' (low-overhead statistical profiler producing
+        collapsed stacks, suitable for long jobs) or 'cprofile'
+        (deterministic profiler producing pstats data, suitable for short jobs).
+        By default, execution is not profiled.
+    profile_sample_rate : int, optional
+        Profile only 1 in `profile_sample_rate` executions of the job.
+        By default, every execution is profiled.
+    profile_threshold : float, optional
+        Send the profile only if the execution takes longer than this
+        many seconds. By default, the profile is always sent.
+    metrics_interval : float, optional
+        Interval in seconds at which counters and gauges are sent while
+        the execution is running. By default, they are sent only when
+        the execution is finalized.
+    heartbeat_interval : float, optional
+        Interval in seconds at which a liveness timestamp, the latest progress,
+        and counters are sent while the execution is running.
+        Allows detecting hung executions. By default, no heartbeat is sent.
+    background_finalize : bool, optional
+        Return control immediately when the callable returns and finalize
+        the execution (update status, send errors, etc.) in a background thread.
+        Use `trailwatch.flush` to wait for background telemetry to be sent.
+        By default, False.
+    background_uploads : int, optional
+        Send files in background using up to this many concurrent uploads.
+        Methods sending files return a future instead of blocking. All uploads
+        are finished (or reported as failed) before the execution is finalized.
+        By default, files are sent synchronously.
+    instrument_http : bool, optional
+        Record outbound HTTP calls made through urllib3 (and libraries built
+        on it, e.g., requests and simple_salesforce) while the execution is
+        running. Per host number of calls, status codes, bytes sent and received,
+        and latency percentiles are sent with heartbeats and when the execution
+        is finalized. Calls made by TrailWatch itself are not recorded.
+        By default, False.
+    parent_execution_id : str, optional
+        Run the execution as a shard of this parent execution. The parent
+        is created by whichever shard starts first, and its status, timing,
+        and counters are aggregated from shards as they finish (the parent
+        is 'partial' if some shards failed). By default, taken from
+        the 'TRAILWATCH_PARENT_EXECUTION_ID' environment variable, if set.
+    shard : str | int, optional
+        Name or index of this shard. By default, taken from
+        the 'TRAILWATCH_SHARD' environment variable or '<hostname>-<pid>'.
+    shards : int, optional
+        Total number of shards. The parent is running until this many
+        shards have finished. By default, taken from the 'TRAILWATCH_SHARDS'
+        environment variable, if set.
 
     """
 
@@ -69,6 +177,23 @@ def watch(
             "log_ttl": log_ttl,
             "error_ttl": error_ttl,
             "timeout": timeout,
+            "soft_timeout": soft_timeout,
+            "track_resources": track_resources,
+            "trace_memory": trace_memory,
+            "track_memory_growth": track_memory_growth,
+            "memory_growth_threshold": memory_growth_threshold,
+            "trace_allocations": trace_allocations,
+            "profile": profile,
+            "profile_sample_rate": profile_sample_rate,
+            "profile_threshold": profile_threshold,
+            "metrics_interval": metrics_interval,
+            "heartbeat_interval": heartbeat_interval,
+            "background_finalize": background_finalize,
+            "background_uploads": background_uploads,
+            "instrument_http": instrument_http,
+            "parent_execution_id": parent_execution_id,
+            "shard": shard,
+            "shards": shards,
         }
         if decorator_kwargs["job_description"] is None:
             raise ValueError(
@@ -76,19 +201,78 @@ def watch(
                 "via the docstring of the decorated function"
             )
 
+        def call(tw_context, args, kwargs):
+            if "trailwatch_execution_context" in [
+                *inspect.getfullargspec(func).args,
+                *inspect.getfullargspec(func).kwonlyargs,
+            ]:
+                return func(
+                    *args,
+                    **kwargs,
+                    trailwatch_execution_context=tw_context,
+                )
+            return func(*args, **kwargs)
+
+        if inspect.isgeneratorfunction(func):
+
+            @functools.wraps(func)
+            def generator_inner(*args, **kwargs):
+                with TrailwatchContext(**decorator_kwargs) as tw_context:
+                    generator = call(tw_context, args, kwargs)
+                    method, value = generator.send, None
+                    try:
+                        while True:
+                            start = time.perf_counter()
+                            try:
+                                item = method(value)
+                            except StopIteration as stop:
+                                return stop.value
+                            tw_context.record_item(time.perf_counter() - start)
+                            try:
+                                value = yield item
+                                method = generator.send
+                            except GeneratorExit:
+                                # Consumer stopped iterating early (break, close())
+                                return None
+                            except BaseException as error:
+                                method, value = generator.throw, error
+                    finally:
+                        generator.close()
+
+            return generator_inner
+
+        if inspect.isasyncgenfunction(func):
+
+            @functools.wraps(func)
+            async def async_generator_inner(*args, **kwargs):
+                with TrailwatchContext(**decorator_kwargs) as tw_context:
+                    generator = call(tw_context, args, kwargs)
+                    method, value = generator.asend, None
+                    try:
+                        while True:
+                            start = time.perf_counter()
+                            try:
+                                item = await method(value)
+                            except StopAsyncIteration:
+                                return
+                            tw_context.record_item(time.perf_counter() - start)
+                            try:
+                                value = yield item
+                                method = generator.asend
+                            except GeneratorExit:
+                                # Consumer stopped iterating early (break, aclose())
+                                return
+                            except BaseException as error:
+                                method, value = generator.athrow, error
+                    finally:
+                        await generator.aclose()
+
+            return async_generator_inner
+
         @functools.wraps(func)
         def inner(*args, **kwargs):
             with TrailwatchContext(**decorator_kwargs) as tw_context:
-                if "trailwatch_execution_context" in [
-                    *inspect.getfullargspec(func).args,
-                    *inspect.getfullargspec(func).kwonlyargs,
-                ]:
-                    return func(
-                        *args,
-                        **kwargs,
-                        trailwatch_execution_context=tw_context,
-                    )
-                return func(*args, **kwargs)
+                return call(tw_context, args, kwargs)
 
         return inner
 
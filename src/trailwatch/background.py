@@ -0,0 +1,120 @@
+import atexit
+import collections
+import threading
+import time
+import warnings
+
+from typing import Callable
+
+
+class BackgroundWorker:
+    """
+    Runs telemetry tasks (finalizing executions, etc.) in a background thread.
+
+    Tasks are executed one at a time in submission order.
+    The worker thread is started lazily when the first task is submitted.
+
+    """
+
+    def __init__(self) -> None:
+        self._tasks: collections.deque[Callable[[], None]] = collections.deque()
+        self._condition = threading.Condition()
+        self._running = 0
+        self._thread: threading.Thread | None = None
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted tasks which are not finished yet."""
+        with self._condition:
+            return len(self._tasks) + self._running
+
+    def submit(self, task: Callable[[], None]) -> None:
+        with self._condition:
+            self._tasks.append(task)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="trailwatch-background",
+                    daemon=True,
+                )
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._tasks:
+                    self._condition.wait()
+                task = self._tasks.popleft()
+                self._running += 1
+            try:
+                task()
+            except Exception as error:
+                warnings.warn(f"Background TrailWatch task failed due to: {error}")
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._condition.notify_all()
+
+    def flush(self, deadline: float | None = None) -> bool:
+        """
+        Wait for all submitted tasks to finish.
+
+        Parameters
+        ----------
+        deadline : float, optional
+            Time budget in seconds. Tasks which have not started within
+            the budget are dropped (a task which is already running
+            cannot be interrupted). By default, wait indefinitely.
+
+        Returns
+        -------
+        bool
+            True if all tasks finished, False if some tasks were dropped
+            or are still running.
+
+        """
+        end = None if deadline is None else time.monotonic() + deadline
+        with self._condition:
+            while self._tasks or self._running:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if not self._tasks and not self._running:
+                return True
+            dropped = len(self._tasks)
+            self._tasks.clear()
+        warnings.warn(
+            f"TrailWatch flush deadline exceeded, dropped {dropped} pending task(s)"
+        )
+        return False
+
+
+worker = BackgroundWorker()
+
+
+def flush(deadline: float | None = None) -> bool:
+    """
+    Wait for background telemetry (executions finalized in background) to be sent.
+
+    This is called automatically when the interpreter exits. In environments
+    which freeze the process after a response is returned (e.g., AWS Lambda),
+    call it explicitly at the end of the handler with the remaining time budget.
+
+    Parameters
+    ----------
+    deadline : float, optional
+        Time budget in seconds. Telemetry which cannot be sent within
+        the budget is dropped. By default, wait until everything is sent.
+
+    Returns
+    -------
+    bool
+        True if all telemetry was sent, False otherwise.
+
+    """
+    return worker.flush(deadline)
+
+
+atexit.register(flush)
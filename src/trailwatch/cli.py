@@ -0,0 +1,410 @@
+import argparse
+import importlib
+import logging
+import os
+import selectors
+import shlex
+import signal
+import subprocess  # only runs the user's command without a shell # nosec B404
+import sys
+import time
+
+from typing import BinaryIO, Callable, Sequence, cast
+
+from .config import configure
+from .connectors.base import ConnectorFactory
+from .context import TrailwatchContext
+from .exceptions import ExecutionTimeoutError
+
+# Lines longer than this are split into multiple log records
+MAX_LINE_LENGTH = 64 * 1024
+READ_SIZE = 64 * 1024
+
+# Exit code used when the command is timed out (same as coreutils 'timeout')
+TIMEOUT_EXIT_CODE = 124
+
+DEFAULT_LOGGER = "trailwatch.run"
+DEFAULT_KILL_GRACE_PERIOD = 10.0
+
+
+class LineSplitter:
+    """Split a stream of bytes into lines without buffering more than one line."""
+
+    def __init__(self, emit: Callable[[bytes], None]) -> None:
+        self.emit = emit
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> None:
+        self.buffer += data
+        start = 0
+        while True:
+            end = self.buffer.find(b"\n", start)
+            if end == -1:
+                break
+            self.emit(bytes(self.buffer[start:end]))
+            start = end + 1
+        del self.buffer[:start]
+        while len(self.buffer) >= MAX_LINE_LENGTH:
+            self.emit(bytes(self.buffer[:MAX_LINE_LENGTH]))
+            del self.buffer[:MAX_LINE_LENGTH]
+
+    def close(self) -> None:
+        if self.buffer:
+            self.emit(bytes(self.buffer))
+            self.buffer.clear()
+
+
+def _signal_group(process: subprocess.Popen, signum: int) -> None:
+    try:
+        os.killpg(process.pid, signum)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_command(
+    command: Sequence[str],
+    logger: logging.Logger,
+    timeout: float | None = None,
+    kill_grace_period: float = DEFAULT_KILL_GRACE_PERIOD,
+    echo: bool = True,
+) -> tuple[int, bool]:
+    """
+    Run a command and log its output line by line as it is produced.
+
+    Output of the command is read from non-blocking pipes, so memory usage doesn't
+    depend on the amount of output. Lines from stdout are logged with INFO level
+    and lines from stderr with WARNING level. The command runs in its own process
+    group, which is terminated (SIGTERM, then SIGKILL after `kill_grace_period`
+    seconds) when the timeout expires.
+
+    Parameters
+    ----------
+    command : Sequence[str]
+        Command and its arguments.
+    logger : logging.Logger
+        Logger to which output lines are logged.
+    timeout : float, optional
+        Timeout in seconds. By default, no timeout is set.
+    kill_grace_period : float, optional
+        Seconds to wait after SIGTERM before sending SIGKILL. By default, 10.
+    echo : bool, optional
+        Also write the output to stdout and stderr of this process.
+        By default, True.
+
+    Returns
+    -------
+    tuple[int, bool]
+        Return code (negative signal number if the command was killed by a signal)
+        and whether the command was timed out.
+
+    """
+    process = subprocess.Popen(  # nosec B603
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+
+    # Forward termination signals to the process group of the command
+    forwarded = [signal.SIGINT, signal.SIGTERM, signal.SIGHUP]
+    original_handlers = {
+        signum: signal.signal(
+            signum, lambda signum, frame: _signal_group(process, signum)
+        )
+        for signum in forwarded
+    }
+
+    selector = selectors.DefaultSelector()
+    splitters = []
+    for stream, level, output in [
+        (process.stdout, logging.INFO, sys.stdout),
+        (process.stderr, logging.WARNING, sys.stderr),
+    ]:
+        assert stream is not None
+        # Echo raw bytes, unless the stream was replaced by one without a buffer
+        binary_output = cast(BinaryIO, getattr(output, "buffer", output))
+
+        def emit(
+            line: bytes,
+            level: int = level,
+            output: BinaryIO = binary_output,
+        ) -> None:
+            if echo:
+                output.write(line + b"\n")
+                output.flush()
+            logger.log(level, line.decode(errors="replace").rstrip("\r"))
+
+        os.set_blocking(stream.fileno(), False)
+        splitter = LineSplitter(emit)
+        splitters.append(splitter)
+        selector.register(stream, selectors.EVENT_READ, splitter)
+
+    timed_out = False
+    killed = False
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    try:
+        while selector.get_map():
+            wait = None
+            if deadline is not None:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    if not timed_out:
+                        timed_out = True
+                        _signal_group(process, signal.SIGTERM)
+                        deadline = time.monotonic() + kill_grace_period
+                    elif not killed:
+                        killed = True
+                        _signal_group(process, signal.SIGKILL)
+                        # Stop reading if output pipes were inherited by
+                        # a process outside of the process group
+                        deadline = time.monotonic() + 1
+                    else:
+                        break
+                    continue
+            for key, _ in selector.select(wait):
+                try:
+                    data = os.read(key.fd, READ_SIZE)
+                except BlockingIOError:
+                    continue
+                if data:
+                    key.data.feed(data)
+                else:
+                    selector.unregister(key.fileobj)
+        for splitter in splitters:
+            splitter.close()
+        # Output pipes may be closed (e.g., redirected by the command) long before
+        # the command exits, so the deadline is enforced while waiting as well
+        returncode = None
+        while returncode is None:
+            if deadline is None or killed:
+                returncode = process.wait()
+                break
+            try:
+                returncode = process.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                if not timed_out:
+                    timed_out = True
+                    _signal_group(process, signal.SIGTERM)
+                    deadline = time.monotonic() + kill_grace_period
+                else:
+                    killed = True
+                    _signal_group(process, signal.SIGKILL)
+    finally:
+        selector.close()
+        for stream in (process.stdout, process.stderr):
+            if stream is not None:
+                stream.close()
+        for signum, handler in original_handlers.items():
+            signal.signal(signum, handler)
+    return returncode, timed_out
+
+
+def _get_connectors(args: argparse.Namespace) -> list[ConnectorFactory]:
+    # pylint: disable=import-outside-toplevel
+    connectors: list[ConnectorFactory] = []
+    if args.url is not None:
+        from .connectors.aws import AwsConnectorFactory
+
+        if args.api_key is None:
+            raise ValueError("API key is required to use TrailWatch AWS service")
+        connectors.append(AwsConnectorFactory(url=args.url, api_key=args.api_key))
+    if args.local_directory is not None:
+        from .connectors.local import LocalConnectorFactory
+
+        connectors.append(LocalConnectorFactory(directory=args.local_directory))
+    if args.sqlite is not None:
+        from .connectors.sqlite import SqliteConnectorFactory
+
+        connectors.append(SqliteConnectorFactory(path=args.sqlite))
+    if args.openmetrics is not None:
+        from .connectors.openmetrics import OpenMetricsConnectorFactory
+
+        connectors.append(OpenMetricsConnectorFactory(path=args.openmetrics))
+    return connectors
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="trailwatch",
+        description="TrailWatch command line interface.",
+    )
+    subparsers = parser.add_subparsers(dest="subcommand", required=True)
+
+    run = subparsers.add_parser(
+        "run",
+        help="Run a command and watch it as a TrailWatch job execution.",
+        description=(
+            "Run a command and watch it as a TrailWatch job execution. "
+            "Output of the command is sent as logs, exit code determines "
+            "the execution status. Exits with the exit code of the command, "
+            "128 + signal number if it was killed by a signal, "
+            f"or {TIMEOUT_EXIT_CODE} if it was timed out."
+        ),
+        usage="%(prog)s --job JOB [options] -- command [args ...]",
+    )
+    run.add_argument("--job", required=True, help="Job name.")
+    run.add_argument(
+        "--job-description",
+        help="Job description. By default, the command.",
+    )
+    run.add_argument(
+        "--timeout",
+        type=float,
+        help="Timeout in seconds. The process group of the command is terminated "
+        "when the timeout expires and the execution is marked as timed out.",
+    )
+    run.add_argument(
+        "--kill-grace-period",
+        type=float,
+        default=DEFAULT_KILL_GRACE_PERIOD,
+        help="Seconds to wait after SIGTERM before sending SIGKILL (default: 10).",
+    )
+    run.add_argument(
+        "--logger",
+        default=DEFAULT_LOGGER,
+        help=f"Name of the logger used for output lines (default: {DEFAULT_LOGGER}).",
+    )
+    run.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Don't write output of the command to stdout and stderr.",
+    )
+
+    sharding = run.add_argument_group(
+        "sharding",
+        "Run the command as one of the shards of a parent execution.",
+    )
+    sharding.add_argument(
+        "--parent-execution-id",
+        help="ID of the parent execution shared by all shards "
+        "(env: TRAILWATCH_PARENT_EXECUTION_ID).",
+    )
+    sharding.add_argument(
+        "--shard",
+        help="Name or index of this shard (env: TRAILWATCH_SHARD). "
+        "By default, '<hostname>-<pid>'.",
+    )
+    sharding.add_argument(
+        "--shards",
+        type=int,
+        help="Total number of shards (env: TRAILWATCH_SHARDS).",
+    )
+
+    configuration = run.add_argument_group(
+        "configuration",
+        "Either import a module which calls 'trailwatch.configure' "
+        "or configure TrailWatch using the options below.",
+    )
+    configuration.add_argument(
+        "--configure",
+        metavar="MODULE",
+        help="Python module calling 'trailwatch.configure' when imported.",
+    )
+    configuration.add_argument(
+        "--project",
+        default=os.environ.get("TRAILWATCH_PROJECT"),
+        help="Project name (env: TRAILWATCH_PROJECT).",
+    )
+    configuration.add_argument(
+        "--project-description",
+        default=os.environ.get("TRAILWATCH_PROJECT_DESCRIPTION"),
+        help="Project description (env: TRAILWATCH_PROJECT_DESCRIPTION). "
+        "By default, the project name.",
+    )
+    configuration.add_argument(
+        "--environment",
+        default=os.environ.get("TRAILWATCH_ENVIRONMENT"),
+        help="Environment (env: TRAILWATCH_ENVIRONMENT).",
+    )
+    configuration.add_argument(
+        "--url",
+        default=os.environ.get("TRAILWATCH_URL"),
+        help="URL of TrailWatch AWS service (env: TRAILWATCH_URL).",
+    )
+    configuration.add_argument(
+        "--api-key",
+        default=os.environ.get("TRAILWATCH_API_KEY"),
+        help="API key of TrailWatch AWS service (env: TRAILWATCH_API_KEY).",
+    )
+    configuration.add_argument(
+        "--local-directory",
+        help="Directory used by the local connector.",
+    )
+    configuration.add_argument(
+        "--sqlite",
+        metavar="PATH",
+        help="Database used by the SQLite connector.",
+    )
+    configuration.add_argument(
+        "--openmetrics",
+        metavar="PATH",
+        help="Textfile used by the OpenMetrics connector.",
+    )
+    run.add_argument("command", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser
+
+
+def run(args: argparse.Namespace) -> int:
+    command = list(args.command)
+    if command and command[0] == "--":
+        command = command[1:]
+    if not command:
+        raise ValueError("Command to run is required")
+
+    if args.configure is not None:
+        importlib.import_module(args.configure)
+    else:
+        if args.project is None or args.environment is None:
+            raise ValueError("Project and environment are required")
+        configure(
+            project=args.project,
+            project_description=args.project_description or args.project,
+            environment=args.environment,
+            connectors=_get_connectors(args),
+        )
+
+    logger = logging.getLogger(args.logger)
+    logger.setLevel(logging.INFO)
+    # Output is echoed by `run_command`, don't print it again
+    logger.propagate = False
+
+    try:
+        with TrailwatchContext(
+            job=args.job,
+            job_description=args.job_description or shlex.join(command),
+            loggers=[args.logger],
+            parent_execution_id=args.parent_execution_id,
+            shard=args.shard,
+            shards=args.shards,
+        ):
+            returncode, timed_out = run_command(
+                command,
+                logger,
+                timeout=args.timeout,
+                kill_grace_period=args.kill_grace_period,
+                echo=not args.quiet,
+            )
+            if timed_out:
+                raise ExecutionTimeoutError
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, command)
+    except TimeoutError:
+        return TIMEOUT_EXIT_CODE
+    except subprocess.CalledProcessError as error:
+        if error.returncode < 0:
+            return 128 - error.returncode
+        return error.returncode
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    try:
+        return run(args)
+    except ValueError as error:
+        parser.error(str(error))
+    except FileNotFoundError as error:
+        print(f"trailwatch: {error}", file=sys.stderr)
+        return 127
+    return 0
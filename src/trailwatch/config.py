@@ -3,6 +3,7 @@ from dataclasses import dataclass, field
 from trailwatch.connectors.base import ConnectorFactory
 
 from .exceptions import NotConfiguredError
+from .shards import ShardInfo
 
 
 class Default:
@@ -29,6 +30,7 @@ class SharedConfiguration:
     execution_ttl: int | None = None
     log_ttl: int | None = None
     error_ttl: int | None = None
+    error_dedup_window: int | None = 3600
 
 
 class TrailwatchConfig:
@@ -37,6 +39,7 @@ class TrailwatchConfig:
     # Job-specific properties
     job: str
     job_description: str
+    shard: ShardInfo | None
 
     # Shared properties which can be overridden for each job
     _loggers: list[str] | Default | None
@@ -52,6 +55,7 @@ class TrailwatchConfig:
         execution_ttl: int | Default | None = DEFAULT,
         log_ttl: int | Default | None = DEFAULT,
         error_ttl: int | Default | None = DEFAULT,
+        shard: ShardInfo | None = None,
     ) -> None:
         """
         Initialize a TrailwatchConfig instance for a job.
@@ -74,6 +78,9 @@ class TrailwatchConfig:
         error_ttl : int, optional
             Time to live for the error records in seconds.
             By default, global configuration is used.
+        shard : ShardInfo, optional
+            Parent execution this execution is a shard of.
+            By default, the execution is not a shard.
 
         """
         if not self.shared_configuration.is_configured:
@@ -86,6 +93,7 @@ class TrailwatchConfig:
         self._execution_ttl = execution_ttl
         self._log_ttl = log_ttl
         self._error_ttl = error_ttl
+        self.shard = shard
 
     @property
     def project(self) -> str:
@@ -127,6 +135,10 @@ class TrailwatchConfig:
             return self._error_ttl
         return self.shared_configuration.error_ttl
 
+    @property
+    def error_dedup_window(self) -> int | None:
+        return self.shared_configuration.error_dedup_window
+
 
 def configure(
     project: str,
@@ -137,6 +149,7 @@ def configure(
     execution_ttl: int | None = None,
     log_ttl: int | None = None,
     error_ttl: int | None = None,
+    error_dedup_window: int | None = 3600,
 ):
     """
     Configure TrailWatch.
@@ -170,6 +183,12 @@ def configure(
     error_ttl : int, optional
         Time to live for the error records in seconds.
         By default, the error records are kept indefinitely.
+    error_dedup_window : int, optional
+        Time window in seconds within which repeated exceptions (same type and
+        traceback frames) are sent only as a fingerprint reference and a count
+        instead of the full traceback. The full traceback is sent for the first
+        occurrence in each window. Set to None to always send full tracebacks.
+        By default, 3600 seconds (1 hour).
 
     """
     if len(connectors) == 0:
@@ -183,5 +202,6 @@ def configure(
         execution_ttl=execution_ttl,
         log_ttl=log_ttl,
         error_ttl=error_ttl,
+        error_dedup_window=error_dedup_window,
         connectors=connectors,
     )
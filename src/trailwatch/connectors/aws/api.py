@@ -1,18 +1,72 @@
 import datetime
+import hashlib
+import threading
+import time
 import warnings
 
-from typing import BinaryIO
-
-from requests import Response, Session
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO
+
+from trailwatch.instrumentation import uninstrumented
+from trailwatch.stats import sdk_stats
+from trailwatch.ulid import new_ulid
+
+from .dedupe import get_upload_cache, hash_file
+from .multipart import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MULTIPART_THRESHOLD,
+    DEFAULT_PART_RETRIES,
+    DEFAULT_PART_SIZE,
+    MultipartUploadState,
+    get_size,
+)
+from .payload import (
+    DEFAULT_MAX_FIELD_SIZE,
+    DEFAULT_MAX_REQUEST_SIZE,
+    fit_metadata,
+    split_batches,
+    split_text,
+    truncate_text,
+)
+from .transport import HTTPError, Transport, TransportResponse
+
+# Number of times writes with an idempotency key are retried
+DEFAULT_RETRIES = 1
+# Status codes of responses to retried writes
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
 
 
 class TrailwatchApi:
-    def __init__(self, session: Session, url: str, api_key: str) -> None:
-        self.session = session
+    def __init__(
+        self,
+        transport: Transport,
+        url: str,
+        api_key: str,
+        multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+        multipart_part_size: int = DEFAULT_PART_SIZE,
+        multipart_concurrency: int = DEFAULT_CONCURRENCY,
+        max_request_size: int = DEFAULT_MAX_REQUEST_SIZE,
+        retries: int = DEFAULT_RETRIES,
+    ) -> None:
+        self.transport = transport
         self.url = url
         self.api_key = api_key
-
-    def _make_request(self, method: str, url: str, **kwargs) -> Response | None:
+        self.multipart_threshold = multipart_threshold
+        self.multipart_part_size = multipart_part_size
+        self.multipart_concurrency = multipart_concurrency
+        self.max_request_size = max_request_size
+        # Messages, tracebacks, etc. larger than this are split or truncated
+        self.max_field_size = min(DEFAULT_MAX_FIELD_SIZE, max_request_size // 4)
+        self.retries = retries
+
+    @uninstrumented()
+    def _make_request(
+        self,
+        method: str,
+        url: str,
+        idempotency_key: str | None = None,
+        **kwargs,
+    ) -> TransportResponse | None:
         """
         Make a request to the TrailWatch API.
 
@@ -27,27 +81,70 @@ class TrailwatchApi:
             _description_
         url : str
             _description_
+        idempotency_key : str, optional
+            Key sent in the 'Idempotency-Key' header. Backend processes requests
+            with the same key only once, so they are safe to retry.
+            Requests with a key are retried on connection errors, timeouts,
+            and server errors.
 
         Returns
         -------
-        Response | None
+        TransportResponse | None
             _description_
         """
+        headers = {"x-api-key": self.api_key}
+        retries = 0
+        if idempotency_key is not None:
+            headers["Idempotency-Key"] = idempotency_key
+            retries = self.retries
+        for attempt in range(retries + 1):
+            try:
+                response = self.transport.request(
+                    method,
+                    url,
+                    headers=headers,
+                    timeout=30,
+                    **kwargs,
+                )
+                if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                    response.raise_for_status()
+                    return response
+                error: Exception = HTTPError(f"{response.status_code} Error")
+            except Exception as exception:
+                error = exception
+                if attempt == retries:
+                    break
+            sdk_stats.increment("request_retries")
+            time.sleep(0.5 * 2**attempt)
+        warnings.warn(f"Failed to make '{method}' request to '{url}' due to: {error}")
+        return None
+
+    def _split_message(self, msg: str) -> list[str]:
+        chunks = split_text(msg, self.max_field_size)
+        if len(chunks) > 1:
+            sdk_stats.increment("split_records")
+        return chunks
+
+    def _truncate(self, text: str) -> str:
+        truncated = truncate_text(text, self.max_field_size)
+        if truncated is not text:
+            sdk_stats.increment("truncated_fields")
+        return truncated
+
+    def _fit_metadata(self, metadata: dict[str, Any]) -> dict[str, Any]:
         try:
-            response = self.session.request(
-                method,
-                url,
-                headers={"x-api-key": self.api_key},
-                timeout=30,
-                **kwargs,
-            )
-            response.raise_for_status()
-            return response
-        except Exception as error:
+            # Leave room for the rest of the payload
+            metadata, dropped = fit_metadata(metadata, self.max_request_size - 1024)
+        except (TypeError, ValueError) as error:
+            # E.g., circular references
+            warnings.warn(f"Execution metadata was not sent due to: '{error}'")
+            return {}
+        if dropped:
             warnings.warn(
-                f"Failed to make '{method}' request to '{url}' due to: {error}"
+                f"Execution metadata {dropped} was not sent because it exceeds "
+                f"maximum request size of {self.max_request_size} bytes"
             )
-            return None
+        return metadata
 
     def upsert_project(self, name: str, description: str) -> None:
         """
@@ -109,10 +206,18 @@ class TrailwatchApi:
         environment: str,
         job: str,
         ttl: int | None,
+        execution_id: str | None = None,
+        parent_execution_id: str | None = None,
+        shard: str | None = None,
+        shards: int | None = None,
+        start: datetime.datetime | None = None,
     ) -> str | None:
         """
         Create an execution record.
 
+        Execution ID is generated locally (ULID) and the request is retried
+        with the ID as the idempotency key, so retries never create duplicates.
+
         Parameters
         ----------
         project : str
@@ -124,6 +229,16 @@ class TrailwatchApi:
         ttl : int, optional
             Time to live in seconds.
             If not provided, the execution will be kept forever.
+        execution_id : str, optional
+            Execution ID. By default, a new ULID is generated.
+        parent_execution_id : str, optional
+            ID of the parent execution if this execution is a shard.
+        shard : str, optional
+            Name of the shard.
+        shards : int, optional
+            Expected number of shards, if this is a parent execution.
+        start : datetime.datetime, optional
+            Execution start timestamp. By default, current time.
 
         Returns
         -------
@@ -131,23 +246,32 @@ class TrailwatchApi:
             Execution ID or None if the request failed.
 
         """
+        execution_id = execution_id or new_ulid()
+        payload: dict[str, Any] = {
+            "id": execution_id,
+            "project": project,
+            "environment": environment,
+            "job": job,
+            "status": "running",
+            "start": (start or datetime.datetime.utcnow()).isoformat(),
+            "ttl": ttl,
+        }
+        if parent_execution_id is not None:
+            payload["parent_id"] = parent_execution_id
+            payload["shard"] = shard
+        if shards is not None:
+            payload["shards"] = shards
         try:
             response = self._make_request(
                 "POST",
                 "/".join([self.url, "api", "v1", "executions"]),
-                json={
-                    "project": project,
-                    "environment": environment,
-                    "job": job,
-                    "status": "running",
-                    "start": datetime.datetime.utcnow().isoformat(),
-                    "ttl": ttl,
-                },
+                idempotency_key=execution_id,
+                json=payload,
             )
             if response is None:
                 return None
-            return response.json()["id"]
-        except KeyError as error:
+            return response.json().get("id", execution_id)
+        except (KeyError, ValueError, AttributeError) as error:
             warnings.warn(f"Failed to create execution due to: '{error}'")
             return None
 
@@ -165,6 +289,11 @@ class TrailwatchApi:
         """
         Create a log record.
 
+        Messages larger than the maximum field size are split into multiple
+        log records with continuation markers (e.g., '[part 2/3] ').
+        Each record gets a locally generated ID used as the idempotency key,
+        parts of a split message get the same ID suffixed with the part number.
+
         Parameters
         ----------
         execution_id : str
@@ -186,26 +315,71 @@ class TrailwatchApi:
             If not provided, the log will be kept forever.
 
         """
-        self._make_request(
-            "POST",
-            "/".join([self.url, "api", "v1", "logs"]),
-            json={
-                "execution_id": execution_id,
-                "timestamp": timestamp.isoformat(),
-                "name": name,
-                "levelno": levelno,
-                "lineno": lineno,
-                "msg": msg,
-                "func": func,
-                "ttl": ttl,
-            },
-        )
+        log_id = new_ulid()
+        chunks = self._split_message(msg)
+        for number, chunk in enumerate(chunks, start=1):
+            chunk_id = log_id if len(chunks) == 1 else f"{log_id}-{number}"
+            self._make_request(
+                "POST",
+                "/".join([self.url, "api", "v1", "logs"]),
+                idempotency_key=chunk_id,
+                json={
+                    "id": chunk_id,
+                    "execution_id": execution_id,
+                    "timestamp": timestamp.isoformat(),
+                    "name": name,
+                    "levelno": levelno,
+                    "lineno": lineno,
+                    "msg": chunk,
+                    "func": func,
+                    "ttl": ttl,
+                },
+            )
+
+    def create_logs(self, logs: list[dict[str, Any]]) -> None:
+        """
+        Create multiple log records in as few requests as possible.
+
+        Messages larger than the maximum field size are split into multiple
+        log records with continuation markers, and records are split into
+        batches so that each request stays under the maximum request size.
+        Records without an 'id' get a locally generated one, so replaying
+        the same records doesn't create duplicates.
+
+        Parameters
+        ----------
+        logs : list[dict[str, Any]]
+            Log records. Each record has the same fields as the request body
+            of `create_log` ('id', 'execution_id', 'timestamp', 'name', 'levelno',
+            'lineno', 'msg', 'func', 'ttl').
+
+        """
+        records = []
+        for log in logs:
+            log_id = log.get("id") or new_ulid()
+            chunks = self._split_message(log["msg"])
+            if len(chunks) == 1:
+                records.append({**log, "id": log_id})
+            else:
+                records.extend(
+                    {**log, "id": f"{log_id}-{number}", "msg": chunk}
+                    for number, chunk in enumerate(chunks, start=1)
+                )
+        for batch in split_batches(records, self.max_request_size):
+            self._make_request(
+                "POST",
+                "/".join([self.url, "api", "v1", "logs", "batch"]),
+                # Same records always produce the same key
+                idempotency_key=f"{batch[0]['id']}-{batch[-1]['id']}-{len(batch)}",
+                json={"logs": batch},
+            )
 
     def update_execution(
         self,
         execution_id: str,
         status: str,
         end: datetime.datetime,
+        metadata: dict[str, Any] | None = None,
     ) -> None:
         """
         Update an execution record.
@@ -218,12 +392,98 @@ class TrailwatchApi:
             Execution status.
         end : datetime.datetime
             Execution end timestamp.
+        metadata : dict[str, Any], optional
+            Additional execution data (resource profile, etc.).
+
+        """
+        payload: dict[str, Any] = {"status": status, "end": end.isoformat()}
+        if metadata:
+            payload["metadata"] = self._fit_metadata(metadata)
+        self._make_request(
+            "PATCH",
+            "/".join([self.url, "api", "v1", "executions", execution_id]),
+            # Final update is safe to retry
+            idempotency_key=f"{execution_id}-end",
+            json=payload,
+        )
+
+    def update_execution_progress(
+        self,
+        execution_id: str,
+        metadata: dict[str, Any],
+        heartbeat: datetime.datetime | None = None,
+    ) -> None:
+        """
+        Update progress of a running execution.
+
+        Parameters
+        ----------
+        execution_id : str
+            Execution ID.
+        metadata : dict[str, Any]
+            Additional execution data (progress, metrics, etc.).
+        heartbeat : datetime.datetime, optional
+            Timestamp proving that the execution is still alive.
 
         """
+        payload: dict[str, Any] = {"metadata": self._fit_metadata(metadata)}
+        if heartbeat is not None:
+            payload["heartbeat"] = heartbeat.isoformat()
         self._make_request(
             "PATCH",
             "/".join([self.url, "api", "v1", "executions", execution_id]),
-            json={"status": status, "end": end.isoformat()},
+            json=payload,
+        )
+
+    def report_shard(
+        self,
+        parent_execution_id: str,
+        execution_id: str,
+        shard: str,
+        status: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        counters: dict[str, float] | None = None,
+    ) -> None:
+        """
+        Report a finished shard to its parent execution.
+
+        Status, timing, and counters of the parent are aggregated by the backend
+        as shards report (e.g., the parent is 'partial' if some shards failed).
+
+        Parameters
+        ----------
+        parent_execution_id : str
+            ID of the parent execution.
+        execution_id : str
+            ID of the shard execution.
+        shard : str
+            Name of the shard.
+        status : str
+            Status of the shard execution.
+        start : datetime.datetime
+            Start timestamp of the shard execution.
+        end : datetime.datetime
+            End timestamp of the shard execution.
+        counters : dict[str, float], optional
+            Counter totals of the shard execution, summed in the parent.
+
+        """
+        self._make_request(
+            "POST",
+            "/".join(
+                [self.url, "api", "v1", "executions", parent_execution_id, "shards"]
+            ),
+            # Each shard is counted once, even if the request is retried
+            idempotency_key=f"{execution_id}-shard",
+            json={
+                "execution_id": execution_id,
+                "shard": shard,
+                "status": status,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "counters": counters or {},
+            },
         )
 
     def create_error(
@@ -232,12 +492,17 @@ class TrailwatchApi:
         timestamp: datetime.datetime,
         name: str,
         message: str,
-        traceback: str,
+        traceback: str | None,
         ttl: int | None,
+        fingerprint: str | None = None,
+        count: int | None = None,
     ) -> None:
         """
         Create an error record.
 
+        Message and traceback larger than the maximum field size are truncated,
+        keeping their beginning and end.
+
         Parameters
         ----------
         execution_id : str
@@ -248,35 +513,103 @@ class TrailwatchApi:
             Error name.
         message : str
             Error message.
-        traceback : str
+        traceback : str | None
             Traceback.
+            None if the error is a repeat of an already sent error
+            identified by `fingerprint`.
         ttl : int | None
             Time to live in seconds.
             If not provided, the error will be kept forever.
+        fingerprint : str, optional
+            Stable fingerprint of the exception (type and traceback frames).
+        count : int, optional
+            Number of occurrences of the exception with this fingerprint
+            within the deduplication window, including this one.
 
         """
+        error_id = new_ulid()
+        payload = {
+            "id": error_id,
+            "execution_id": execution_id,
+            "timestamp": timestamp.isoformat(),
+            "name": name,
+            "msg": self._truncate(message),
+            "ttl": ttl,
+            "traceback": None if traceback is None else self._truncate(traceback),
+        }
+        if fingerprint is not None:
+            payload["fingerprint"] = fingerprint
+            payload["count"] = count
         self._make_request(
             "POST",
             "/".join([self.url, "api", "v1", "errors"]),
-            json={
-                "execution_id": execution_id,
-                "timestamp": timestamp.isoformat(),
-                "name": name,
-                "msg": message,
-                "ttl": ttl,
-                "traceback": traceback,
-            },
+            idempotency_key=error_id,
+            json=payload,
         )
 
+    def register_file_reference(
+        self,
+        execution_id: str,
+        name: str,
+        content_hash: str,
+    ) -> bool:
+        """
+        Associate already uploaded content with an execution without uploading it.
+
+        Parameters
+        ----------
+        execution_id : str
+            Execution ID.
+        name : str
+            File name.
+        content_hash : str
+            SHA-256 hash of the file content.
+
+        Returns
+        -------
+        bool
+            True if the content is known to the backend and the reference was
+            created, False otherwise (content must be uploaded).
+
+        """
+        response = self._make_request(
+            "POST",
+            "/".join(
+                [
+                    self.url,
+                    "api",
+                    "v1",
+                    "executions",
+                    execution_id,
+                    "files",
+                    "reference",
+                ]
+            ),
+            json={"file": name, "sha256": content_hash},
+        )
+        if response is None:
+            return False
+        try:
+            return bool(response.json().get("exists", False))
+        except ValueError:
+            return False
+
     def upload_file(
         self,
         execution_id: str,
         name: str,
         file: BinaryIO,
-    ) -> None:
+        project: str | None = None,
+    ) -> bool:
         """
         Upload a file.
 
+        Content of seekable files is hashed before uploading. If the same content
+        was already uploaded for the project (according to the local cache or
+        the backend), only a reference to it is registered.
+        Seekable files larger than the multipart threshold are uploaded
+        in parts concurrently (see `upload_file_multipart`).
+
         Parameters
         ----------
         execution_id : str
@@ -285,9 +618,58 @@ class TrailwatchApi:
             File name.
         file : BinaryIO
             File object.
+        project : str, optional
+            Project name. Used to look up content already uploaded for the project.
+
+        Returns
+        -------
+        bool
+            True if the file was uploaded (or referenced), False otherwise.
 
         """
+        size = get_size(file)
+        content_hash = None
+        if size is not None:
+            try:
+                content_hash = hash_file(file)
+            except OSError:
+                content_hash = None
+        cache = (
+            get_upload_cache(project)
+            if project is not None and content_hash is not None
+            else None
+        )
+        if cache is not None and content_hash is not None and content_hash in cache:
+            if self.register_file_reference(execution_id, name, content_hash):
+                sdk_stats.increment("upload_dedupe_hits")
+                return True
+            # Backend doesn't have the content anymore
+            cache.discard(content_hash)
+
+        if size is not None and size >= self.multipart_threshold:
+            uploaded = self.upload_file_multipart(
+                execution_id, name, file, size, content_hash
+            )
+        else:
+            uploaded = self._upload_file_single(
+                execution_id, name, file, size, content_hash
+            )
+        if uploaded and cache is not None and content_hash is not None:
+            cache.add(content_hash)
+        return uploaded
+
+    @uninstrumented()
+    def _upload_file_single(
+        self,
+        execution_id: str,
+        name: str,
+        file: BinaryIO,
+        size: int | None,
+        content_hash: str | None,
+    ) -> bool:
+        """Upload a file in a single request. Return True if succeeded."""
         try:
+            start = time.monotonic()
             # Get pre-signed upload URL
             response = self._make_request(
                 "POST",
@@ -301,18 +683,207 @@ class TrailwatchApi:
                         "files",
                     ]
                 ),
-                json={"file": name},
+                json={"file": name, "sha256": content_hash},
             )
             if response is None:
-                return
+                return False
+            response_json = response.json()
+            if response_json.get("exists", False):
+                # Backend already has this content and registered a reference
+                sdk_stats.increment("upload_dedupe_hits")
+                return True
 
             # Upload file
-            response_json = response.json()
-            response = self.session.post(
+            response = self.transport.request(
+                "POST",
                 response_json["url"],
                 data=response_json["fields"],
                 files={"file": file},
+                timeout=300,
             )
             response.raise_for_status()
+            sdk_stats.increment("uploads")
+            if size is not None:
+                sdk_stats.increment("upload_bytes", size)
+                sdk_stats.increment("upload_seconds", time.monotonic() - start)
+            return True
         except Exception as error:
             warnings.warn(f"Failed to upload file due to: '{error}'")
+            return False
+
+    @uninstrumented()
+    def _upload_part(
+        self,
+        url: str,
+        file: BinaryIO,
+        lock: threading.Lock,
+        offset: int,
+        size: int,
+    ) -> dict[str, str]:
+        """
+        Upload a part of a file, retrying on failure.
+
+        Return ETag of the part and SHA-256 hash of its content.
+
+        """
+        with lock:
+            file.seek(offset)
+            data = file.read(size)
+        for attempt in range(DEFAULT_PART_RETRIES + 1):
+            try:
+                response = self.transport.request("PUT", url, data=data, timeout=300)
+                response.raise_for_status()
+                etag = response.headers.get("ETag")
+                if not etag:
+                    raise HTTPError(f"Missing ETag for url: {url}")
+                return {"etag": etag, "sha256": hashlib.sha256(data).hexdigest()}
+            except Exception:
+                if attempt == DEFAULT_PART_RETRIES:
+                    raise
+                sdk_stats.increment("upload_part_retries")
+                time.sleep(2**attempt)
+        raise AssertionError("unreachable")
+
+    def upload_file_multipart(
+        self,
+        execution_id: str,
+        name: str,
+        file: BinaryIO,
+        size: int,
+        content_hash: str | None = None,
+    ) -> bool:
+        """
+        Upload a large file in parts concurrently.
+
+        Each part is uploaded to its own pre-signed URL and retried independently.
+        Progress is persisted locally, so if the upload is interrupted, uploading
+        the same content again (same execution, name, and content hash) resumes it
+        and only uploads the missing parts. Content of each uploaded part is
+        verified against its hash before its ETag is reused.
+
+        Parameters
+        ----------
+        execution_id : str
+            Execution ID.
+        name : str
+            File name.
+        file : BinaryIO
+            Seekable file object.
+        size : int
+            Number of bytes to upload starting from the current file position.
+        content_hash : str, optional
+            SHA-256 hash of the file content. If provided, backend skips
+            the upload when it already has this content. Required to resume
+            interrupted uploads.
+
+        Returns
+        -------
+        bool
+            True if the upload succeeded (or the content already exists).
+
+        """
+        files_url = "/".join(
+            [self.url, "api", "v1", "executions", execution_id, "files", "multipart"]
+        )
+        state = MultipartUploadState(
+            execution_id, name, content_hash, self.multipart_part_size
+        )
+        part_count = max(-(-size // self.multipart_part_size), 1)
+        try:
+            start = time.monotonic()
+            base_offset = file.tell()
+
+            # Get pre-signed part URLs (for a new or an existing upload)
+            response = self._make_request(
+                "POST",
+                files_url,
+                json={
+                    "file": name,
+                    "parts": part_count,
+                    "upload_id": state.upload_id,
+                    "sha256": content_hash,
+                },
+            )
+            if response is None:
+                return False
+            response_json = response.json()
+            if response_json.get("exists", False):
+                # Backend already has this content and registered a reference
+                state.delete()
+                sdk_stats.increment("upload_dedupe_hits")
+                return True
+            if response_json["upload_id"] != state.upload_id:
+                # Upload cannot be resumed, start from scratch
+                state.upload_id = response_json["upload_id"]
+                state.parts = {}
+                state.save()
+
+            # Upload missing parts
+            lock = threading.Lock()
+            uploaded_bytes = 0
+            with ThreadPoolExecutor(
+                max_workers=self.multipart_concurrency,
+                thread_name_prefix="trailwatch-upload",
+            ) as executor:
+                futures = {}
+                for number, url in enumerate(response_json["urls"], start=1):
+                    offset = (number - 1) * self.multipart_part_size
+                    part_size = min(self.multipart_part_size, size - offset)
+                    if number in state.parts:
+                        with lock:
+                            file.seek(base_offset + offset)
+                            data = file.read(part_size)
+                        if state.is_uploaded(number, data):
+                            continue
+                    future = executor.submit(
+                        self._upload_part,
+                        url,
+                        file,
+                        lock,
+                        base_offset + offset,
+                        part_size,
+                    )
+                    futures[future] = (number, part_size)
+                errors = []
+                for future, (number, part_size) in futures.items():
+                    try:
+                        part = future.result()
+                    except Exception as error:
+                        errors.append(error)
+                        continue
+                    with lock:
+                        state.parts[number] = part
+                        state.save()
+                    uploaded_bytes += part_size
+                    sdk_stats.increment("upload_parts")
+            file.seek(base_offset + size)
+            sdk_stats.increment("upload_bytes", uploaded_bytes)
+            sdk_stats.increment("upload_seconds", time.monotonic() - start)
+            if errors:
+                raise errors[0]
+
+            # Complete upload
+            response = self._make_request(
+                "POST",
+                "/".join([files_url, "complete"]),
+                json={
+                    "file": name,
+                    "upload_id": state.upload_id,
+                    "parts": [
+                        {"part_number": number, "etag": part["etag"]}
+                        for number, part in sorted(state.parts.items())
+                    ],
+                },
+            )
+            if response is None:
+                return False
+            state.delete()
+            sdk_stats.increment("uploads")
+            return True
+        except Exception as error:
+            warnings.warn(
+                f"Failed to upload file due to: '{error}'. "
+                f"Upload it again to resume ({len(state.parts)} of "
+                f"{part_count} parts uploaded)."
+            )
+            return False
@@ -1,16 +1,25 @@
 import datetime
 import logging
+import threading
 import traceback
 
 from types import TracebackType
-from typing import TYPE_CHECKING, BinaryIO, Type
-
-from requests import Session
+from typing import TYPE_CHECKING, Any, BinaryIO, Type
 
 from trailwatch.connectors.base import Connector, ConnectorFactory
+from trailwatch.fingerprint import fingerprint_cache, fingerprint_exception
+from trailwatch.ratelimit import CallSiteRateLimiter
+from trailwatch.ulid import new_ulid
 
 from .api import TrailwatchApi
-from .handler import AwsHandler
+from .handler import AwsHandler, BufferedAwsHandler
+from .multipart import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MULTIPART_THRESHOLD,
+    DEFAULT_PART_SIZE,
+)
+from .payload import DEFAULT_MAX_REQUEST_SIZE
+from .transport import Transport, Urllib3Transport
 
 if TYPE_CHECKING:
     from trailwatch.config import TrailwatchConfig
@@ -19,19 +28,51 @@ logger = logging.getLogger(__name__)
 
 
 class AwsConnector(Connector):
-    def __init__(self, config: "TrailwatchConfig", url: str, api_key: str) -> None:
+    def __init__(
+        self,
+        config: "TrailwatchConfig",
+        url: str,
+        api_key: str,
+        multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+        multipart_part_size: int = DEFAULT_PART_SIZE,
+        multipart_concurrency: int = DEFAULT_CONCURRENCY,
+        transport: Transport | None = None,
+        buffer_logs: bool = False,
+        log_flush_interval: float = 1.0,
+        log_rate_limit: float | None = None,
+        log_rate_burst: int = 100,
+        max_request_size: int = DEFAULT_MAX_REQUEST_SIZE,
+    ) -> None:
         self.config = config
-        self.api = TrailwatchApi(Session(), url, api_key)
+        self.buffer_logs = buffer_logs
+        self.log_flush_interval = log_flush_interval
+        self.log_rate_limit = log_rate_limit
+        self.log_rate_burst = log_rate_burst
+        self.api = TrailwatchApi(
+            transport or Urllib3Transport(),
+            url,
+            api_key,
+            multipart_threshold=multipart_threshold,
+            multipart_part_size=multipart_part_size,
+            multipart_concurrency=multipart_concurrency,
+            max_request_size=max_request_size,
+        )
         self.execution_id: str | None = None
+        self.start: datetime.datetime | None = None
         self.handler: AwsHandler | None = None
+        self.metadata: dict[str, Any] = {}
+        self.creation: threading.Thread | None = None
+        self.creation_lock = threading.Lock()
+        self.created = False
 
     @property
     def execution_url(self) -> str | None:
-        if self.execution_id is None:
+        # Waits for creation in progress, so it never links to a missing record
+        if self.execution_id is None or not self._wait_for_execution():
             return None
         return "/".join([self.api.url, "executions", self.execution_id])
 
-    def start_execution(self) -> None:
+    def _create_execution(self) -> None:
         # Create entries in TrailWatch database
         self.api.upsert_project(
             self.config.project,
@@ -43,32 +84,126 @@ class AwsConnector(Connector):
             self.config.job_description,
             self.config.project,
         )
-        self.execution_id = self.api.create_execution(
+        shard = self.config.shard
+        if shard is not None:
+            # Whichever shard starts first creates the parent, requests of other
+            # shards are deduplicated by the parent ID used as the idempotency key
+            self.api.create_execution(
+                self.config.project,
+                self.config.environment,
+                self.config.job,
+                self.config.execution_ttl,
+                execution_id=shard.parent_execution_id,
+                shards=shard.shards,
+                start=self.start,
+            )
+        execution_id = self.api.create_execution(
             self.config.project,
             self.config.environment,
             self.config.job,
             self.config.execution_ttl,
+            execution_id=self.execution_id,
+            parent_execution_id=None if shard is None else shard.parent_execution_id,
+            shard=None if shard is None else shard.shard,
+            start=self.start,
         )
+        if execution_id is not None and execution_id != self.execution_id:
+            # Backend assigned its own ID, it's adopted before `created` is set,
+            # so requests waiting for the execution refer to the created record
+            self.execution_id = execution_id
+            if self.handler is not None:
+                self.handler.execution_id = execution_id
+        self.created = execution_id is not None
+
+    def _wait_for_execution(self, retry: bool = False) -> bool:
+        """
+        Wait until the execution record is created. Return False if it failed.
+
+        If `retry` is True, failed creation is retried (requests are idempotent,
+        so the execution keeps its ID).
+
+        """
+        if self.creation is not None:
+            self.creation.join()
+        if retry and not self.created:
+            with self.creation_lock:
+                if not self.created:
+                    self._create_execution()
+        return self.created
+
+    def start_execution(self) -> None:
+        # ID is generated locally, so the execution is created in background
+        # without delaying the job, and logs are captured from the start
+        self.start = datetime.datetime.utcnow()
+        self.execution_id = new_ulid()
 
         # Register logging handlers
-        if self.execution_id is not None:
+        rate_limiter = (
+            CallSiteRateLimiter(self.log_rate_limit, self.log_rate_burst)
+            if self.log_rate_limit is not None
+            else None
+        )
+        if self.buffer_logs:
+            self.handler = BufferedAwsHandler(
+                self.execution_id,
+                self.api,
+                self.config.log_ttl,
+                rate_limiter=rate_limiter,
+                flush_interval=self.log_flush_interval,
+                wait_for_execution=self._wait_for_execution,
+            )
+        else:
             self.handler = AwsHandler(
                 self.execution_id,
                 self.api,
                 self.config.log_ttl,
+                rate_limiter=rate_limiter,
+                wait_for_execution=self._wait_for_execution,
             )
-            for logger_name in self.config.loggers:
-                logging.getLogger(logger_name).addHandler(self.handler)
+        for logger_name in self.config.loggers:
+            logging.getLogger(logger_name).addHandler(self.handler)
 
-    def finalize_execution(self, status: str, end: datetime.datetime) -> None:
-        if self.execution_id is not None:
-            self.api.update_execution(self.execution_id, status, end)
+        # Started after the handler exists, so it can adopt the created ID
+        self.creation = threading.Thread(
+            target=self._create_execution,
+            name="trailwatch-create-execution",
+            daemon=True,
+        )
+        self.creation.start()
 
-        # Remove logging handlers
+    def detach_handlers(self) -> None:
         if self.handler is not None:
             for logger_name in self.config.loggers:
                 logging.getLogger(logger_name).removeHandler(self.handler)
 
+    def finalize_execution(self, status: str, end: datetime.datetime) -> None:
+        self.detach_handlers()
+        # Retry creating the execution if it failed, so it can still be finalized
+        created = self.execution_id is not None and self._wait_for_execution(retry=True)
+        # Ship buffered logs before the execution ends
+        if self.handler is not None:
+            self.handler.close()
+
+        if self.execution_id is not None and created:
+            self.api.update_execution(
+                self.execution_id,
+                status,
+                end,
+                metadata=self.metadata,
+            )
+            shard = self.config.shard
+            if shard is not None:
+                assert self.start is not None
+                self.api.report_shard(
+                    shard.parent_execution_id,
+                    self.execution_id,
+                    shard.shard,
+                    status,
+                    self.start,
+                    end,
+                    counters=(self.metadata.get("metrics") or {}).get("counters"),
+                )
+
     def handle_exception(
         self,
         timestamp: datetime.datetime,
@@ -76,33 +211,69 @@ class AwsConnector(Connector):
         exc_value: Exception,
         exc_traceback: TracebackType,
     ):
-        if self.execution_id is not None:
+        if self.execution_id is not None and self._wait_for_execution():
+            fingerprint = fingerprint_exception(exc_type, exc_value, exc_traceback)
+            count = fingerprint_cache.record(
+                fingerprint, self.config.error_dedup_window
+            )
             self.api.create_error(
                 execution_id=self.execution_id,
                 timestamp=timestamp,
                 name=exc_type.__name__,
                 message=str(exc_value),
-                traceback="".join(
-                    traceback.format_exception(
-                        exc_type,
-                        value=exc_value,
-                        tb=exc_traceback,
+                traceback=(
+                    "".join(
+                        traceback.format_exception(
+                            exc_type,
+                            value=exc_value,
+                            tb=exc_traceback,
+                        )
                     )
+                    if count == 1
+                    else None
                 ),
                 ttl=self.config.error_ttl,
+                fingerprint=fingerprint,
+                count=count,
             )
 
-    def send_fileobj(self, name: str, file: BinaryIO) -> None:
-        if self.execution_id is not None:
-            self.api.upload_file(
-                execution_id=self.execution_id,
-                name=name,
-                file=file,
-            )
+    def add_execution_metadata(self, key: str, value: Any) -> None:
+        self.metadata[key] = value
+
+    def report_progress(
+        self,
+        data: dict[str, Any],
+        heartbeat: datetime.datetime | None = None,
+    ) -> None:
+        if self.execution_id is not None and self._wait_for_execution():
+            self.api.update_execution_progress(self.execution_id, data, heartbeat)
+
+    def send_fileobj(self, name: str, file: BinaryIO) -> bool:
+        if self.execution_id is None or not self._wait_for_execution():
+            return False
+        return self.api.upload_file(
+            execution_id=self.execution_id,
+            name=name,
+            file=file,
+            project=self.config.project,
+        )
 
 
 class AwsConnectorFactory(ConnectorFactory):
-    def __init__(self, url: str, api_key: str) -> None:
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+        multipart_part_size: int = DEFAULT_PART_SIZE,
+        multipart_concurrency: int = DEFAULT_CONCURRENCY,
+        transport: Transport | None = None,
+        buffer_logs: bool = False,
+        log_flush_interval: float = 1.0,
+        log_rate_limit: float | None = None,
+        log_rate_burst: int = 100,
+        max_request_size: int = DEFAULT_MAX_REQUEST_SIZE,
+    ) -> None:
         """
         Initialize TrailWatch AWS connector factory.
 
@@ -113,10 +284,73 @@ class AwsConnectorFactory(ConnectorFactory):
             E.g., 'https://somerandomstring.execute-api.us-west-2.amazonaws.com'.
         api_key : str
             API key to be included in the 'x-api-key' header when calling the REST API.
+        multipart_threshold : int, optional
+            Files of this size in bytes or larger are uploaded in parts concurrently.
+            By default, 64 MiB.
+        multipart_part_size : int, optional
+            Size of each part in bytes for multipart uploads. By default, 16 MiB.
+        multipart_concurrency : int, optional
+            Maximum number of parts uploaded concurrently. By default, 4.
+        transport : Transport, optional
+            HTTP client used to call the REST API and upload files.
+            By default, a urllib3-based transport shared by all executions
+            created by this factory, so connections are reused.
+            Use `Http2Transport` to multiplex requests over a single HTTP/2
+            connection or provide a custom implementation (e.g., for testing).
+        buffer_logs : bool, optional
+            Buffer log records per thread and send them in batches from a background
+            thread instead of sending each record synchronously. Logging threads
+            never wait for each other or for the API, which is recommended
+            for multi-threaded jobs. By default, False.
+        log_flush_interval : float, optional
+            Interval in seconds at which buffered log records are sent.
+            Only used when `buffer_logs` is True. By default, 1 second.
+        log_rate_limit : float, optional
+            Maximum average number of log records per second sent from each
+            call site (logger name, line number, and message template).
+            Records over the limit are suppressed and periodically summarized
+            with a 'N similar messages suppressed' record.
+            By default, logs are not rate limited.
+        log_rate_burst : int, optional
+            Number of records a call site may send at once before the rate limit
+            applies. By default, 100.
+        max_request_size : int, optional
+            Maximum size of a request body in bytes. Large log messages are split
+            into multiple records, large error messages and tracebacks are
+            truncated, and log batches are split to stay under this size.
+            By default, 5 MiB.
 
         """
         self.url = url.strip(" /")
         self.api_key = api_key
+        self.multipart_threshold = multipart_threshold
+        self.multipart_part_size = multipart_part_size
+        self.multipart_concurrency = multipart_concurrency
+        self._transport = transport
+        self.buffer_logs = buffer_logs
+        self.log_flush_interval = log_flush_interval
+        self.log_rate_limit = log_rate_limit
+        self.log_rate_burst = log_rate_burst
+        self.max_request_size = max_request_size
+
+    @property
+    def transport(self) -> Transport:
+        if self._transport is None:
+            self._transport = Urllib3Transport()
+        return self._transport
 
     def __call__(self, config: "TrailwatchConfig") -> AwsConnector:
-        return AwsConnector(config, self.url, self.api_key)
+        return AwsConnector(
+            config,
+            self.url,
+            self.api_key,
+            multipart_threshold=self.multipart_threshold,
+            multipart_part_size=self.multipart_part_size,
+            multipart_concurrency=self.multipart_concurrency,
+            transport=self.transport,
+            buffer_logs=self.buffer_logs,
+            log_flush_interval=self.log_flush_interval,
+            log_rate_limit=self.log_rate_limit,
+            log_rate_burst=self.log_rate_burst,
+            max_request_size=self.max_request_size,
+        )
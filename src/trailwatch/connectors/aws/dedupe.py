@@ -0,0 +1,84 @@
+import hashlib
+import threading
+
+from typing import BinaryIO
+
+from .multipart import STATE_DIRECTORY
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file: BinaryIO) -> str:
+    """
+    Calculate SHA-256 hash of the remaining content of a seekable file.
+
+    File position is restored after the hash is calculated.
+
+    """
+    position = file.tell()
+    digest = hashlib.sha256()
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    file.seek(position)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """
+    Local cache of hashes of file contents already uploaded for a project.
+
+    Cache is stored as an append-only file with one hash per line,
+    so it is shared between processes on the same host.
+
+    """
+
+    def __init__(self, project: str) -> None:
+        key = hashlib.sha1(project.encode(), usedforsecurity=False).hexdigest()
+        self.path = STATE_DIRECTORY / f"hashes-{key}.txt"
+        self._hashes: set[str] | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> set[str]:
+        if self._hashes is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    self._hashes = {line.strip() for line in file if line.strip()}
+            except OSError:
+                self._hashes = set()
+        return self._hashes
+
+    def __contains__(self, content_hash: str) -> bool:
+        with self._lock:
+            return content_hash in self._load()
+
+    def add(self, content_hash: str) -> None:
+        with self._lock:
+            hashes = self._load()
+            if content_hash in hashes:
+                return
+            hashes.add(content_hash)
+            try:
+                STATE_DIRECTORY.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as file:
+                    file.write(f"{content_hash}\n")
+            except OSError:
+                pass
+
+    def discard(self, content_hash: str) -> None:
+        """Forget a hash in this process (e.g., backend no longer has the content)."""
+        with self._lock:
+            self._load().discard(content_hash)
+
+
+_caches: dict[str, UploadCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_upload_cache(project: str) -> UploadCache:
+    with _caches_lock:
+        if project not in _caches:
+            _caches[project] = UploadCache(project)
+        return _caches[project]
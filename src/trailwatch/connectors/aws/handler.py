@@ -1,7 +1,14 @@
+import collections
 import datetime
+import heapq
+import itertools
 import logging
+import threading
+import warnings
 
-from typing import Optional
+from typing import Any, Callable, Optional
+
+from trailwatch.ratelimit import CallSiteRateLimiter
 
 from .api import TrailwatchApi
 
@@ -12,14 +19,34 @@ class AwsHandler(logging.Handler):
         execution_id: str,
         api: TrailwatchApi,
         ttl: Optional[int] = None,
+        rate_limiter: Optional[CallSiteRateLimiter] = None,
+        wait_for_execution: Optional[Callable[[], bool]] = None,
     ):
         logging.Handler.__init__(self)
         self.execution_id = execution_id
         self.api = api
         self.ttl = ttl
+        self.rate_limiter = rate_limiter
+        # Blocks until the execution record is created, returns False if it failed
+        self.wait_for_execution = wait_for_execution
 
-    def emit(self, record: logging.LogRecord):
+    def filter(self, record: logging.LogRecord):  # type: ignore
+        result = super().filter(record)
+        if (
+            result
+            and self.rate_limiter is not None
+            and not self.rate_limiter.allow(record)
+        ):
+            return False
+        return result
+
+    def _execution_exists(self) -> bool:
+        return self.wait_for_execution is None or self.wait_for_execution()
+
+    def _send(self, record: logging.LogRecord) -> None:
         self.format(record)
+        if not self._execution_exists():
+            return
         self.api.create_log(
             execution_id=self.execution_id,
             timestamp=datetime.datetime.utcfromtimestamp(record.created),
@@ -30,3 +57,159 @@ class AwsHandler(logging.Handler):
             func=record.funcName,
             ttl=self.ttl,
         )
+
+    def emit(self, record: logging.LogRecord):
+        self._send(record)
+        if self.rate_limiter is not None and self.rate_limiter.summary_due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send summaries of messages suppressed by the rate limiter."""
+        if self.rate_limiter is not None:
+            for summary in self.rate_limiter.collect_summaries():
+                self._send(summary)
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+
+class BufferedAwsHandler(AwsHandler):
+    """
+    AWS log handler which doesn't block or serialize logging threads.
+
+    Records are appended to per-thread buffers without acquiring any locks
+    (the handler lock is not used) and shipped in batches by a background thread,
+    which merges buffers of all threads in timestamp order.
+    If a thread logs faster than records are shipped, its oldest buffered
+    records are dropped once `max_buffered` records are waiting.
+
+    """
+
+    def __init__(
+        self,
+        execution_id: str,
+        api: TrailwatchApi,
+        ttl: Optional[int] = None,
+        rate_limiter: Optional[CallSiteRateLimiter] = None,
+        flush_interval: float = 1.0,
+        max_batch_size: int = 500,
+        max_buffered: int = 100_000,
+        wait_for_execution: Optional[Callable[[], bool]] = None,
+    ):
+        super().__init__(
+            execution_id,
+            api,
+            ttl,
+            rate_limiter,
+            wait_for_execution=wait_for_execution,
+        )
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_buffered = max_buffered
+        self._local = threading.local()
+        # Thread -> its buffer, only modified when a thread logs for the first time
+        self._buffers: dict[threading.Thread, collections.deque] = {}
+        self._buffers_lock = threading.Lock()
+        # Ensures that records are shipped by one thread at a time and in order
+        self._ship_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="trailwatch-log-shipper",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _get_buffer(self) -> collections.deque:
+        buffer: collections.deque = collections.deque(maxlen=self.max_buffered)
+        self._local.buffer = buffer
+        with self._buffers_lock:
+            self._buffers[threading.current_thread()] = buffer
+        return buffer
+
+    def handle(self, record: logging.LogRecord) -> bool:  # type: ignore
+        result = self.filter(record)
+        if isinstance(result, logging.LogRecord):
+            record = result
+        if result:
+            # Format in the logging thread, arguments may change after the call
+            self.format(record)
+            try:
+                buffer = self._local.buffer
+            except AttributeError:
+                buffer = self._get_buffer()
+            # deque.append is atomic, no lock is needed
+            buffer.append(record)
+        return bool(result)
+
+    def emit(self, record: logging.LogRecord):
+        self.handle(record)
+
+    def _drain(self) -> list[logging.LogRecord]:
+        with self._buffers_lock:
+            buffers = list(self._buffers.items())
+        batches = []
+        for thread, buffer in buffers:
+            records = []
+            try:
+                while True:
+                    records.append(buffer.popleft())
+            except IndexError:
+                pass
+            if records:
+                batches.append(records)
+            elif not thread.is_alive():
+                with self._buffers_lock:
+                    if not buffer:
+                        self._buffers.pop(thread, None)
+        # Records of each thread are already ordered by time
+        return list(heapq.merge(*batches, key=lambda record: record.created))
+
+    def _get_payload(self, record: logging.LogRecord) -> dict[str, Any]:
+        return {
+            "execution_id": self.execution_id,
+            "timestamp": datetime.datetime.utcfromtimestamp(record.created).isoformat(),
+            "name": record.name,
+            "levelno": record.levelno,
+            "lineno": record.lineno,
+            "msg": record.message,
+            "func": record.funcName,
+            "ttl": self.ttl,
+        }
+
+    def _ship(self, summaries: bool) -> None:
+        with self._ship_lock:
+            records = self._drain()
+            if summaries and self.rate_limiter is not None:
+                for summary in self.rate_limiter.collect_summaries():
+                    self.format(summary)
+                    records.append(summary)
+            if records and not self._execution_exists():
+                return
+            pending = iter(records)
+            while True:
+                batch = list(itertools.islice(pending, self.max_batch_size))
+                if not batch:
+                    break
+                self.api.create_logs([self._get_payload(record) for record in batch])
+
+    def flush(self) -> None:
+        """Ship all buffered records and summaries of suppressed messages."""
+        self._ship(summaries=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self._ship(
+                    summaries=self.rate_limiter is not None
+                    and self.rate_limiter.summary_due
+                )
+            except Exception as error:
+                warnings.warn(f"Failed to send logs due to: {error}")
+
+    def close(self) -> None:
+        """Stop the shipping thread and ship remaining records."""
+        self._stop.set()
+        self._thread.join()
+        super().close()
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from pathlib import Path
+from typing import BinaryIO
+
+DEFAULT_MULTIPART_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+DEFAULT_PART_RETRIES = 3
+
+STATE_DIRECTORY = Path(tempfile.gettempdir()) / "trailwatch-uploads"
+
+
+def get_size(file: BinaryIO) -> int | None:
+    """
+    Get number of bytes remaining in a file.
+
+    Returns None if the file is not seekable.
+
+    """
+    try:
+        if not file.seekable():
+            return None
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END) - position
+        file.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
+
+
+class MultipartUploadState:
+    """
+    Progress of a multipart upload persisted on the local filesystem.
+
+    Allows resuming an interrupted upload of the same content (same execution,
+    name, content hash, and part size) without re-uploading parts which were
+    already uploaded. Progress is not persisted if the content hash is unknown.
+
+    """
+
+    def __init__(
+        self,
+        execution_id: str,
+        name: str,
+        content_hash: str | None,
+        part_size: int,
+    ) -> None:
+        self.path: Path | None = None
+        self.upload_id: str | None = None
+        # Part number -> ETag and SHA-256 hash of content of uploaded parts
+        self.parts: dict[int, dict[str, str]] = {}
+        if content_hash is None:
+            return
+        key = hashlib.sha1(
+            f"{execution_id}|{name}|{content_hash}|{part_size}".encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        self.path = STATE_DIRECTORY / f"{key}.json"
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            upload_id = state["upload_id"]
+            parts = {
+                int(number): {"etag": part["etag"], "sha256": part["sha256"]}
+                for number, part in state["parts"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        self.upload_id = upload_id
+        self.parts = {
+            number: part
+            for number, part in parts.items()
+            if isinstance(part["etag"], str)
+            and part["etag"]
+            and isinstance(part["sha256"], str)
+        }
+
+    def is_uploaded(self, number: int, data: bytes) -> bool:
+        """Check if the part was uploaded with the same content."""
+        part = self.parts.get(number)
+        if part is None:
+            return False
+        if hashlib.sha256(data).hexdigest() != part["sha256"]:
+            # Don't reuse ETags of parts with different content
+            del self.parts[number]
+            return False
+        return True
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            STATE_DIRECTORY.mkdir(parents=True, exist_ok=True)
+            temporary_path = self.path.with_suffix(".tmp")
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump({"upload_id": self.upload_id, "parts": self.parts}, file)
+            os.replace(temporary_path, self.path)
+        except OSError:
+            pass
+
+    def delete(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
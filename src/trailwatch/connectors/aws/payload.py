@@ -0,0 +1,132 @@
+import json
+
+from typing import Any, Iterator
+
+# API Gateway rejects larger payloads (10 MB), and AWS Lambda behind it
+# accepts at most 6 MB, leave some headroom for headers and encoding
+DEFAULT_MAX_REQUEST_SIZE = 5 * 1024 * 1024
+DEFAULT_MAX_FIELD_SIZE = 256 * 1024
+
+TRUNCATION_MARKER = "\n... [{size} bytes truncated] ...\n"
+CONTINUATION_MARKER = "[part {number}/{count}] "
+
+
+def get_payload_size(payload: Any) -> int:
+    """Get size in bytes of a JSON-serialized payload."""
+    return len(json.dumps(payload, default=str).encode())
+
+
+def _split_utf8(data: bytes, position: int) -> int:
+    """Move position back so it doesn't split a multi-byte UTF-8 character."""
+    while 0 < position < len(data) and (data[position] & 0xC0) == 0x80:
+        position -= 1
+    return position
+
+
+def truncate_text(text: str, max_size: int) -> str:
+    """
+    Truncate text to approximately `max_size` bytes (UTF-8).
+
+    Beginning and end of the text are kept (e.g., the first and the most recent
+    frames of a traceback) and the middle is replaced with a truncation marker.
+
+    """
+    data = text.encode()
+    if len(data) <= max_size:
+        return text
+    keep = max(max_size - len(TRUNCATION_MARKER) - 10, 0)
+    head = _split_utf8(data, keep // 2)
+    tail = _split_utf8(data, len(data) - (keep - head))
+    return "".join(
+        [
+            data[:head].decode(),
+            TRUNCATION_MARKER.format(size=tail - head),
+            data[tail:].decode(),
+        ]
+    )
+
+
+def split_text(text: str, max_size: int) -> list[str]:
+    """
+    Split text into chunks of approximately `max_size` bytes (UTF-8).
+
+    If the text is split, each chunk is prefixed with a continuation marker
+    (e.g., '[part 2/3] ').
+
+    """
+    data = text.encode()
+    if len(data) <= max_size:
+        return [text]
+    size = max(max_size - len(CONTINUATION_MARKER) - 20, 1)
+    chunks = []
+    start = 0
+    while start < len(data):
+        end = _split_utf8(data, start + size)
+        if end <= start:
+            # Chunk is smaller than a character, take the whole character
+            end = start + 1
+            while end < len(data) and (data[end] & 0xC0) == 0x80:
+                end += 1
+        chunks.append(data[start:end].decode())
+        start = end
+    return [
+        CONTINUATION_MARKER.format(number=number, count=len(chunks)) + chunk
+        for number, chunk in enumerate(chunks, start=1)
+    ]
+
+
+def split_batches(
+    items: list[dict[str, Any]],
+    max_size: int,
+) -> Iterator[list[dict[str, Any]]]:
+    """
+    Split items into batches with JSON size of at most `max_size` bytes.
+
+    Items larger than `max_size` on their own are yielded as single-item batches.
+
+    """
+    batch: list[dict[str, Any]] = []
+    # Envelope (e.g., '{"logs": []}') and separators between items
+    overhead = 64
+    batch_size = overhead
+    for item in items:
+        item_size = get_payload_size(item) + 2
+        if batch and batch_size + item_size > max_size:
+            yield batch
+            batch, batch_size = [], overhead
+        batch.append(item)
+        batch_size += item_size
+    if batch:
+        yield batch
+
+
+def fit_metadata(
+    metadata: dict[str, Any],
+    max_size: int,
+) -> tuple[dict[str, Any], list[str]]:
+    """
+    Drop the largest metadata values until metadata fits into `max_size` bytes.
+
+    Values which are not JSON-serializable (e.g., Decimal or datetime) are
+    converted to strings, so the metadata can be sent as is.
+
+    Returns
+    -------
+    tuple[dict[str, Any], list[str]]
+        Metadata which fits and keys of dropped values.
+
+    """
+    metadata = json.loads(json.dumps(metadata, default=str))
+    sizes = {key: get_payload_size(value) for key, value in metadata.items()}
+    total = sum(sizes.values())
+    dropped = []
+    for key in sorted(sizes, key=sizes.__getitem__, reverse=True):
+        if total <= max_size:
+            break
+        total -= sizes[key]
+        dropped.append(key)
+    if not dropped:
+        return metadata, []
+    fitted = {key: value for key, value in metadata.items() if key not in dropped}
+    fitted["dropped_metadata"] = dropped
+    return fitted, dropped
@@ -0,0 +1,240 @@
+import json as jsonlib
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Mapping
+from urllib.parse import urlencode
+
+import urllib3
+
+# File field value: file object or (filename, file object) tuple
+FileField = BinaryIO | tuple[str, BinaryIO]
+
+
+class HTTPError(Exception):
+    """Exception raised when a response has an error status code"""
+
+
+@dataclass
+class TransportResponse:
+    status_code: int
+    headers: Mapping[str, str]
+    content: bytes
+    url: str
+
+    def json(self) -> Any:
+        return jsonlib.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class Transport(ABC):
+    """
+    HTTP client used by `TrailwatchApi`.
+
+    Implement this interface to use a custom HTTP client (e.g., a fake one in tests).
+    Implementations must be thread-safe.
+
+    """
+
+    @abstractmethod
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        json: Any = None,
+        data: bytes | dict[str, str] | None = None,
+        files: dict[str, FileField] | None = None,
+        timeout: float = 30,
+    ) -> TransportResponse:
+        """
+        Make an HTTP request.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method.
+        url : str
+            URL.
+        headers : dict[str, str], optional
+            Request headers.
+        json : Any, optional
+            JSON-serializable request body.
+        data : bytes | dict[str, str], optional
+            Raw request body or form fields (when `files` is provided).
+        files : dict[str, FileField], optional
+            Files to send as a multipart/form-data request.
+        timeout : float, optional
+            Timeout in seconds.
+
+        """
+
+    def close(self) -> None:
+        """Release resources (connections, etc.)."""
+
+
+def _get_filename(field: str, value: FileField) -> tuple[str, bytes]:
+    if isinstance(value, tuple):
+        return value[0], value[1].read()
+    name = getattr(value, "name", None)
+    if not isinstance(name, str) or name.startswith("<"):
+        name = field
+    return name.replace("\\", "/").rsplit("/", maxsplit=1)[-1], value.read()
+
+
+class Urllib3Transport(Transport):
+    """
+    Default transport based on urllib3.
+
+    Connections are pooled and kept alive, so a transport instance shared
+    between executions avoids connection setup for every request.
+
+    """
+
+    def __init__(self, pool_manager: urllib3.PoolManager | None = None) -> None:
+        self.pool_manager = pool_manager or urllib3.PoolManager(
+            num_pools=4,
+            maxsize=8,
+            retries=False,
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        json: Any = None,
+        data: bytes | dict[str, str] | None = None,
+        files: dict[str, FileField] | None = None,
+        timeout: float = 30,
+    ) -> TransportResponse:
+        headers = dict(headers or {})
+        body: bytes | None = None
+        if files is not None:
+            fields: dict[str, Any] = dict(data or {})  # type: ignore
+            for field, value in files.items():
+                fields[field] = _get_filename(field, value)
+            body, headers["Content-Type"] = urllib3.encode_multipart_formdata(fields)
+        elif json is not None:
+            body = jsonlib.dumps(json).encode()
+            headers["Content-Type"] = "application/json"
+        elif isinstance(data, dict):
+            body = urlencode(data).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        else:
+            body = data
+        response = self.pool_manager.request(
+            method,
+            url,
+            body=body,
+            headers=headers,
+            timeout=urllib3.Timeout(total=timeout),
+            redirect=False,
+        )
+        return TransportResponse(
+            status_code=response.status,
+            headers=response.headers,
+            content=response.data,
+            url=url,
+        )
+
+    def close(self) -> None:
+        self.pool_manager.clear()
+
+
+class RequestsTransport(Transport):
+    """Transport based on a `requests.Session`."""
+
+    def __init__(self, session: Any = None) -> None:
+        try:
+            # pylint: disable=import-outside-toplevel
+            from requests import Session
+        except ImportError as error:
+            raise ImportError(
+                "You must install 'requests' to use the requests transport: "
+                "pip install trailwatch[requests]"
+            ) from error
+        self.session = session or Session()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        json: Any = None,
+        data: bytes | dict[str, str] | None = None,
+        files: dict[str, FileField] | None = None,
+        timeout: float = 30,
+    ) -> TransportResponse:
+        response = self.session.request(
+            method,
+            url,
+            headers=headers,
+            json=json,
+            data=data,
+            files=files,
+            timeout=timeout,
+        )
+        return TransportResponse(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=response.content,
+            url=url,
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class Http2Transport(Transport):
+    """
+    Transport based on httpx with HTTP/2 enabled.
+
+    Many concurrent requests (logs, status updates, etc.) are multiplexed
+    over a single connection. Requires 'httpx[http2]' to be installed.
+
+    """
+
+    def __init__(self, client: Any = None) -> None:
+        try:
+            # pylint: disable=import-outside-toplevel
+            import httpx
+        except ImportError as error:
+            raise ImportError(
+                "You must install 'httpx[http2]' to use the HTTP/2 transport: "
+                "pip install trailwatch[httpx]"
+            ) from error
+        self.client = client or httpx.Client(http2=True)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        json: Any = None,
+        data: bytes | dict[str, str] | None = None,
+        files: dict[str, FileField] | None = None,
+        timeout: float = 30,
+    ) -> TransportResponse:
+        kwargs: dict[str, Any] = {"headers": headers, "timeout": timeout}
+        if json is not None:
+            kwargs["json"] = json
+        elif isinstance(data, bytes):
+            kwargs["content"] = data
+        elif data is not None:
+            kwargs["data"] = data
+        if files is not None:
+            kwargs["files"] = files
+        response = self.client.request(method, url, **kwargs)
+        return TransportResponse(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=response.content,
+            url=url,
+        )
+
+    def close(self) -> None:
+        self.client.close()
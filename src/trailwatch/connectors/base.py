@@ -2,13 +2,16 @@ import datetime
 
 from abc import ABC, abstractmethod
 from types import TracebackType
-from typing import TYPE_CHECKING, BinaryIO, Type
+from typing import TYPE_CHECKING, Any, BinaryIO, Type
 
 if TYPE_CHECKING:
     from trailwatch.config import TrailwatchConfig
 
 
 class Connector(ABC):
+    # Whether the connector consumes files passed to `send_fileobj`
+    supports_files: bool = True
+
     @abstractmethod
     def start_execution(self) -> None:
         """Create execution record, attach handlers, etc."""
@@ -28,8 +31,46 @@ class Connector(ABC):
         """Add exception to execution record (or do nothing)."""
 
     @abstractmethod
-    def send_fileobj(self, name: str, file: BinaryIO) -> None:
-        """Send a file to TrailWatch (or do nothing)."""
+    def send_fileobj(self, name: str, file: BinaryIO) -> bool | None:
+        """
+        Send a file to TrailWatch (or do nothing).
+
+        Errors should be converted to warnings and reported by returning False,
+        so failed background uploads are reported with the execution.
+
+        """
+
+    def detach_handlers(self) -> None:
+        """
+        Stop capturing logs for the execution (or do nothing).
+
+        Called synchronously when the execution context is exited, before
+        `finalize_execution` (which may run in a background thread), so logs
+        emitted after the context is exited are not attributed to the execution.
+        Must be idempotent, `finalize_execution` should call it as well.
+
+        """
+
+    def add_execution_metadata(self, key: str, value: Any) -> None:
+        """
+        Attach metadata to execution record (or do nothing).
+
+        Called before `finalize_execution`. Value must be JSON-serializable.
+
+        """
+
+    def report_progress(
+        self,
+        data: dict[str, Any],
+        heartbeat: datetime.datetime | None = None,
+    ) -> None:
+        """
+        Send intermediate execution data and liveness timestamp while
+        the execution is running (or do nothing).
+
+        Called periodically from a background thread. Data must be JSON-serializable.
+
+        """
 
 
 class ConnectorFactory(ABC):
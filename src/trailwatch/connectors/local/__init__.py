@@ -0,0 +1,7 @@
+__all__ = [
+    "LocalConnectorFactory",
+    "LocalReader",
+]
+
+from .connector import LocalConnectorFactory
+from .reader import LocalReader
@@ -0,0 +1,220 @@
+import datetime
+import logging
+import re
+import shutil
+import traceback
+import uuid
+import warnings
+
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, BinaryIO, Type
+
+from trailwatch.connectors.base import Connector, ConnectorFactory
+from trailwatch.fingerprint import fingerprint_exception
+
+from .handler import LocalHandler
+from .storage import DEFAULT_SEGMENT_SIZE, SegmentWriter, get_writer
+
+if TYPE_CHECKING:
+    from trailwatch.config import TrailwatchConfig
+
+
+class LocalConnector(Connector):
+    def __init__(
+        self,
+        config: "TrailwatchConfig",
+        writer: SegmentWriter,
+        files_directory: Path,
+    ) -> None:
+        self.config = config
+        self.writer = writer
+        self.files_directory = files_directory
+        self.execution_id: str | None = None
+        self.handler: LocalHandler | None = None
+        self.metadata: dict[str, Any] = {}
+
+    def start_execution(self) -> None:
+        execution_id = uuid.uuid4().hex
+        record = {
+            "type": "execution",
+            "execution_id": execution_id,
+            "project": self.config.project,
+            "environment": self.config.environment,
+            "job": self.config.job,
+            "status": "running",
+            "start": datetime.datetime.utcnow().isoformat(),
+            "ttl": self.config.execution_ttl,
+        }
+        if self.config.shard is not None:
+            # Parent is aggregated from its shards when read (see LocalReader)
+            record.update(self.config.shard.to_dict())
+        try:
+            self.writer.write(record)
+        except Exception as error:
+            warnings.warn(f"Unable to start execution locally due to: '{error}'")
+            return
+        self.execution_id = execution_id
+
+        # Register logging handlers
+        self.handler = LocalHandler(
+            self.execution_id,
+            self.writer,
+            self.config.log_ttl,
+        )
+        for logger_name in self.config.loggers:
+            logging.getLogger(logger_name).addHandler(self.handler)
+
+    def detach_handlers(self) -> None:
+        if self.handler is not None:
+            for logger_name in self.config.loggers:
+                logging.getLogger(logger_name).removeHandler(self.handler)
+
+    def finalize_execution(self, status: str, end: datetime.datetime) -> None:
+        self.detach_handlers()
+
+        if self.execution_id is None:
+            return
+        try:
+            self.writer.write(
+                {
+                    "type": "execution_end",
+                    "execution_id": self.execution_id,
+                    "status": status,
+                    "end": end.isoformat(),
+                    "metadata": self.metadata,
+                }
+            )
+            self.writer.flush()
+        except Exception as error:
+            warnings.warn(f"Unable to finalize execution locally due to: '{error}'")
+
+    def handle_exception(
+        self,
+        timestamp: datetime.datetime,
+        exc_type: Type[Exception],
+        exc_value: Exception,
+        exc_traceback: TracebackType,
+    ):
+        if self.execution_id is None:
+            return
+        try:
+            self.writer.write(
+                {
+                    "type": "error",
+                    "execution_id": self.execution_id,
+                    "timestamp": timestamp.isoformat(),
+                    "name": exc_type.__name__,
+                    "msg": str(exc_value),
+                    "traceback": "".join(
+                        traceback.format_exception(
+                            exc_type,
+                            value=exc_value,
+                            tb=exc_traceback,
+                        )
+                    ),
+                    "fingerprint": fingerprint_exception(
+                        exc_type, exc_value, exc_traceback
+                    ),
+                    "ttl": self.config.error_ttl,
+                }
+            )
+            self.writer.flush()
+        except Exception as error:
+            warnings.warn(f"Unable to handle exception locally due to: '{error}'")
+
+    def add_execution_metadata(self, key: str, value: Any) -> None:
+        self.metadata[key] = value
+
+    def report_progress(
+        self,
+        data: dict[str, Any],
+        heartbeat: datetime.datetime | None = None,
+    ) -> None:
+        if self.execution_id is None:
+            return
+        try:
+            self.writer.write(
+                {
+                    "type": "progress",
+                    "execution_id": self.execution_id,
+                    "heartbeat": None if heartbeat is None else heartbeat.isoformat(),
+                    "metadata": data,
+                }
+            )
+            self.writer.flush()
+        except Exception as error:
+            warnings.warn(f"Unable to report progress locally due to: '{error}'")
+
+    def _create_file(self, name: str) -> tuple[Path, BinaryIO]:
+        """Create a new file in the directory of the execution."""
+        assert self.execution_id is not None
+        directory = self.files_directory / self.execution_id
+        directory.mkdir(parents=True, exist_ok=True)
+        # Keep only safe characters to avoid writing outside of the directory
+        safe_name = re.sub(r"[^\w.\-]", "_", name).lstrip(".") or "file"
+        path = directory / safe_name
+        number = 0
+        while True:
+            try:
+                # Names may collide after replacing unsafe characters (or files
+                # may be sent twice), exclusive mode never overwrites a file
+                return path, open(path, "xb")  # pylint: disable=consider-using-with
+            except FileExistsError:
+                number += 1
+                path = directory / f"{number}-{safe_name}"
+
+    def send_fileobj(self, name: str, file: BinaryIO) -> bool:
+        if self.execution_id is None:
+            return False
+        try:
+            path, destination = self._create_file(name)
+            with destination:
+                shutil.copyfileobj(file, destination)
+            self.writer.write(
+                {
+                    "type": "file",
+                    "execution_id": self.execution_id,
+                    "name": name,
+                    "path": str(path),
+                    "size": path.stat().st_size,
+                }
+            )
+        except Exception as error:
+            warnings.warn(f"Unable to send file '{name}' locally due to: '{error}'")
+            return False
+        return True
+
+
+class LocalConnectorFactory(ConnectorFactory):
+    def __init__(
+        self,
+        directory: Path | str,
+        max_segment_size: int = DEFAULT_SEGMENT_SIZE,
+        max_segments: int | None = None,
+    ) -> None:
+        """
+        Initialize TrailWatch local connector factory.
+
+        Parameters
+        ----------
+        directory : Path | str
+            Directory to write executions, logs, errors, and files to.
+        max_segment_size : int, optional
+            Data is written into append-only segment files which are rotated
+            when their size exceeds this many bytes. By default, 64 MiB.
+        max_segments : int, optional
+            Maximum number of segment files to keep. Oldest segments are deleted
+            when a segment is rotated. By default, all segments are kept.
+
+        """
+        self.directory = Path(directory)
+        self.max_segment_size = max_segment_size
+        self.max_segments = max_segments
+
+    def __call__(self, config: "TrailwatchConfig") -> LocalConnector:
+        return LocalConnector(
+            config,
+            get_writer(self.directory, self.max_segment_size, self.max_segments),
+            self.directory / "files",
+        )
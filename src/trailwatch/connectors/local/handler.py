@@ -0,0 +1,44 @@
+import datetime
+import logging
+
+from typing import Optional
+
+from .storage import SegmentWriter
+
+
+class LocalHandler(logging.Handler):
+    def __init__(
+        self,
+        execution_id: str,
+        writer: SegmentWriter,
+        ttl: Optional[int] = None,
+    ):
+        logging.Handler.__init__(self)
+        self.execution_id = execution_id
+        self.writer = writer
+        self.ttl = ttl
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.format(record)
+            msg = record.message
+            if record.exc_text:
+                msg = "\n".join([msg, record.exc_text])
+            self.writer.write(
+                {
+                    "type": "log",
+                    "execution_id": self.execution_id,
+                    "timestamp": datetime.datetime.utcfromtimestamp(
+                        record.created
+                    ).isoformat(),
+                    "name": record.name,
+                    "levelno": record.levelno,
+                    "lineno": record.lineno,
+                    "msg": msg,
+                    "func": record.funcName,
+                    "ttl": self.ttl,
+                }
+            )
+        except Exception:
+            # Failed writes (e.g., disk is full) must not break the job
+            self.handleError(record)
@@ -0,0 +1,202 @@
+import datetime
+import json
+
+from pathlib import Path
+from typing import Any
+
+from trailwatch.shards import aggregate_shards
+
+from .storage import SEGMENT_PREFIX, SEGMENT_SUFFIX
+
+# Position of a record: segment path and byte offset of the line
+Position = tuple[Path, int]
+
+
+class LocalReader:
+    """
+    Reads and indexes data written by the local connector.
+
+    Execution records are kept in memory (merged from their start, progress,
+    and end records), while logs, errors, and files are indexed by position
+    and read on demand. Indexing is incremental: `refresh` only reads data
+    appended since the previous call.
+
+    """
+
+    def __init__(self, directory: Path | str) -> None:
+        """
+        Initialize a LocalReader instance.
+
+        Parameters
+        ----------
+        directory : Path | str
+            Directory passed to `LocalConnectorFactory`.
+
+        """
+        self.directory = Path(directory)
+        self._offsets: dict[Path, int] = {}
+        self._executions: dict[str, dict[str, Any]] = {}
+        self._positions: dict[tuple[str, str], list[Position]] = {}
+
+    def _index(self, record: dict[str, Any], position: Position) -> None:
+        record_type = record.get("type")
+        execution_id = record.get("execution_id")
+        if execution_id is None:
+            return
+        if record_type == "execution":
+            execution = self._executions.setdefault(execution_id, {})
+            for key, value in record.items():
+                if key != "type":
+                    execution.setdefault(key, value)
+        elif record_type == "execution_end":
+            execution = self._executions.setdefault(
+                execution_id, {"execution_id": execution_id}
+            )
+            execution["status"] = record["status"]
+            execution["end"] = record["end"]
+            execution.setdefault("metadata", {}).update(record.get("metadata") or {})
+        elif record_type == "progress":
+            execution = self._executions.setdefault(
+                execution_id, {"execution_id": execution_id}
+            )
+            if record.get("heartbeat") is not None:
+                execution["heartbeat"] = record["heartbeat"]
+            execution.setdefault("metadata", {}).update(record.get("metadata") or {})
+        elif record_type in ("log", "error", "file"):
+            self._positions.setdefault((record_type, execution_id), []).append(position)
+
+    def refresh(self) -> None:
+        """Index data appended since the last refresh."""
+        segments = sorted(self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+        for segment in segments:
+            offset = self._offsets.get(segment, 0)
+            try:
+                with open(segment, "rb") as file:
+                    file.seek(offset)
+                    for line in file:
+                        if not line.endswith(b"\n"):
+                            # Incomplete line (still being written)
+                            break
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            record = {}
+                        self._index(record, (segment, offset))
+                        offset += len(line)
+            except OSError:
+                continue
+            self._offsets[segment] = offset
+
+    def executions(
+        self,
+        job: str | None = None,
+        status: str | None = None,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Query executions.
+
+        Parameters
+        ----------
+        job : str, optional
+            Only return executions of this job.
+        status : str, optional
+            Only return executions with this status
+            (e.g., 'running', 'success', 'failure').
+        since : datetime.datetime, optional
+            Only return executions started at or after this time (UTC).
+        until : datetime.datetime, optional
+            Only return executions started before this time (UTC).
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            Execution records sorted by start time.
+
+        """
+        self.refresh()
+        result = []
+        for execution in self._executions.values():
+            if job is not None and execution.get("job") != job:
+                continue
+            if status is not None and execution.get("status") != status:
+                continue
+            if since is not None or until is not None:
+                if execution.get("start") is None:
+                    continue
+                start = datetime.datetime.fromisoformat(execution["start"])
+                if since is not None and start < since:
+                    continue
+                if until is not None and start >= until:
+                    continue
+            result.append(execution)
+        return sorted(result, key=lambda execution: execution.get("start") or "")
+
+    def shards(self, parent_execution_id: str) -> list[dict[str, Any]]:
+        """Get shard execution records of a parent execution."""
+        self.refresh()
+        return sorted(
+            (
+                execution
+                for execution in self._executions.values()
+                if execution.get("parent_execution_id") == parent_execution_id
+            ),
+            key=lambda execution: execution.get("start") or "",
+        )
+
+    def parent_execution(
+        self,
+        parent_execution_id: str,
+        shards: int | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Get a parent execution aggregated from its shards.
+
+        Parameters
+        ----------
+        parent_execution_id : str
+            ID of the parent execution.
+        shards : int, optional
+            Expected number of shards. By default, number of shards passed
+            to the shard executions is used, if any.
+
+        Returns
+        -------
+        dict[str, Any] | None
+            Parent execution record (see `trailwatch.shards.aggregate_shards`)
+            or None if no shard of the parent was found.
+
+        """
+        executions = self.shards(parent_execution_id)
+        if not executions:
+            return None
+        return {
+            "execution_id": parent_execution_id,
+            "job": executions[0].get("job"),
+            **aggregate_shards(executions, shards),
+        }
+
+    def _read(self, record_type: str, execution_id: str) -> list[dict[str, Any]]:
+        self.refresh()
+        records = []
+        for path, offset in self._positions.get((record_type, execution_id), []):
+            try:
+                with open(path, "rb") as file:
+                    file.seek(offset)
+                    records.append(json.loads(file.readline()))
+            except (OSError, ValueError):
+                continue
+        return records
+
+    def logs(self, execution_id: str) -> list[dict[str, Any]]:
+        """Get log records of an execution."""
+        return self._read("log", execution_id)
+
+    def errors(self, execution_id: str) -> list[dict[str, Any]]:
+        """Get error records of an execution."""
+        return self._read("error", execution_id)
+
+    def files(self, execution_id: str) -> list[dict[str, Any]]:
+        """Get file records (name, path, size) of an execution."""
+        return self._read("file", execution_id)
@@ -0,0 +1,128 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from trailwatch import background
+
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+BUFFER_SIZE = 256 * 1024
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class SegmentWriter:
+    """
+    Append-only writer of JSON Lines records rotated into size-limited segments.
+
+    Writes are buffered and flushed explicitly (when an execution is finalized),
+    so writing a record costs a JSON serialization and a memory copy.
+    Each process writes to its own segments, so multiple processes can share
+    a directory. Segment names sort in creation order.
+
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_segment_size: int = DEFAULT_SEGMENT_SIZE,
+        max_segments: int | None = None,
+    ) -> None:
+        """
+        Initialize a SegmentWriter instance.
+
+        Parameters
+        ----------
+        directory : Path
+            Directory to write segments to.
+        max_segment_size : int, optional
+            Segment is rotated when its size exceeds this many bytes.
+            By default, 64 MiB.
+        max_segments : int, optional
+            Maximum number of segments to keep in the directory. Oldest segments
+            are deleted when a segment is rotated. By default, all are kept.
+
+        """
+        self.directory = directory
+        self.max_segment_size = max_segment_size
+        self.max_segments = max_segments
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file: BinaryIO | None = None
+        self._size = 0
+        self._sequence = 0
+
+    def _open_segment(self) -> None:
+        self._sequence += 1
+        path = self.directory / (
+            f"{SEGMENT_PREFIX}{time.time_ns():020d}-{os.getpid()}-"
+            f"{self._sequence:06d}{SEGMENT_SUFFIX}"
+        )
+        self._file = open(  # pylint: disable=consider-using-with
+            path, "ab", buffering=BUFFER_SIZE
+        )
+        self._size = 0
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._open_segment()
+        if self.max_segments is not None:
+            segments = sorted(self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+            for segment in segments[: max(len(segments) - self.max_segments, 0)]:
+                try:
+                    segment.unlink()
+                except OSError:
+                    pass
+
+    def write(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, default=str, separators=(",", ":")).encode() + b"\n"
+        with self._lock:
+            if self._file is None or self._size >= self.max_segment_size:
+                self._rotate()
+            assert self._file is not None
+            self._file.write(line)
+            self._size += len(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_writers: dict[Path, SegmentWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(
+    directory: Path,
+    max_segment_size: int = DEFAULT_SEGMENT_SIZE,
+    max_segments: int | None = None,
+) -> SegmentWriter:
+    """Get a writer shared by all connectors writing to the same directory."""
+    directory = directory.resolve()
+    with _writers_lock:
+        if directory not in _writers:
+            _writers[directory] = SegmentWriter(
+                directory, max_segment_size, max_segments
+            )
+        return _writers[directory]
+
+
+@atexit.register
+def close_writers() -> None:
+    # Executions finalized in background still write records
+    background.flush()
+    with _writers_lock:
+        for writer in _writers.values():
+            writer.close()
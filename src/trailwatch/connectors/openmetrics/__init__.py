@@ -0,0 +1,7 @@
+__all__ = [
+    "MetricsRegistry",
+    "OpenMetricsConnectorFactory",
+]
+
+from .connector import OpenMetricsConnectorFactory
+from .registry import MetricsRegistry
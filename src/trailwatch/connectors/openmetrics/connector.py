@@ -0,0 +1,123 @@
+import datetime
+import logging
+import time
+
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, BinaryIO, Type
+
+from trailwatch.connectors.base import Connector, ConnectorFactory
+
+from .handler import OpenMetricsHandler
+from .registry import (
+    DEFAULT_DURATION_BUCKETS,
+    DEFAULT_MIN_INTERVAL,
+    Labels,
+    MetricsRegistry,
+    get_registry,
+)
+
+if TYPE_CHECKING:
+    from trailwatch.config import TrailwatchConfig
+
+
+class OpenMetricsConnector(Connector):
+    supports_files = False
+
+    def __init__(self, config: "TrailwatchConfig", registry: MetricsRegistry) -> None:
+        self.config = config
+        self.registry = registry
+        self.labels: Labels = (
+            ("project", config.project),
+            ("environment", config.environment),
+            ("job", config.job),
+        )
+        self.start: float | None = None
+        self.handler: OpenMetricsHandler | None = None
+
+    def start_execution(self) -> None:
+        self.start = time.monotonic()
+        self.registry.execution_started(self.labels)
+
+        # Register logging handlers
+        self.handler = OpenMetricsHandler()
+        for logger_name in self.config.loggers:
+            logging.getLogger(logger_name).addHandler(self.handler)
+
+    def detach_handlers(self) -> None:
+        if self.handler is not None:
+            for logger_name in self.config.loggers:
+                logging.getLogger(logger_name).removeHandler(self.handler)
+
+    def finalize_execution(self, status: str, end: datetime.datetime) -> None:
+        self.detach_handlers()
+        log_records = None
+        if self.handler is not None:
+            log_records = self.handler.pop_counts()
+
+        if self.start is not None:
+            self.registry.execution_finished(
+                self.labels,
+                status,
+                time.monotonic() - self.start,
+                log_records,
+            )
+
+    def handle_exception(
+        self,
+        timestamp: datetime.datetime,
+        exc_type: Type[Exception],
+        exc_value: Exception,
+        exc_traceback: TracebackType,
+    ):
+        if self.start is not None:
+            self.registry.add_error(self.labels, exc_type.__name__)
+
+    def report_progress(
+        self,
+        data: dict[str, Any],
+        heartbeat: datetime.datetime | None = None,
+    ) -> None:
+        # Keep log volume of long-running executions up to date
+        if self.handler is not None:
+            log_records = self.handler.pop_counts()
+            if log_records:
+                self.registry.add_log_records(self.labels, log_records)
+
+    def send_fileobj(self, name: str, file: BinaryIO) -> bool | None:
+        pass
+
+
+class OpenMetricsConnectorFactory(ConnectorFactory):
+    def __init__(
+        self,
+        path: Path | str,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        duration_buckets: tuple[float, ...] = DEFAULT_DURATION_BUCKETS,
+    ) -> None:
+        """
+        Initialize TrailWatch OpenMetrics connector factory.
+
+        Parameters
+        ----------
+        path : Path | str
+            Path to the metrics textfile. E.g., a '.prom' file in the directory
+            of the node exporter textfile collector. Processes running
+            concurrently must write to different files.
+        min_interval : float, optional
+            Minimum interval in seconds between rewrites of the file.
+            By default, 5 seconds.
+        duration_buckets : tuple[float, ...], optional
+            Upper bounds of execution duration histogram buckets in seconds.
+            By default, from 1 second to 3 hours.
+
+        """
+        self.path = Path(path)
+        self.min_interval = min_interval
+        self.duration_buckets = duration_buckets
+
+    def __call__(self, config: "TrailwatchConfig") -> OpenMetricsConnector:
+        return OpenMetricsConnector(
+            config,
+            get_registry(self.path, self.min_interval, self.duration_buckets),
+        )
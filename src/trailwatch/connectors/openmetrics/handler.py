@@ -0,0 +1,19 @@
+import logging
+
+
+class OpenMetricsHandler(logging.Handler):
+    """Counts log records by level without sending them anywhere."""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.counts: dict[str, int] = {}
+
+    def emit(self, record: logging.LogRecord):
+        # Called with the handler lock held
+        self.counts[record.levelname] = self.counts.get(record.levelname, 0) + 1
+
+    def pop_counts(self) -> dict[str, int]:
+        """Get counts accumulated since the last call."""
+        with self.lock:  # type: ignore
+            counts, self.counts = self.counts, {}
+        return counts
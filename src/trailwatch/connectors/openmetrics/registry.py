@@ -0,0 +1,336 @@
+import atexit
+import os
+import re
+import tempfile
+import threading
+import time
+import warnings
+
+from pathlib import Path
+
+from trailwatch import background
+
+DEFAULT_MIN_INTERVAL = 5.0
+DEFAULT_DURATION_BUCKETS = (1, 5, 10, 30, 60, 300, 600, 1800, 3600, 10800)
+
+# Family name -> (type, help)
+FAMILIES = {
+    "trailwatch_executions": ("counter", "Finished executions by status."),
+    "trailwatch_execution_duration_seconds": (
+        "histogram",
+        "Duration of finished executions.",
+    ),
+    "trailwatch_errors": ("counter", "Exceptions which failed executions."),
+    "trailwatch_log_records": ("counter", "Log records by level."),
+    "trailwatch_running_executions": ("gauge", "Currently running executions."),
+    "trailwatch_last_execution_timestamp_seconds": (
+        "gauge",
+        "Unix time when the last execution with this status finished.",
+    ),
+}
+
+# Samples which describe the current process and are not restored from the file
+VOLATILE_FAMILIES = {"trailwatch_running_executions"}
+
+Labels = tuple[tuple[str, str], ...]
+
+SAMPLE_PATTERN = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)$")
+LABEL_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _unescape(value: str) -> str:
+    return re.sub(
+        r"\\(.)",
+        lambda match: "\n" if match.group(1) == "n" else match.group(1),
+        value,
+    )
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _get_family(sample: str) -> str | None:
+    for family, (metric_type, _) in FAMILIES.items():
+        if metric_type == "counter" and sample == f"{family}_total":
+            return family
+        if metric_type == "histogram" and sample in (
+            f"{family}_bucket",
+            f"{family}_count",
+            f"{family}_sum",
+        ):
+            return family
+        if metric_type == "gauge" and sample == family:
+            return family
+    return None
+
+
+class MetricsRegistry:
+    """
+    In-memory aggregates of executions written to a Prometheus textfile.
+
+    Values are accumulated in memory and the file is rewritten atomically
+    (written to a temporary file and renamed) at most once per `min_interval`
+    seconds, so it is safe to be scraped at any time (e.g., by the textfile
+    collector of Prometheus node exporter). Values already present in the file
+    are loaded on start, so counters keep growing across short-lived processes
+    writing to the same file one after another. All methods are thread-safe.
+
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        duration_buckets: tuple[float, ...] = DEFAULT_DURATION_BUCKETS,
+    ) -> None:
+        """
+        Initialize a MetricsRegistry instance.
+
+        Parameters
+        ----------
+        path : Path | str
+            Path to the textfile. Created if it doesn't exist.
+        min_interval : float, optional
+            Minimum interval in seconds between rewrites of the file.
+            By default, 5 seconds.
+        duration_buckets : tuple[float, ...], optional
+            Upper bounds of execution duration histogram buckets in seconds.
+
+        """
+        self.path = Path(path)
+        self.min_interval = min_interval
+        self.duration_buckets = tuple(sorted(duration_buckets)) + (float("inf"),)
+        # Sample name -> labels -> value
+        self._samples: dict[str, dict[Labels, float]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_write = 0.0
+        self._timer: threading.Timer | None = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                lines = file.readlines()
+        except OSError:
+            return
+        for line in lines:
+            match = SAMPLE_PATTERN.match(line.strip())
+            if match is None:
+                continue
+            name, labels, value = match.groups()
+            family = _get_family(name)
+            if family is None or family in VOLATILE_FAMILIES:
+                continue
+            try:
+                parsed_value = float(value)
+            except ValueError:
+                continue
+            parsed_labels = tuple(
+                (label, _unescape(label_value))
+                for label, label_value in LABEL_PATTERN.findall(labels or "")
+            )
+            self._samples.setdefault(name, {})[parsed_labels] = parsed_value
+
+    def _add(self, sample: str, labels: Labels, value: float) -> None:
+        values = self._samples.setdefault(sample, {})
+        values[labels] = values.get(labels, 0) + value
+
+    def _set(self, sample: str, labels: Labels, value: float) -> None:
+        self._samples.setdefault(sample, {})[labels] = value
+
+    def execution_started(self, labels: Labels) -> None:
+        with self._lock:
+            self._add("trailwatch_running_executions", labels, 1)
+            self._dirty = True
+        self.schedule_write()
+
+    def execution_finished(
+        self,
+        labels: Labels,
+        status: str,
+        duration: float,
+        log_records: dict[str, int] | None = None,
+    ) -> None:
+        """
+        Record a finished execution.
+
+        Parameters
+        ----------
+        labels : Labels
+            Labels identifying the job (project, environment, job).
+        status : str
+            Execution status.
+        duration : float
+            Execution duration in seconds.
+        log_records : dict[str, int], optional
+            Number of log records by level name.
+
+        """
+        with self._lock:
+            self._add("trailwatch_running_executions", labels, -1)
+            self._add("trailwatch_executions_total", (*labels, ("status", status)), 1)
+            self._set(
+                "trailwatch_last_execution_timestamp_seconds",
+                (*labels, ("status", status)),
+                time.time(),
+            )
+            # Buckets are cumulative, empty buckets are added to keep all of them
+            for bucket in self.duration_buckets:
+                self._add(
+                    "trailwatch_execution_duration_seconds_bucket",
+                    (*labels, ("le", _format_value(bucket))),
+                    1 if duration <= bucket else 0,
+                )
+            self._add("trailwatch_execution_duration_seconds_count", labels, 1)
+            self._add("trailwatch_execution_duration_seconds_sum", labels, duration)
+            self._dirty = True
+        if log_records:
+            self.add_log_records(labels, log_records)
+        self.schedule_write()
+
+    def add_error(self, labels: Labels, exception: str) -> None:
+        with self._lock:
+            self._add("trailwatch_errors_total", (*labels, ("exception", exception)), 1)
+            self._dirty = True
+        self.schedule_write()
+
+    def add_log_records(self, labels: Labels, log_records: dict[str, int]) -> None:
+        with self._lock:
+            for level, count in log_records.items():
+                self._add(
+                    "trailwatch_log_records_total", (*labels, ("level", level)), count
+                )
+            self._dirty = True
+        self.schedule_write()
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format (0.0.4).
+
+        This is the format parsed by the node exporter textfile collector,
+        so counters are declared under the name of their '_total' samples
+        (the OpenMetrics convention of declaring them without the suffix
+        would make the collector drop the declaration and export them untyped)
+        and there is no '# EOF' terminator.
+
+        """
+        with self._lock:
+            samples = {name: dict(values) for name, values in self._samples.items()}
+        lines = []
+        for family, (metric_type, help_text) in FAMILIES.items():
+            family_samples = [
+                (name, labels, value)
+                for name, values in samples.items()
+                if _get_family(name) == family
+                for labels, value in values.items()
+            ]
+            if not family_samples:
+                continue
+            declared = f"{family}_total" if metric_type == "counter" else family
+            lines.append(f"# HELP {declared} {help_text}")
+            lines.append(f"# TYPE {declared} {metric_type}")
+            if metric_type == "histogram":
+                order = {"_bucket": 0, "_count": 1, "_sum": 2}
+
+                def sort_key(sample):
+                    name, labels, _ = sample
+                    le = dict(labels).get("le")
+                    return (
+                        tuple(label for label in labels if label[0] != "le"),
+                        order[name[len(family) :]],
+                        float(le) if le is not None else 0.0,
+                    )
+
+                family_samples.sort(key=sort_key)
+            else:
+                family_samples.sort(key=lambda sample: sample[1])
+            for name, labels, value in family_samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write(self) -> None:
+        """Atomically rewrite the textfile with current values."""
+        with self._lock:
+            self._dirty = False
+            self._last_write = time.monotonic()
+            self._timer = None
+        content = self.render()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Temporary file must be on the same filesystem for the rename
+            # to be atomic, and must not have the '.prom' extension to be
+            # ignored by the node exporter while being written
+            descriptor, temporary_path = tempfile.mkstemp(
+                prefix=f".{self.path.name}.", dir=self.path.parent
+            )
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                file.write(content)
+            os.chmod(temporary_path, 0o644)
+            os.replace(temporary_path, self.path)
+        except OSError as error:
+            warnings.warn(f"Unable to write metrics to '{self.path}' due to: {error}")
+
+    def schedule_write(self) -> None:
+        """Write the file now or schedule a write to keep the bounded rate."""
+        with self._lock:
+            if not self._dirty or self._timer is not None:
+                return
+            delay = self._last_write + self.min_interval - time.monotonic()
+            if delay > 0:
+                self._timer = threading.Timer(delay, self.write)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self.write()
+
+    def flush(self) -> None:
+        """Write pending changes immediately."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            dirty = self._dirty
+        if dirty:
+            self.write()
+
+
+_registries: dict[Path, MetricsRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(
+    path: Path | str,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    duration_buckets: tuple[float, ...] = DEFAULT_DURATION_BUCKETS,
+) -> MetricsRegistry:
+    """Get a registry shared by all connectors writing to the same file."""
+    path = Path(path).resolve()
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = MetricsRegistry(path, min_interval, duration_buckets)
+        return _registries[path]
+
+
+@atexit.register
+def flush_registries() -> None:
+    # Executions finalized in background still record metrics
+    background.flush()
+    with _registries_lock:
+        for registry in _registries.values():
+            registry.flush()
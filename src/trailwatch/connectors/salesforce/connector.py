@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING, BinaryIO, Type
 from simple_salesforce import Salesforce, format_soql
 
 from trailwatch.connectors.base import Connector, ConnectorFactory
+from trailwatch.instrumentation import uninstrumented
 
 if TYPE_CHECKING:
     from trailwatch.config import TrailwatchConfig
@@ -17,6 +18,9 @@ EXECUTION = "IntegrationExecution__c"  # execution
 
 
 class SalesforceConnector(Connector):
+    supports_files = False
+
+    @uninstrumented()
     def __init__(
         self,
         config: "TrailwatchConfig",
@@ -45,6 +49,7 @@ class SalesforceConnector(Connector):
         self.execution_object_id: str | None = None
         self.trailwatch_aws_execution_url: str | None = None
 
+    @uninstrumented()
     def start_execution(self) -> None:
         if self.salesforce is None:
             return
@@ -98,6 +103,7 @@ class SalesforceConnector(Connector):
             warnings.warn(f"Unable to start execution in Salesforce due to: '{error}'")
             return
 
+    @uninstrumented()
     def finalize_execution(self, status: str, end: datetime.datetime) -> None:
         if self.execution_object_id is None:
             return
@@ -137,6 +143,7 @@ class SalesforceConnector(Connector):
             )
             return
 
+    @uninstrumented()
     def handle_exception(
         self,
         timestamp: datetime.datetime,
@@ -164,7 +171,7 @@ class SalesforceConnector(Connector):
             warnings.warn(f"Unable to handle exception in Salesforce due to: '{error}'")
             return
 
-    def send_fileobj(self, name: str, file: BinaryIO) -> None:
+    def send_fileobj(self, name: str, file: BinaryIO) -> bool | None:
         # No-op: Salesforce integration app does not support file uploads
         pass
 
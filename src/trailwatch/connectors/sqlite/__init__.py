@@ -0,0 +1,7 @@
+__all__ = [
+    "SqliteConnectorFactory",
+    "SqliteStore",
+]
+
+from .connector import SqliteConnectorFactory
+from .store import SqliteStore
@@ -0,0 +1,185 @@
+import datetime
+import logging
+import traceback
+import uuid
+import warnings
+
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, BinaryIO, Type
+
+from trailwatch.connectors.base import Connector, ConnectorFactory
+from trailwatch.fingerprint import fingerprint_exception
+
+from .handler import SqliteHandler
+from .store import DEFAULT_BATCH_SIZE, SqliteStore, get_store
+
+DEFAULT_MAX_FILE_SIZE = 64 * 1024 * 1024
+
+if TYPE_CHECKING:
+    from trailwatch.config import TrailwatchConfig
+
+
+class SqliteConnector(Connector):
+    def __init__(
+        self,
+        config: "TrailwatchConfig",
+        store: SqliteStore,
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+    ) -> None:
+        self.config = config
+        self.store = store
+        self.max_file_size = max_file_size
+        self.execution_id: str | None = None
+        self.handler: SqliteHandler | None = None
+        self.metadata: dict[str, Any] = {}
+
+    def start_execution(self) -> None:
+        try:
+            execution_id = uuid.uuid4().hex
+            shard = self.config.shard
+            self.store.create_execution(
+                execution_id,
+                self.config.project,
+                self.config.environment,
+                self.config.job,
+                datetime.datetime.utcnow(),
+                self.config.execution_ttl,
+                parent_execution_id=(
+                    None if shard is None else shard.parent_execution_id
+                ),
+                shard=None if shard is None else shard.shard,
+                shards=None if shard is None else shard.shards,
+            )
+            self.execution_id = execution_id
+        except Exception as error:
+            warnings.warn(f"Unable to start execution in SQLite due to: '{error}'")
+            return
+
+        # Register logging handlers
+        self.handler = SqliteHandler(self.execution_id, self.store)
+        for logger_name in self.config.loggers:
+            logging.getLogger(logger_name).addHandler(self.handler)
+
+    def detach_handlers(self) -> None:
+        if self.handler is not None:
+            for logger_name in self.config.loggers:
+                logging.getLogger(logger_name).removeHandler(self.handler)
+
+    def finalize_execution(self, status: str, end: datetime.datetime) -> None:
+        self.detach_handlers()
+
+        if self.execution_id is not None:
+            try:
+                self.store.update_execution(
+                    self.execution_id, status, end, self.metadata
+                )
+            except Exception as error:
+                warnings.warn(
+                    f"Unable to finalize execution in SQLite due to: '{error}'"
+                )
+
+    def handle_exception(
+        self,
+        timestamp: datetime.datetime,
+        exc_type: Type[Exception],
+        exc_value: Exception,
+        exc_traceback: TracebackType,
+    ):
+        if self.execution_id is None:
+            return
+        try:
+            self.store.create_error(
+                execution_id=self.execution_id,
+                timestamp=timestamp,
+                name=exc_type.__name__,
+                message=str(exc_value),
+                traceback="".join(
+                    traceback.format_exception(
+                        exc_type,
+                        value=exc_value,
+                        tb=exc_traceback,
+                    )
+                ),
+                fingerprint=fingerprint_exception(exc_type, exc_value, exc_traceback),
+            )
+        except Exception as error:
+            warnings.warn(f"Unable to handle exception in SQLite due to: '{error}'")
+
+    def add_execution_metadata(self, key: str, value: Any) -> None:
+        self.metadata[key] = value
+
+    def report_progress(
+        self,
+        data: dict[str, Any],
+        heartbeat: datetime.datetime | None = None,
+    ) -> None:
+        if self.execution_id is None:
+            return
+        try:
+            self.store.update_progress(self.execution_id, data, heartbeat)
+        except Exception as error:
+            warnings.warn(f"Unable to report progress to SQLite due to: '{error}'")
+
+    def send_fileobj(self, name: str, file: BinaryIO) -> bool:
+        if self.execution_id is None:
+            return False
+        try:
+            # Files are stored as blobs, read at most one byte over the limit
+            # instead of loading arbitrarily large files into memory.
+            # A single read may return less (e.g., pipes fed by `fan_out`).
+            chunks: list[bytes] = []
+            remaining = self.max_file_size + 1
+            while remaining > 0:
+                chunk = file.read(remaining)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                remaining -= len(chunk)
+            content = b"".join(chunks)
+            if len(content) > self.max_file_size:
+                warnings.warn(
+                    f"Unable to send file '{name}' to SQLite: file is larger "
+                    f"than {self.max_file_size} bytes"
+                )
+                return False
+            self.store.create_file(self.execution_id, name, content)
+        except Exception as error:
+            warnings.warn(f"Unable to send file '{name}' to SQLite due to: '{error}'")
+            return False
+        return True
+
+
+class SqliteConnectorFactory(ConnectorFactory):
+    def __init__(
+        self,
+        path: Path | str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+    ) -> None:
+        """
+        Initialize TrailWatch SQLite connector factory.
+
+        Parameters
+        ----------
+        path : Path | str
+            Path to the SQLite database file. Created if it doesn't exist.
+        batch_size : int, optional
+            Number of buffered log records which triggers a batch insert.
+            Remaining records are inserted when the execution is finalized.
+            By default, 500.
+        max_file_size : int, optional
+            Maximum size of a file in bytes. Files are stored in the database,
+            larger files are not stored (a warning is issued). By default, 64 MiB.
+
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.max_file_size = max_file_size
+
+    def __call__(self, config: "TrailwatchConfig") -> SqliteConnector:
+        return SqliteConnector(
+            config,
+            get_store(self.path, self.batch_size),
+            max_file_size=self.max_file_size,
+        )
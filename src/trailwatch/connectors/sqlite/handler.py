@@ -0,0 +1,30 @@
+import datetime
+import logging
+
+from .store import SqliteStore
+
+
+class SqliteHandler(logging.Handler):
+    def __init__(self, execution_id: str, store: SqliteStore):
+        logging.Handler.__init__(self)
+        self.execution_id = execution_id
+        self.store = store
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.format(record)
+            msg = record.message
+            if record.exc_text:
+                msg = "\n".join([msg, record.exc_text])
+            self.store.create_log(
+                self.execution_id,
+                datetime.datetime.utcfromtimestamp(record.created).isoformat(),
+                record.name,
+                record.levelno,
+                record.lineno,
+                msg,
+                record.funcName,
+            )
+        except Exception:
+            # Failed writes (e.g., database is locked) must not break the job
+            self.handleError(record)
@@ -0,0 +1,454 @@
+import atexit
+import datetime
+import json
+import sqlite3
+import threading
+
+from pathlib import Path
+from typing import Any
+
+from trailwatch import background
+from trailwatch.shards import aggregate_shards
+
+DEFAULT_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS executions (
+    id TEXT PRIMARY KEY,
+    project TEXT NOT NULL,
+    environment TEXT NOT NULL,
+    job TEXT NOT NULL,
+    status TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT,
+    duration REAL,
+    heartbeat TEXT,
+    metadata TEXT,
+    ttl INTEGER,
+    parent_id TEXT,
+    shard TEXT,
+    shards INTEGER
+);
+CREATE INDEX IF NOT EXISTS executions_job_start ON executions (job, start);
+CREATE INDEX IF NOT EXISTS executions_status_start ON executions (status, start);
+CREATE INDEX IF NOT EXISTS executions_start ON executions (start);
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    execution_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    name TEXT NOT NULL,
+    levelno INTEGER NOT NULL,
+    lineno INTEGER,
+    msg TEXT,
+    func TEXT
+);
+CREATE INDEX IF NOT EXISTS logs_execution ON logs (execution_id, timestamp);
+CREATE TABLE IF NOT EXISTS errors (
+    id INTEGER PRIMARY KEY,
+    execution_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    name TEXT NOT NULL,
+    msg TEXT,
+    traceback TEXT,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS errors_execution ON errors (execution_id);
+CREATE INDEX IF NOT EXISTS errors_fingerprint ON errors (fingerprint, timestamp);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    execution_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    content BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_execution ON files (execution_id);
+"""
+
+# Columns added after the first release, created in existing databases on open
+EXECUTION_COLUMNS = {"parent_id": "TEXT", "shard": "TEXT", "shards": "INTEGER"}
+INDEXES = """
+CREATE INDEX IF NOT EXISTS executions_parent ON executions (parent_id, start);
+"""
+
+LOG_COLUMNS = ("execution_id", "timestamp", "name", "levelno", "lineno", "msg", "func")
+
+
+class SqliteStore:
+    """
+    Embedded SQLite database storing executions, logs, errors, and files.
+
+    Database is opened in WAL mode, so it can be queried while jobs are writing
+    to it. Log records are buffered and inserted in batches inside a single
+    transaction. All methods are thread-safe.
+
+    """
+
+    def __init__(self, path: Path | str, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        """
+        Initialize a SqliteStore instance.
+
+        Parameters
+        ----------
+        path : Path | str
+            Path to the database file. Created if it doesn't exist.
+        batch_size : int, optional
+            Number of buffered log records which triggers a batch insert.
+            By default, 500.
+
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self._logs: list[tuple[Any, ...]] = []
+        self.connection = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        columns = {
+            row["name"]
+            for row in self.connection.execute("PRAGMA table_info(executions)")
+        }
+        for column, column_type in EXECUTION_COLUMNS.items():
+            if column not in columns:
+                self.connection.execute(
+                    f"ALTER TABLE executions ADD COLUMN {column} {column_type}"
+                )
+        self.connection.executescript(INDEXES)
+
+    def _execute(self, sql: str, parameters: tuple[Any, ...] = ()) -> None:
+        with self._lock:
+            self.connection.execute(sql, parameters)
+
+    # Writing
+
+    def create_execution(
+        self,
+        execution_id: str,
+        project: str,
+        environment: str,
+        job: str,
+        start: datetime.datetime,
+        ttl: int | None,
+        parent_execution_id: str | None = None,
+        shard: str | None = None,
+        shards: int | None = None,
+    ) -> None:
+        self._execute(
+            "INSERT INTO executions "
+            "(id, project, environment, job, status, start, ttl, "
+            "parent_id, shard, shards) "
+            "VALUES (?, ?, ?, ?, 'running', ?, ?, ?, ?, ?)",
+            (
+                execution_id,
+                project,
+                environment,
+                job,
+                start.isoformat(),
+                ttl,
+                parent_execution_id,
+                shard,
+                shards,
+            ),
+        )
+
+    def update_execution(
+        self,
+        execution_id: str,
+        status: str,
+        end: datetime.datetime,
+        metadata: dict[str, Any],
+    ) -> None:
+        with self._lock:
+            self.flush()
+            self.connection.execute(
+                "UPDATE executions "
+                "SET status = ?, end = ?, metadata = ?, "
+                "duration = (julianday(?) - julianday(start)) * 86400.0 "
+                "WHERE id = ?",
+                (
+                    status,
+                    end.isoformat(),
+                    json.dumps(metadata, default=str),
+                    end.isoformat(),
+                    execution_id,
+                ),
+            )
+
+    def update_progress(
+        self,
+        execution_id: str,
+        metadata: dict[str, Any],
+        heartbeat: datetime.datetime | None,
+    ) -> None:
+        self._execute(
+            "UPDATE executions SET metadata = ?, heartbeat = COALESCE(?, heartbeat) "
+            "WHERE id = ?",
+            (
+                json.dumps(metadata, default=str),
+                None if heartbeat is None else heartbeat.isoformat(),
+                execution_id,
+            ),
+        )
+
+    def create_log(self, *values: Any) -> None:
+        """Buffer a log record, values are in the `LOG_COLUMNS` order."""
+        with self._lock:
+            self._logs.append(values)
+            if len(self._logs) >= self.batch_size:
+                self.flush()
+
+    def create_error(
+        self,
+        execution_id: str,
+        timestamp: datetime.datetime,
+        name: str,
+        message: str,
+        traceback: str,
+        fingerprint: str,
+    ) -> None:
+        self._execute(
+            "INSERT INTO errors "
+            "(execution_id, timestamp, name, msg, traceback, fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                execution_id,
+                timestamp.isoformat(),
+                name,
+                message,
+                traceback,
+                fingerprint,
+            ),
+        )
+
+    def create_file(self, execution_id: str, name: str, content: bytes) -> None:
+        self._execute(
+            "INSERT INTO files (execution_id, name, content) VALUES (?, ?, ?)",
+            (execution_id, name, content),
+        )
+
+    def flush(self) -> None:
+        """Insert buffered log records in a single transaction."""
+        with self._lock:
+            if not self._logs:
+                return
+            # Records are kept until committed, so they are retried by the next
+            # flush if the insert fails (e.g., database is locked or disk is full)
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany(
+                    f"INSERT INTO logs ({', '.join(LOG_COLUMNS)}) "  # nosec
+                    f"VALUES ({', '.join('?' for _ in LOG_COLUMNS)})",
+                    self._logs,
+                )
+                self.connection.execute("COMMIT")
+            except Exception:
+                if self.connection.in_transaction:
+                    self.connection.execute("ROLLBACK")
+                raise
+            self._logs = []
+
+    # Querying
+
+    def _query(
+        self, sql: str, parameters: tuple[Any, ...] = ()
+    ) -> list[dict[str, Any]]:
+        with self._lock:
+            self.flush()
+            rows = self.connection.execute(sql, parameters).fetchall()
+        result = []
+        for row in rows:
+            record = dict(row)
+            if isinstance(record.get("metadata"), str):
+                record["metadata"] = json.loads(record["metadata"])
+            result.append(record)
+        return result
+
+    def executions(
+        self,
+        job: str | None = None,
+        status: str | None = None,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Query executions sorted by start time (newest first).
+
+        Parameters
+        ----------
+        job : str, optional
+            Only return executions of this job.
+        status : str, optional
+            Only return executions with this status.
+        since : datetime.datetime, optional
+            Only return executions started at or after this time (UTC).
+        until : datetime.datetime, optional
+            Only return executions started before this time (UTC).
+        limit : int, optional
+            Maximum number of executions to return.
+
+        """
+        conditions: list[str] = []
+        parameters: list[Any] = []
+        for condition, value in [
+            ("job = ?", job),
+            ("status = ?", status),
+            ("start >= ?", None if since is None else since.isoformat()),
+            ("start < ?", None if until is None else until.isoformat()),
+        ]:
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        sql = "SELECT * FROM executions"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        sql += " ORDER BY start DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return self._query(sql, tuple(parameters))
+
+    def slowest_executions(
+        self,
+        job: str | None = None,
+        limit: int = 10,
+    ) -> list[dict[str, Any]]:
+        """Get finished executions with the longest duration."""
+        if job is None:
+            return self._query(
+                "SELECT * FROM executions WHERE duration IS NOT NULL "
+                "ORDER BY duration DESC LIMIT ?",
+                (limit,),
+            )
+        return self._query(
+            "SELECT * FROM executions WHERE job = ? AND duration IS NOT NULL "
+            "ORDER BY duration DESC LIMIT ?",
+            (job, limit),
+        )
+
+    def job_statistics(self) -> list[dict[str, Any]]:
+        """Get number of executions per status and duration statistics per job."""
+        return self._query(
+            "SELECT job, COUNT(*) AS executions, "
+            "SUM(status = 'success') AS success, "
+            "SUM(status = 'partial') AS partial, "
+            "SUM(status = 'failure') AS failure, "
+            "SUM(status = 'timeout') AS timeout, "
+            "SUM(status = 'running') AS running, "
+            "AVG(duration) AS average_duration, MAX(duration) AS max_duration "
+            "FROM executions GROUP BY job ORDER BY job"
+        )
+
+    def error_frequency(
+        self,
+        job: str | None = None,
+        since: datetime.datetime | None = None,
+        limit: int = 10,
+    ) -> list[dict[str, Any]]:
+        """Get the most frequent errors grouped by fingerprint."""
+        return self._query(
+            "SELECT errors.fingerprint, errors.name, "
+            "COUNT(*) AS count, COUNT(DISTINCT errors.execution_id) AS executions, "
+            "MIN(errors.timestamp) AS first_seen, MAX(errors.timestamp) AS last_seen, "
+            "MAX(errors.msg) AS msg "
+            "FROM errors JOIN executions ON executions.id = errors.execution_id "
+            "WHERE (? IS NULL OR executions.job = ?) "
+            "AND (? IS NULL OR errors.timestamp >= ?) "
+            "GROUP BY errors.fingerprint, errors.name "
+            "ORDER BY count DESC LIMIT ?",
+            (
+                job,
+                job,
+                None if since is None else since.isoformat(),
+                None if since is None else since.isoformat(),
+                limit,
+            ),
+        )
+
+    def shards(self, parent_execution_id: str) -> list[dict[str, Any]]:
+        """Get shard executions of a parent execution."""
+        return self._query(
+            "SELECT * FROM executions WHERE parent_id = ? ORDER BY start",
+            (parent_execution_id,),
+        )
+
+    def parent_execution(
+        self,
+        parent_execution_id: str,
+        shards: int | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Get a parent execution aggregated from its shards.
+
+        Parameters
+        ----------
+        parent_execution_id : str
+            ID of the parent execution.
+        shards : int, optional
+            Expected number of shards. By default, number of shards passed
+            to the shard executions is used, if any.
+
+        Returns
+        -------
+        dict[str, Any] | None
+            Parent execution record (see `trailwatch.shards.aggregate_shards`)
+            or None if no shard of the parent was found.
+
+        """
+        executions = self.shards(parent_execution_id)
+        if not executions:
+            return None
+        return {
+            "id": parent_execution_id,
+            "job": executions[0]["job"],
+            **aggregate_shards(executions, shards),
+        }
+
+    def logs(self, execution_id: str) -> list[dict[str, Any]]:
+        """Get log records of an execution."""
+        return self._query(
+            "SELECT * FROM logs WHERE execution_id = ? ORDER BY timestamp, id",
+            (execution_id,),
+        )
+
+    def errors(self, execution_id: str) -> list[dict[str, Any]]:
+        """Get error records of an execution."""
+        return self._query(
+            "SELECT * FROM errors WHERE execution_id = ? ORDER BY timestamp, id",
+            (execution_id,),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self.connection.close()
+
+
+_stores: dict[Path, SqliteStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: Path | str, batch_size: int = DEFAULT_BATCH_SIZE) -> SqliteStore:
+    """Get a store shared by all connectors writing to the same database."""
+    path = Path(path).resolve()
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SqliteStore(path, batch_size)
+        return _stores[path]
+
+
+@atexit.register
+def close_stores() -> None:
+    # Exit hooks run in reverse order of registration, this one may run before
+    # the one flushing background tasks, which still need the stores
+    background.flush()
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
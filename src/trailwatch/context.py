@@ -1,21 +1,44 @@
 import datetime
+import functools
 import io
+import shutil
 import signal
+import tempfile
+import threading
+import time
+import warnings
 
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from types import FrameType, TracebackType
-from typing import BinaryIO, Type
+from typing import Any, BinaryIO, Callable, Type
 
+from . import background
 from .config import DEFAULT, Default, TrailwatchConfig
 from .connectors.aws.connector import AwsConnector
 from .connectors.base import Connector
 from .exceptions import ExecutionTimeoutError, PartialSuccessError, TrailwatchError
+from .fanout import fan_out
+from .heartbeat import Heartbeat
+from .histogram import Histogram
+from .instrumentation import HttpRecorder
+from .memory import DEFAULT_GROWTH_THRESHOLD, memory_growth_tracker
+from .metrics import Metrics
+from .profiling import ExecutionProfiler
+from .resources import ResourceMonitor, ResourceProfile
+from .shards import get_shard_info
+from .spans import Span, SpanRecorder
+from .stacks import format_stacks
 
 try:
     from .connectors.salesforce.connector import SalesforceConnector
 except ImportError:
     SalesforceConnector = None
 
+# Maximum size of a file object kept in memory before it is spooled to disk
+# when sending files in background
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
 
 class TimeoutManager:
     """
@@ -23,10 +46,12 @@ class TimeoutManager:
 
     Timeout is implemented using the SIGALRM signal.
     This works only on Unix systems and is not thread-safe.
+    Stacks of all threads are captured when the timeout (or the soft timeout)
+    expires, so hung executions can be diagnosed without reproducing them.
 
     """
 
-    def __init__(self, timeout: int | None):
+    def __init__(self, timeout: int | None, soft_timeout: float | None = None):
         """
         Initialize a TimeoutManager instance.
 
@@ -35,15 +60,35 @@ class TimeoutManager:
         timeout : int | None
             Timeout in seconds.
             If None, no timeout is set (no-op).
+        soft_timeout : float, optional
+            Seconds after which a warning is issued and stacks of all threads
+            are captured without interrupting the execution.
+            By default, no soft timeout is set.
 
         """
         self.timeout = timeout
+        self.soft_timeout = soft_timeout
         self.original_alarm_handler = None
-
-    @staticmethod
-    def handle_timeout(signum: int, frame: FrameType | None) -> None:
+        self.soft_timer: threading.Timer | None = None
+        # File name -> stacks of all threads
+        self.stack_dumps: dict[str, str] = {}
+        # Not acquired by the signal handler, it may interrupt the lock owner
+        self._stack_dumps_lock = threading.Lock()
+
+    def handle_timeout(self, signum: int, frame: FrameType | None) -> None:
+        # Use the interrupted frame, so the handler itself is not in the dump
+        self.stack_dumps["timeout-stacks.txt"] = format_stacks(frame)
         raise ExecutionTimeoutError
 
+    def handle_soft_timeout(self) -> None:
+        stacks = format_stacks()
+        with self._stack_dumps_lock:
+            self.stack_dumps["soft-timeout-stacks.txt"] = stacks
+        warnings.warn(
+            f"Execution is running longer than the soft timeout of "
+            f"{self.soft_timeout} seconds"
+        )
+
     def register_timeout_handler(self) -> None:
         """
         Store the original alarm handler and register the timeout handler.
@@ -53,6 +98,13 @@ class TimeoutManager:
             self.original_alarm_handler = signal.getsignal(signal.SIGALRM)
             signal.signal(signal.SIGALRM, self.handle_timeout)
             signal.alarm(self.timeout)
+        if self.soft_timeout is not None:
+            self.soft_timer = threading.Timer(
+                self.soft_timeout, self.handle_soft_timeout
+            )
+            self.soft_timer.name = "trailwatch-soft-timeout"
+            self.soft_timer.daemon = True
+            self.soft_timer.start()
 
     def restore_original_handler(self) -> None:
         """
@@ -62,11 +114,21 @@ class TimeoutManager:
         (e.g. next Azure or AWS Lambda function) in the same environment.
 
         """
+        if self.soft_timer is not None:
+            # Cancel doesn't stop the callback if it is already running
+            self.soft_timer.cancel()
+            self.soft_timer.join()
+            self.soft_timer = None
         if self.timeout is not None:
             signal.alarm(0)
             assert self.original_alarm_handler is not None
             signal.signal(signal.SIGALRM, self.original_alarm_handler)
 
+    def get_stack_dumps(self) -> dict[str, str]:
+        """Get a copy of captured stack dumps (file name -> stacks)."""
+        with self._stack_dumps_lock:
+            return dict(self.stack_dumps)
+
     def __enter__(self) -> "TimeoutManager":
         self.register_timeout_handler()
         return self
@@ -104,6 +166,23 @@ class TrailwatchContext:
         log_ttl: int | Default | None = DEFAULT,
         error_ttl: int | Default | None = DEFAULT,
         timeout: int | None = None,
+        soft_timeout: float | None = None,
+        track_resources: bool = False,
+        trace_memory: bool = False,
+        track_memory_growth: bool = False,
+        memory_growth_threshold: int = DEFAULT_GROWTH_THRESHOLD,
+        trace_allocations: bool = False,
+        profile: str | None = None,
+        profile_sample_rate: int = 1,
+        profile_threshold: float | None = None,
+        metrics_interval: float | None = None,
+        heartbeat_interval: float | None = None,
+        background_finalize: bool = False,
+        background_uploads: int | None = None,
+        instrument_http: bool = False,
+        parent_execution_id: str | None = None,
+        shard: str | int | None = None,
+        shards: int | None = None,
     ) -> None:
         """
         Initialize a TrailwatchContext instance for a job.
@@ -127,6 +206,88 @@ class TrailwatchContext:
             Timeout in seconds. If the callable takes longer than this to execute,
             an execution timeout error is raised and execution is marked as timed out.
             By default, no timeout is set.
+            Stacks of all threads at the moment the timeout expired are sent
+            as the 'timeout-stacks.txt' execution file.
+        soft_timeout : float, optional
+            Seconds after which a warning is issued and stacks of all threads
+            are captured without interrupting the execution. Stacks are sent
+            as the 'soft-timeout-stacks.txt' execution file. Set it lower than
+            `timeout` to see where a slow execution spent its time before it
+            was timed out. By default, no soft timeout is set.
+        track_resources : bool, optional
+            Measure resources consumed by the execution (wall and CPU time,
+            peak memory, garbage collection, threads) and attach them
+            to the execution record. By default, False.
+        trace_memory : bool, optional
+            Trace Python memory allocations to measure peak memory usage
+            during the execution. Has a noticeable performance impact.
+            Only used when `track_resources` is True. By default, False.
+        track_memory_growth : bool, optional
+            Measure memory retained by the process at the end of the execution
+            (after a full garbage collection) and compare it with the lowest retained
+            memory over the recent executions of the same job in this process.
+            A growth report is attached to the execution when it grows by more than
+            `memory_growth_threshold`. Useful to find leaking jobs in long-lived
+            workers. By default, False.
+        memory_growth_threshold : int, optional
+            Growth of retained memory in bytes which produces a growth report.
+            Only used when `track_memory_growth` is True. By default, 32 MiB.
+        trace_allocations : bool, optional
+            Trace allocations with tracemalloc for the rest of the process lifetime,
+            so growth reports include allocation sites which grew the most.
+            Has a noticeable performance impact.
+            Only used when `track_memory_growth` is True. By default, False.
+        profile : str, optional
+            Profile the execution and send the profile as an execution file.
+            Either 'sampling' (low-overhead statistical profiler producing
+            collapsed stacks, suitable for long jobs) or 'cprofile'
+            (deterministic profiler producing pstats data, suitable for short jobs).
+            By default, execution is not profiled.
+        profile_sample_rate : int, optional
+            Profile only 1 in `profile_sample_rate` executions of the job.
+            By default, every execution is profiled.
+        profile_threshold : float, optional
+            Send the profile only if the execution takes longer than this
+            many seconds. By default, the profile is always sent.
+        metrics_interval : float, optional
+            Interval in seconds at which counters and gauges are sent (if they
+            changed) while the execution is running, independently of heartbeats.
+            By default, they are sent only when the execution is finalized
+            (and with heartbeats, if enabled).
+        heartbeat_interval : float, optional
+            Interval in seconds at which a liveness timestamp, the latest progress
+            (see `progress`), and counters are sent while the execution is running.
+            Allows detecting hung executions. By default, no heartbeat is sent.
+        background_finalize : bool, optional
+            Return control immediately when the context is exited and finalize
+            the execution (update status, send errors, etc.) in a background thread.
+            Use `trailwatch.flush` to wait for background telemetry to be sent.
+            By default, False.
+        background_uploads : int, optional
+            Send files in background using up to this many concurrent uploads.
+            Methods sending files return a future instead of blocking. All uploads
+            are finished (or reported as failed) before the execution is finalized.
+            By default, files are sent synchronously.
+        instrument_http : bool, optional
+            Record outbound HTTP calls made through urllib3 (and libraries built
+            on it, e.g., requests and simple_salesforce) while the execution is
+            running. Per host number of calls, status codes, bytes sent and received,
+            and latency percentiles are sent with heartbeats and when the execution
+            is finalized. Calls made by TrailWatch itself are not recorded.
+            By default, False.
+        parent_execution_id : str, optional
+            Run the execution as a shard of this parent execution. The parent
+            is created by whichever shard starts first, and its status, timing,
+            and counters are aggregated from shards as they finish (the parent
+            is 'partial' if some shards failed). By default, taken from
+            the 'TRAILWATCH_PARENT_EXECUTION_ID' environment variable, if set.
+        shard : str | int, optional
+            Name or index of this shard. By default, taken from
+            the 'TRAILWATCH_SHARD' environment variable or '<hostname>-<pid>'.
+        shards : int, optional
+            Total number of shards. The parent is running until this many
+            shards have finished. By default, taken from the 'TRAILWATCH_SHARDS'
+            environment variable, if set.
 
         """
         self.config = TrailwatchConfig(
@@ -136,11 +297,225 @@ class TrailwatchContext:
             execution_ttl=execution_ttl,
             log_ttl=log_ttl,
             error_ttl=error_ttl,
+            shard=get_shard_info(parent_execution_id, shard, shards),
         )
         self.connectors: list[Connector] = []
-        self.timeout = TimeoutManager(timeout)
+        self.timeout = TimeoutManager(timeout, soft_timeout)
+        self.resource_monitor = (
+            ResourceMonitor(trace_memory=trace_memory) if track_resources else None
+        )
+        self.resources: ResourceProfile | None = None
+        self.track_memory_growth = track_memory_growth
+        self.memory_growth_threshold = memory_growth_threshold
+        self.trace_allocations = trace_allocations
+        self.memory_start: tuple[int | None, int | None] = (None, None)
+        self.profiler = (
+            ExecutionProfiler(
+                job=job,
+                mode=profile,
+                sample_rate=profile_sample_rate,
+                threshold=profile_threshold,
+            )
+            if profile is not None
+            else None
+        )
+        self.span_recorder: SpanRecorder | None = None
+        self.metrics = Metrics()
+        self.item_latency: Histogram | None = None
+        # Items are recorded by the job while heartbeats read the histogram
+        self._item_latency_lock = threading.Lock()
+        self.latest_progress: dict[str, Any] | None = None
+        self.heartbeat: Heartbeat | None = None
+        self.http_recorder = HttpRecorder() if instrument_http else None
+        self.background_finalize = background_finalize
+        self.upload_executor = (
+            ThreadPoolExecutor(
+                max_workers=background_uploads,
+                thread_name_prefix="trailwatch-upload",
+            )
+            if background_uploads is not None
+            else None
+        )
+        self.uploads: dict[Future, str] = {}
+        if heartbeat_interval is not None or metrics_interval is not None:
+            self.heartbeat = Heartbeat(
+                collect=self._collect_progress,
+                send=self._report_progress,
+                heartbeat_interval=heartbeat_interval,
+                metrics_interval=metrics_interval,
+            )
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """
+        Increment a counter.
+
+        Counters are cheap to increment in hot loops and are sent together
+        with their rates (per second) when the execution is finalized.
+
+        Parameters
+        ----------
+        name : str
+            Counter name. E.g., 'processed', 'failed', 'skipped'.
+        value : float, optional
+            Value to add to the counter. By default, 1.
+
+        """
+        self.metrics.increment(name, value)
+
+    def gauge(self, name: str, value: float) -> None:
+        """
+        Set a gauge to a value.
+
+        Parameters
+        ----------
+        name : str
+            Gauge name. E.g., 'queue_size'.
+        value : float
+            Current value.
+
+        """
+        self.metrics.gauge(name, value)
+
+    def progress(
+        self,
+        current: float,
+        total: float | None = None,
+        message: str | None = None,
+    ) -> None:
+        """
+        Report progress of the execution.
+
+        Only the latest progress is kept and it is sent with the next heartbeat
+        (see `heartbeat_interval`) and when the execution is finalized.
+
+        Parameters
+        ----------
+        current : float
+            Amount of work done. E.g., number of processed records.
+        total : float, optional
+            Total amount of work, if known.
+        message : str, optional
+            Human-readable description of the current state.
+
+        """
+        self.latest_progress = {"current": current, "total": total, "message": message}
+
+    def record_item(self, latency: float) -> None:
+        """
+        Record an item produced by a streaming execution.
+
+        Called automatically for each item yielded by watched generators.
+        Item count, items per second, and latency percentiles are sent with
+        heartbeats and when the execution is finalized. Memory usage is constant
+        regardless of the number of items.
+
+        Parameters
+        ----------
+        latency : float
+            Time in seconds it took to produce the item.
+
+        """
+        with self._item_latency_lock:
+            if self.item_latency is None:
+                self.item_latency = Histogram()
+            self.item_latency.record(latency)
+
+    def _collect_progress(self) -> dict[str, Any]:
+        data: dict[str, Any] = {}
+        if self.latest_progress is not None:
+            data["progress"] = self.latest_progress
+        if not self.metrics.is_empty:
+            data["metrics"] = self.metrics.snapshot()
+        with self._item_latency_lock:
+            if self.item_latency is not None:
+                elapsed = time.monotonic() - self.metrics.start
+                count = self.item_latency.count
+                data["items"] = {
+                    "count": count,
+                    "rate": count / elapsed if elapsed > 0 else 0.0,
+                    "latency": self.item_latency.to_dict(),
+                }
+        if self.http_recorder is not None:
+            data["http"] = self.http_recorder.to_dict()
+        return data
+
+    def _report_progress(
+        self,
+        data: dict[str, Any],
+        heartbeat: datetime.datetime | None,
+    ) -> None:
+        for connector in self.connectors:
+            connector.report_progress(data, heartbeat)
+
+    def span(self, name: str) -> Span:
+        """
+        Measure duration of a step of the execution.
+
+        Returned object can be used as a context manager or as a decorator.
+        Spans can be nested (e.g., 'download' inside of 'extract') and are sent
+        in bulk when the execution is finalized.
+
+        Parameters
+        ----------
+        name : str
+            Step name. E.g., 'extract', 'transform', 'upsert to Salesforce'.
 
-    def send_file(self, file: Path | str) -> None:
+        Returns
+        -------
+        Span
+            Span context manager and decorator.
+
+        """
+        if self.span_recorder is None:
+            self.span_recorder = SpanRecorder()
+        return Span(self.span_recorder, name)
+
+    def _send_fileobj(self, name: str, file: BinaryIO) -> list[Connector]:
+        """Send a file to all connectors. Return connectors which failed to send it."""
+        connectors = [
+            connector for connector in self.connectors if connector.supports_files
+        ]
+        if len(connectors) == 1:
+            results = [connectors[0].send_fileobj(name, file)]
+        elif len(connectors) > 1:
+            # Read the file once and stream it to all connectors concurrently
+            results = fan_out(
+                file,
+                [
+                    functools.partial(connector.send_fileobj, name)
+                    for connector in connectors
+                ],
+            )
+        else:
+            results = []
+        # Connectors return None if they don't report failures
+        return [
+            connector
+            for connector, result in zip(connectors, results)
+            if result is False
+        ]
+
+    def _send_and_close(self, name: str, open_file: Callable[[], BinaryIO]) -> None:
+        with open_file() as file:
+            failed = self._send_fileobj(name, file)
+        if failed:
+            # Fail the future, so the upload is reported by `_wait_for_uploads`
+            raise RuntimeError(
+                "not sent by "
+                + ", ".join(type(connector).__name__ for connector in failed)
+            )
+
+    def _submit_upload(
+        self,
+        name: str,
+        open_file: Callable[[], BinaryIO],
+    ) -> Future:
+        assert self.upload_executor is not None
+        future = self.upload_executor.submit(self._send_and_close, name, open_file)
+        self.uploads[future] = name
+        return future
+
+    def send_file(self, file: Path | str) -> Future | None:
         """
         Send a file to TrailWatch.
 
@@ -151,6 +526,12 @@ class TrailwatchContext:
         file : Path | str
             File to send to all connectors supporting this feature.
 
+        Returns
+        -------
+        Future | None
+            Future completed when the file is sent if background uploads
+            are enabled, None otherwise.
+
         """
         if isinstance(file, str):
             file = Path(file)
@@ -160,14 +541,23 @@ class TrailwatchContext:
                 f"not '{type(file).__name__}"
             )
         assert isinstance(file, Path)
+        if self.upload_executor is not None:
+            return self._submit_upload(
+                file.name,
+                functools.partial(open, file, "rb"),  # type: ignore
+            )
         with open(file, "rb") as file_stream:
-            self.send_fileobj(file.name, file_stream)
+            self._send_fileobj(file.name, file_stream)
+        return None
 
-    def send_fileobj(self, name: str, file: BinaryIO) -> None:
+    def send_fileobj(self, name: str, file: BinaryIO) -> Future | None:
         """
         Send a file object to TrailWatch.
 
         This file will be associated with the execution.
+        If background uploads are enabled, content of the file object is copied
+        to a temporary file (in memory, if small) before this method returns,
+        so the file object can be closed or reused right away.
 
         Parameters
         ----------
@@ -176,11 +566,22 @@ class TrailwatchContext:
         file : BinaryIO
             File object to send to all connectors supporting this feature.
 
-        """
-        for connector in self.connectors:
-            connector.send_fileobj(name, file)
+        Returns
+        -------
+        Future | None
+            Future completed when the file is sent if background uploads
+            are enabled, None otherwise.
 
-    def send_file_content(self, name: str, content: str | bytes) -> None:
+        """
+        if self.upload_executor is not None:
+            spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+            shutil.copyfileobj(file, spool)
+            spool.seek(0)
+            return self._submit_upload(name, lambda: spool)  # type: ignore
+        self._send_fileobj(name, file)
+        return None
+
+    def send_file_content(self, name: str, content: str | bytes) -> Future | None:
         """
         Send a file content to TrailWatch.
 
@@ -193,6 +594,12 @@ class TrailwatchContext:
         content : str | bytes
             File content to send to all connectors supporting this feature.
 
+        Returns
+        -------
+        Future | None
+            Future completed when the file is sent if background uploads
+            are enabled, None otherwise.
+
         """
         if isinstance(content, str):
             content = content.encode(encoding="utf-8")
@@ -201,7 +608,28 @@ class TrailwatchContext:
                 f"'content' must be a 'bytes', not '{type(content).__name__}"
             )
         assert isinstance(content, bytes)
-        self.send_fileobj(name, io.BytesIO(content))
+        if self.upload_executor is not None:
+            return self._submit_upload(
+                name,
+                functools.partial(io.BytesIO, content),
+            )
+        self._send_fileobj(name, io.BytesIO(content))
+        return None
+
+    def _wait_for_uploads(self) -> None:
+        """Wait for background uploads and report failed ones."""
+        if self.upload_executor is None:
+            return
+        self.upload_executor.shutdown(wait=True)
+        failed = []
+        for future, name in self.uploads.items():
+            error = future.exception()
+            if error is not None:
+                warnings.warn(f"Failed to send file '{name}' due to: {error}")
+                failed.append(name)
+        if failed:
+            for connector in self.connectors:
+                connector.add_execution_metadata("failed_uploads", failed)
 
     def __enter__(self) -> "TrailwatchContext":
         self.timeout.register_timeout_handler()
@@ -209,15 +637,35 @@ class TrailwatchContext:
             connector = connector_factory(self.config)
             connector.start_execution()
             self.connectors.append(connector)
+        if self.track_memory_growth:
+            self.memory_start = memory_growth_tracker.start(self.trace_allocations)
+        if self.http_recorder is not None:
+            self.http_recorder.start()
+        if self.resource_monitor is not None:
+            self.resource_monitor.start()
+        if self.profiler is not None:
+            self.profiler.start()
+        self.metrics.start = time.monotonic()
+        if self.heartbeat is not None:
+            self.heartbeat.start()
         return self
 
-    def __exit__(
+    def _finalize_connectors(
         self,
+        status: str,
+        end: datetime.datetime,
         exc_type: Type[Exception] | None,
         exc_value: Exception | None,
         exc_traceback: TracebackType | None,
-    ) -> bool:
-        self.timeout.restore_original_handler()
+        profile: bytes | None,
+    ) -> None:
+        if profile is not None:
+            assert self.profiler is not None
+            self.send_file_content(self.profiler.filename, profile)
+        for name, stacks in self.timeout.get_stack_dumps().items():
+            self.send_file_content(name, stacks)
+        self._wait_for_uploads()
+
         # Add URL of execution on AWS to Salesforce connectors
         if SalesforceConnector is not None:
             url = None
@@ -230,16 +678,6 @@ class TrailwatchContext:
                     if isinstance(connector, SalesforceConnector):
                         connector.trailwatch_aws_execution_url = url
 
-        end = datetime.datetime.utcnow()
-        if exc_type is None:
-            status = "success"
-        else:
-            if exc_type is ExecutionTimeoutError:
-                status = "timeout"
-            elif exc_type is PartialSuccessError:
-                status = "partial"
-            else:
-                status = "failure"
         for connector in self.connectors:
             connector.finalize_execution(status, end)
             if exc_type is not None and not issubclass(exc_type, TrailwatchError):
@@ -252,6 +690,66 @@ class TrailwatchContext:
                     exc_traceback=exc_traceback,
                 )
 
+    def __exit__(
+        self,
+        exc_type: Type[Exception] | None,
+        exc_value: Exception | None,
+        exc_traceback: TracebackType | None,
+    ) -> bool:
+        self.timeout.restore_original_handler()
+        if self.http_recorder is not None:
+            self.http_recorder.stop()
+        profile = None
+        if self.profiler is not None:
+            profile = self.profiler.stop()
+        if self.heartbeat is not None:
+            self.heartbeat.stop()
+        if self.resource_monitor is not None:
+            self.resources = self.resource_monitor.stop()
+            for connector in self.connectors:
+                connector.add_execution_metadata("resources", self.resources.to_dict())
+        if self.track_memory_growth:
+            memory = memory_growth_tracker.record(
+                self.config.job, self.memory_start, self.memory_growth_threshold
+            )
+            for connector in self.connectors:
+                connector.add_execution_metadata("memory", memory)
+        if self.span_recorder is not None:
+            spans = self.span_recorder.to_dict()
+            for connector in self.connectors:
+                connector.add_execution_metadata("spans", spans)
+        for key, value in self._collect_progress().items():
+            for connector in self.connectors:
+                connector.add_execution_metadata(key, value)
+
+        end = datetime.datetime.utcnow()
+        if exc_type is None:
+            status = "success"
+        else:
+            if exc_type is ExecutionTimeoutError:
+                status = "timeout"
+            elif exc_type is PartialSuccessError:
+                status = "partial"
+            else:
+                status = "failure"
+        # Detach handlers right away, so logs emitted after the context is exited
+        # aren't attributed to this execution while it's finalized in background
+        for connector in self.connectors:
+            connector.detach_handlers()
+        finalize = functools.partial(
+            self._finalize_connectors,
+            status,
+            end,
+            exc_type,
+            exc_value,
+            exc_traceback,
+            profile,
+        )
+        if self.background_finalize:
+            background.worker.submit(finalize)
+        else:
+            finalize()
+
         # Return True to suppress any exception raised in the context
         if exc_type is PartialSuccessError:
             return True
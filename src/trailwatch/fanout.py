@@ -0,0 +1,171 @@
+import io
+import queue
+import threading
+import warnings
+
+from typing import Any, BinaryIO, Callable
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_CHUNKS = 4
+
+# Sentinel put into pipes when the source is exhausted
+_EOF = b""
+
+
+class PipeReader(io.RawIOBase):
+    """
+    Read end of a bounded in-memory pipe fed by `fan_out`.
+
+    Chunks are shared between all readers without copying. Reading a whole chunk
+    returns the chunk itself, partial reads return a slice of it.
+
+    """
+
+    def __init__(self, maxsize: int, name: str | None = None) -> None:
+        super().__init__()
+        self.name = name
+        self.pipe: queue.Queue[bytes | BaseException] = queue.Queue(maxsize)
+        self.abandoned = False
+        self._chunk = memoryview(b"")
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def _next_chunk(self) -> bool:
+        """Get next chunk from the pipe. Return False if the pipe is exhausted."""
+        while not self._chunk and not self._eof:
+            item = self.pipe.get()
+            if isinstance(item, BaseException):
+                raise item
+            if item is _EOF:
+                self._eof = True
+            else:
+                self._chunk = memoryview(item)
+        return not self._eof or bool(self._chunk)
+
+    def readinto(self, buffer) -> int:  # type: ignore
+        if not self._next_chunk():
+            return 0
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return self.readall()
+        if not self._next_chunk():
+            return b""
+        chunk, self._chunk = self._chunk[:size], self._chunk[size:]
+        if isinstance(chunk.obj, bytes) and len(chunk) == len(chunk.obj):
+            return chunk.obj
+        return chunk.tobytes()
+
+    def readall(self) -> bytes:
+        chunks: list[memoryview] = []
+        while self._next_chunk():
+            chunks.append(self._chunk)
+            self._chunk = memoryview(b"")
+        if len(chunks) == 1:
+            (chunk,) = chunks
+            if isinstance(chunk.obj, bytes) and len(chunk) == len(chunk.obj):
+                return chunk.obj
+        return b"".join(chunks)
+
+    def abandon(self) -> None:
+        """Stop receiving chunks (consumer finished without reading everything)."""
+        self.abandoned = True
+        while True:
+            try:
+                self.pipe.get_nowait()
+            except queue.Empty:
+                break
+
+
+def fan_out(
+    file: BinaryIO,
+    consumers: list[Callable[[BinaryIO], Any]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_chunks: int = DEFAULT_MAX_CHUNKS,
+) -> list[Any]:
+    """
+    Read a file once and feed it to multiple consumers concurrently.
+
+    Each consumer runs in its own thread and receives a file-like object
+    reading from a bounded pipe, so memory usage is limited to `max_chunks`
+    chunks per consumer regardless of the file size. Works with non-seekable
+    streams. Exceptions raised by consumers are converted to warnings.
+
+    Parameters
+    ----------
+    file : BinaryIO
+        Source file object. Read exactly once, in chunks.
+    consumers : list[Callable[[BinaryIO], Any]]
+        Functions consuming a file object.
+    chunk_size : int, optional
+        Size of chunks read from the source. By default, 1 MiB.
+    max_chunks : int, optional
+        Maximum number of chunks buffered per consumer. By default, 4.
+
+    Returns
+    -------
+    list[Any]
+        Value returned by each consumer, or False for consumers which raised.
+
+    """
+    name = getattr(file, "name", None)
+    readers = [
+        PipeReader(max_chunks, name if isinstance(name, str) else None)
+        for _ in consumers
+    ]
+
+    results: list[Any] = [False] * len(consumers)
+
+    def consume(
+        index: int,
+        consumer: Callable[[BinaryIO], Any],
+        reader: PipeReader,
+    ) -> None:
+        try:
+            results[index] = consumer(reader)  # type: ignore
+        except Exception as error:
+            warnings.warn(f"Failed to consume file due to: {error}")
+        finally:
+            reader.abandon()
+
+    threads = [
+        threading.Thread(
+            target=consume,
+            args=(index, consumer, reader),
+            name="trailwatch-fan-out",
+            daemon=True,
+        )
+        for index, (consumer, reader) in enumerate(zip(consumers, readers))
+    ]
+    for thread in threads:
+        thread.start()
+
+    def broadcast(item: bytes | BaseException) -> None:
+        for reader in readers:
+            while not reader.abandoned:
+                try:
+                    reader.pipe.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            broadcast(bytes(chunk))
+        broadcast(_EOF)
+    except Exception as error:
+        broadcast(error)
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+    return results
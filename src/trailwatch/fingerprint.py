@@ -0,0 +1,145 @@
+import hashlib
+import threading
+import time
+import traceback
+
+from collections import OrderedDict
+from types import TracebackType
+from typing import Type
+
+
+def _normalize_filename(filename: str) -> str:
+    """
+    Normalize a frame filename so that it is stable across hosts and deployments.
+
+    Only the last two path components are kept, which strips virtual environment,
+    site-packages, and deployment directory prefixes.
+
+    """
+    parts = filename.replace("\\", "/").rsplit("/", 2)
+    return "/".join(parts[-2:])
+
+
+def fingerprint_exception(
+    exc_type: Type[BaseException],
+    exc_value: BaseException | None,
+    exc_traceback: TracebackType | None,
+) -> str:
+    """
+    Calculate a stable fingerprint of an exception.
+
+    Fingerprint is based on the exception type and normalized traceback frames
+    (file, function, and source line). Line numbers and exception messages are
+    ignored because they change between deployments and often contain
+    record-specific values (IDs, timestamps, etc.).
+    Chained exceptions (cause and context) are included in the fingerprint.
+
+    Parameters
+    ----------
+    exc_type : Type[BaseException]
+        Exception type.
+    exc_value : BaseException | None
+        Exception instance.
+    exc_traceback : TracebackType | None
+        Exception traceback.
+
+    Returns
+    -------
+    str
+        Hexadecimal fingerprint.
+
+    """
+    digest = hashlib.sha1(usedforsecurity=False)
+    seen: set[int] = set()
+    while True:
+        digest.update(f"{exc_type.__module__}.{exc_type.__qualname__}\n".encode())
+        for frame in traceback.extract_tb(exc_traceback):
+            digest.update(
+                "|".join(
+                    [
+                        _normalize_filename(frame.filename),
+                        frame.name,
+                        (frame.line or "").strip(),
+                    ]
+                ).encode()
+            )
+            digest.update(b"\n")
+        if exc_value is None:
+            break
+        seen.add(id(exc_value))
+        chained = exc_value.__cause__ or (
+            None if exc_value.__suppress_context__ else exc_value.__context__
+        )
+        if chained is None or id(chained) in seen:
+            break
+        exc_type, exc_value, exc_traceback = (
+            type(chained),
+            chained,
+            chained.__traceback__,
+        )
+    return digest.hexdigest()[:16]
+
+
+class FingerprintCache:
+    """
+    Process-level LRU cache of exception fingerprints.
+
+    Used to send full tracebacks only for the first occurrence of an exception
+    within a time window and a fingerprint reference with a count for repeats.
+
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """
+        Initialize a FingerprintCache instance.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of fingerprints to remember.
+            Least recently seen fingerprints are evicted first.
+
+        """
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, list[float | int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, fingerprint: str, window: int | None) -> int:
+        """
+        Record an occurrence of an exception.
+
+        Parameters
+        ----------
+        fingerprint : str
+            Exception fingerprint.
+        window : int | None
+            Deduplication window in seconds.
+            If None, deduplication is disabled and 1 is always returned.
+
+        Returns
+        -------
+        int
+            Number of occurrences within the current window, including this one.
+            1 means that this is the first occurrence and full details must be sent.
+
+        """
+        if window is None:
+            return 1
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None or now - entry[0] >= window:
+                entry = [now, 0]
+                self._entries[fingerprint] = entry
+            entry[1] += 1
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return int(entry[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+fingerprint_cache = FingerprintCache()
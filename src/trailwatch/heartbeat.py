@@ -0,0 +1,180 @@
+import datetime
+import threading
+import time
+import warnings
+
+from typing import Any, Callable
+
+
+class PeriodicReporter:
+    """
+    Calls a function periodically in a background thread.
+
+    Used to send intermediate execution data while the execution is running.
+
+    """
+
+    def __init__(
+        self,
+        interval: float | Callable[[], float],
+        report: Callable[[], None],
+    ) -> None:
+        """
+        Initialize a PeriodicReporter instance.
+
+        Parameters
+        ----------
+        interval : float | Callable[[], float]
+            Interval in seconds between calls or a function returning the number
+            of seconds until the next call.
+        report : Callable[[], None]
+            Function to call.
+
+        """
+        self.interval = interval
+        self.report = report
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _get_delay(self) -> float:
+        if callable(self.interval):
+            return self.interval()
+        return self.interval
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._get_delay()):
+            try:
+                self.report()
+            except Exception as error:
+                warnings.warn(f"Failed to report execution progress due to: {error}")
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run,
+            name="trailwatch-reporter",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class Heartbeat:
+    """
+    Periodically sends liveness and the latest progress of a running execution.
+
+    Heartbeats and metrics are scheduled independently, each at its own interval.
+    Heartbeats are always sent and carry a liveness timestamp, metrics are sent
+    only if the state changed since the previous report. Progress updates made
+    between two reports are coalesced: only the latest state is sent.
+
+    """
+
+    # Reports due within this many seconds are sent together
+    TOLERANCE = 0.01
+
+    def __init__(
+        self,
+        collect: Callable[[], dict[str, Any]],
+        send: Callable[[dict[str, Any], datetime.datetime | None], None],
+        heartbeat_interval: float | None = None,
+        metrics_interval: float | None = None,
+    ) -> None:
+        """
+        Initialize a Heartbeat instance.
+
+        Parameters
+        ----------
+        collect : Callable[[], dict[str, Any]]
+            Function returning the latest execution state (progress, metrics, etc.).
+        send : Callable[[dict[str, Any], datetime.datetime | None], None]
+            Function sending the state and the heartbeat timestamp to connectors.
+        heartbeat_interval : float, optional
+            Interval in seconds between heartbeats. By default, no heartbeat is sent.
+        metrics_interval : float, optional
+            Interval in seconds between reports of changed state without
+            a heartbeat. By default, state is sent only with heartbeats.
+
+        """
+        if heartbeat_interval is None and metrics_interval is None:
+            raise ValueError("Heartbeat or metrics interval must be provided")
+        self.collect = collect
+        self.send = send
+        self.heartbeat_interval = heartbeat_interval
+        self.metrics_interval = metrics_interval
+        self.last_activity = time.monotonic()
+        self._last_state: dict[str, Any] | None = None
+        self._next_heartbeat: float | None = None
+        self._next_metrics: float | None = None
+        self._reporter = PeriodicReporter(self._get_delay, self.report)
+
+    @staticmethod
+    def _get_signature(data: dict[str, Any]) -> dict[str, Any]:
+        # Elapsed time and rates change on every report, only compare values
+        signature = dict(data)
+        if "metrics" in signature:
+            signature["metrics"] = {
+                "counters": signature["metrics"]["counters"],
+                "gauges": signature["metrics"]["gauges"],
+            }
+        if "items" in signature:
+            signature["items"] = signature["items"]["count"]
+        return signature
+
+    def _schedule(self, now: float) -> None:
+        if self.heartbeat_interval is not None:
+            self._next_heartbeat = now + self.heartbeat_interval
+        if self.metrics_interval is not None:
+            self._next_metrics = now + self.metrics_interval
+
+    def _get_delay(self) -> float:
+        due = min(
+            next_report
+            for next_report in [self._next_heartbeat, self._next_metrics]
+            if next_report is not None
+        )
+        return max(due - time.monotonic(), 0)
+
+    def report(self) -> None:
+        now = time.monotonic()
+        heartbeat_due = (
+            self._next_heartbeat is not None
+            and self._next_heartbeat - now <= self.TOLERANCE
+        )
+        metrics_due = (
+            self._next_metrics is not None
+            and self._next_metrics - now <= self.TOLERANCE
+        )
+        if heartbeat_due:
+            assert self.heartbeat_interval is not None
+            self._next_heartbeat = now + self.heartbeat_interval
+        if metrics_due:
+            assert self.metrics_interval is not None
+            self._next_metrics = now + self.metrics_interval
+        if not heartbeat_due and not metrics_due:
+            return
+
+        data = self.collect()
+        signature = self._get_signature(data)
+        changed = signature != self._last_state
+        self._last_state = signature
+        if changed:
+            self.last_activity = now
+        if heartbeat_due:
+            data["idle"] = now - self.last_activity
+            self.send(data, datetime.datetime.utcnow())
+        elif changed:
+            self.send(data, None)
+
+    def start(self) -> None:
+        now = time.monotonic()
+        self.last_activity = now
+        self._schedule(now)
+        self._reporter.start()
+
+    def stop(self) -> None:
+        self._reporter.stop()
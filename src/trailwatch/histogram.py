@@ -0,0 +1,121 @@
+import math
+
+from typing import Any
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class Histogram:
+    """
+    Streaming histogram with constant memory usage.
+
+    Values are counted in logarithmically sized buckets, so any percentile can be
+    estimated within `precision` relative error without keeping the values.
+    Values outside of the [`lowest`, `highest`] range are counted in the first
+    and last buckets respectively. Exact minimum, maximum, and sum are tracked.
+
+    Not thread-safe, each thread should record to its own histogram.
+
+    """
+
+    def __init__(
+        self,
+        lowest: float = 1e-6,
+        highest: float = 1e5,
+        precision: float = 0.05,
+    ) -> None:
+        """
+        Initialize a Histogram instance.
+
+        Parameters
+        ----------
+        lowest : float, optional
+            Lowest value which is tracked with the given precision.
+            By default, 1e-6 (1 microsecond when recording seconds).
+        highest : float, optional
+            Highest value which is tracked with the given precision.
+            By default, 1e5 (about 28 hours when recording seconds).
+        precision : float, optional
+            Relative error of estimated percentiles. By default, 0.05 (5%).
+
+        """
+        self.lowest = lowest
+        self._log_growth = math.log1p(2 * precision)
+        self._log_lowest = math.log(lowest)
+        self._buckets = [0] * (self._get_index(highest) + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _get_index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return int((math.log(value) - self._log_lowest) / self._log_growth) + 1
+
+    def record(self, value: float) -> None:
+        """Record a value."""
+        index = self._get_index(value)
+        if index >= len(self._buckets):
+            index = len(self._buckets) - 1
+        self._buckets[index] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percentile: float) -> float | None:
+        """
+        Estimate a percentile of recorded values.
+
+        Parameters
+        ----------
+        percentile : float
+            Percentile between 0 and 100. E.g., 99 for p99.
+
+        Returns
+        -------
+        float | None
+            Estimated value or None if no values were recorded.
+
+        """
+        if self.count == 0:
+            return None
+        rank = max(math.ceil(self.count * percentile / 100), 1)
+        seen = 0
+        for index, count in enumerate(self._buckets):
+            seen += count
+            if seen >= rank:
+                break
+        if index == 0:
+            value = self.lowest
+        else:
+            # Geometric middle of the bucket
+            value = math.exp(self._log_lowest + (index - 0.5) * self._log_growth)
+        return min(max(value, self.min), self.max)
+
+    def to_dict(
+        self,
+        percentiles: tuple[float, ...] = DEFAULT_PERCENTILES,
+    ) -> dict[str, Any]:
+        """
+        Summarize recorded values.
+
+        Returns
+        -------
+        dict[str, Any]
+            'count', 'mean', 'min', 'max' and estimated percentiles
+            (e.g., 'p50', 'p99'). Values are None if nothing was recorded.
+
+        """
+        summary: dict[str, Any] = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+        for percentile in percentiles:
+            summary[f"p{percentile:g}"] = self.percentile(percentile)
+        return summary
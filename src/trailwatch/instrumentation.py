@@ -0,0 +1,214 @@
+import contextlib
+import threading
+import time
+
+from typing import Any, Callable, Iterator
+
+from urllib3.connectionpool import HTTPConnectionPool
+
+from .histogram import Histogram
+
+# Calls to hosts over this limit are aggregated under OTHER_HOSTS
+MAX_HOSTS = 100
+OTHER_HOSTS = "other"
+
+_local = threading.local()
+_lock = threading.Lock()
+_recorders: list["HttpRecorder"] = []
+_original_make_request: Callable[..., Any] | None = None
+
+
+@contextlib.contextmanager
+def uninstrumented() -> Iterator[None]:
+    """
+    Exclude HTTP calls made in the current thread from instrumentation.
+
+    Used for requests made by the SDK itself (e.g., TrailWatch API or Salesforce
+    connector), so that only calls made by the job are recorded.
+    Can be used as a context manager or as a decorator.
+
+    """
+    previous = getattr(_local, "uninstrumented", False)
+    _local.uninstrumented = True
+    try:
+        yield
+    finally:
+        _local.uninstrumented = previous
+
+
+def _get_size(body: Any) -> int:
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode())
+    # Streamed bodies (files, generators) are not measured
+    return 0
+
+
+def _make_request(
+    self: HTTPConnectionPool,
+    conn: Any,
+    method: str,
+    url: str,
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    assert _original_make_request is not None
+    recorders = _recorders
+    if not recorders or getattr(_local, "uninstrumented", False):
+        return _original_make_request(self, conn, method, url, *args, **kwargs)
+    host = self.host
+    if self.port is not None and self.port not in (80, 443):
+        host = f"{host}:{self.port}"
+    start = time.perf_counter()
+    try:
+        response = _original_make_request(self, conn, method, url, *args, **kwargs)
+    except Exception:
+        latency = time.perf_counter() - start
+        for recorder in recorders:
+            recorder.record(host, None, latency, _get_size(kwargs.get("body")), 0)
+        raise
+    latency = time.perf_counter() - start
+    try:
+        # Body may not be read yet (e.g., streamed by requests), rely on the header
+        received = int(response.headers.get("Content-Length") or 0)
+    except (AttributeError, ValueError):
+        received = 0
+    for recorder in recorders:
+        recorder.record(
+            host,
+            getattr(response, "status", None),
+            latency,
+            _get_size(kwargs.get("body")),
+            received,
+        )
+    return response
+
+
+def _install() -> None:
+    global _original_make_request  # pylint: disable=global-statement
+    # Patch is applied once and never removed (it only passes calls through while
+    # no recorder is started), so the true original is captured only once and
+    # patches applied on top of ours by other libraries never call it recursively
+    if _original_make_request is None:
+        _original_make_request = HTTPConnectionPool._make_request
+        HTTPConnectionPool._make_request = _make_request  # type: ignore
+
+
+class _HostStatistics:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.time = 0.0
+        self.status: dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "time": self.time,
+            "status": dict(self.status),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "latency": self.latency.to_dict(),
+        }
+
+
+class HttpRecorder:
+    """
+    Records outbound HTTP calls made through urllib3 (and libraries built on it,
+    such as requests and simple_salesforce) while an execution is running.
+
+    `urllib3.connectionpool.HTTPConnectionPool` is patched when the first recorder
+    is started. Each attempt (including retries and redirects) is recorded
+    as a separate call. Latency is measured until response headers are received.
+    Calls made by any thread are recorded by all started recorders, except calls
+    excluded using `uninstrumented`.
+
+    """
+
+    def __init__(self) -> None:
+        self._hosts: dict[str, _HostStatistics] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        global _recorders  # pylint: disable=global-statement
+        with _lock:
+            # Replace the list instead of mutating it, so it can be read without a lock
+            _recorders = [*_recorders, self]
+            _install()
+
+    def stop(self) -> None:
+        global _recorders  # pylint: disable=global-statement
+        with _lock:
+            _recorders = [recorder for recorder in _recorders if recorder is not self]
+
+    def record(
+        self,
+        host: str,
+        status: int | None,
+        latency: float,
+        bytes_sent: int,
+        bytes_received: int,
+    ) -> None:
+        """
+        Record an HTTP call.
+
+        Parameters
+        ----------
+        host : str
+            Host (with port, if not default).
+        status : int | None
+            Response status code or None if the call failed without a response.
+        latency : float
+            Seconds until response headers were received (or the call failed).
+        bytes_sent : int
+            Size of the request body in bytes.
+        bytes_received : int
+            Size of the response body in bytes (from the Content-Length header).
+
+        """
+        with self._lock:
+            statistics = self._hosts.get(host)
+            if statistics is None:
+                if len(self._hosts) >= MAX_HOSTS:
+                    host = OTHER_HOSTS
+                statistics = self._hosts.setdefault(host, _HostStatistics())
+            statistics.calls += 1
+            statistics.time += latency
+            statistics.bytes_sent += bytes_sent
+            statistics.bytes_received += bytes_received
+            if status is None:
+                statistics.errors += 1
+            else:
+                key = str(status)
+                statistics.status[key] = statistics.status.get(key, 0) + 1
+                statistics.latency.record(latency)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Get aggregated statistics.
+
+        Returns
+        -------
+        dict[str, Any]
+            'calls' - total number of calls.
+            'time' - total seconds spent waiting for responses.
+            'hosts' - per host number of calls, calls failed without a response
+            ('errors'), time, number of responses by status code, bytes sent
+            and received, and latency statistics (count, mean, min, max,
+            and percentiles).
+
+        """
+        with self._lock:
+            hosts = {
+                host: statistics.to_dict() for host, statistics in self._hosts.items()
+            }
+        return {
+            "calls": sum(host["calls"] for host in hosts.values()),
+            "time": sum(host["time"] for host in hosts.values()),
+            "hosts": hosts,
+        }
@@ -0,0 +1,273 @@
+import gc
+import os
+import threading
+import tracemalloc
+import warnings
+
+from collections import OrderedDict, deque
+from typing import Any
+
+DEFAULT_GROWTH_THRESHOLD = 32 * 1024 * 1024
+DEFAULT_WINDOW = 10
+DEFAULT_TOP = 10
+
+# Only the largest allocation sites of each snapshot are kept
+MAX_SITES = 1000
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):  # pragma: no cover
+    PAGE_SIZE = 4096
+
+# Allocation site ('file:line') -> (size in bytes, number of blocks)
+Sites = dict[str, tuple[int, int]]
+
+
+def get_rss() -> int | None:
+    """
+    Get current resident set size of the process in bytes.
+
+    Returns None if not supported by the platform (only Linux is supported).
+
+    """
+    try:
+        with open("/proc/self/statm", "rb") as file:
+            return int(file.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def take_allocation_sites(limit: int = MAX_SITES) -> Sites | None:
+    """
+    Get the largest allocation sites traced by tracemalloc.
+
+    Returns None if tracemalloc is not tracing.
+
+    """
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+    sites: Sites = {}
+    for statistic in snapshot.statistics("lineno")[:limit]:
+        frame = statistic.traceback[0]
+        sites[f"{frame.filename}:{frame.lineno}"] = (statistic.size, statistic.count)
+    return sites
+
+
+def diff_allocation_sites(
+    baseline: Sites,
+    current: Sites,
+    top: int = DEFAULT_TOP,
+) -> list[dict[str, Any]]:
+    """Get allocation sites which grew the most since the baseline."""
+    differences: list[dict[str, Any]] = []
+    for site, (size, count) in current.items():
+        baseline_size, baseline_count = baseline.get(site, (0, 0))
+        if size > baseline_size:
+            differences.append(
+                {
+                    "site": site,
+                    "size": size,
+                    "size_diff": size - baseline_size,
+                    "count_diff": count - baseline_count,
+                }
+            )
+    differences.sort(key=lambda difference: difference["size_diff"], reverse=True)
+    return differences[:top]
+
+
+# Memory used by the process: (resident set size, memory traced by tracemalloc)
+Measurement = tuple[int | None, int | None]
+
+
+class _JobMemory:
+    def __init__(self, window: int, source: str) -> None:
+        # Measurement used for the job, 'traced' or 'rss'
+        self.source = source
+        # Memory retained by all executions of the job so far
+        self.retained = 0
+        # Value of `retained` after each of the most recent executions
+        self.samples: deque[int] = deque(maxlen=window)
+        self.sites: Sites | None = None
+
+
+class MemoryGrowthTracker:
+    """
+    Process-level tracker of memory retained by jobs across executions.
+
+    Memory retained by an execution is the difference between memory used by
+    the process (traced by tracemalloc if tracing, RSS otherwise) at the start
+    of the execution and at its end after a full garbage collection, so only
+    memory which is still referenced (e.g., caches or leaks) is counted.
+    Executions during which tracing was started or stopped are not counted.
+    Memory retained by each job is accumulated across its executions
+    and compared with a rolling baseline: the lowest accumulated value over its
+    last `window` executions. When it grows beyond a threshold over the baseline,
+    a growth report is produced with allocation sites which grew the most
+    (if tracemalloc is tracing) and the baseline is reset.
+
+    Memory is measured for the whole process, so growth is attributed reliably
+    only when executions in the process don't overlap.
+
+    """
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        top: int = DEFAULT_TOP,
+        maxjobs: int = 1024,
+    ) -> None:
+        """
+        Initialize a MemoryGrowthTracker instance.
+
+        Parameters
+        ----------
+        window : int, optional
+            Number of recent executions of a job used as the baseline.
+            By default, 10.
+        top : int, optional
+            Number of allocation sites included in growth reports. By default, 10.
+        maxjobs : int, optional
+            Maximum number of jobs to remember.
+            Least recently finished jobs are evicted first.
+
+        """
+        self.window = window
+        self.top = top
+        self.maxjobs = maxjobs
+        self._jobs: OrderedDict[str, _JobMemory] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _measure() -> Measurement:
+        traced = (
+            tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        )
+        return get_rss(), traced
+
+    def start(self, trace_allocations: bool = False) -> Measurement:
+        """
+        Measure memory used by the process at the start of an execution.
+
+        Parameters
+        ----------
+        trace_allocations : bool, optional
+            Start tracing allocations with tracemalloc (kept running for the rest
+            of the process lifetime), so growth reports include allocation sites.
+            Has a noticeable performance impact. By default, False.
+
+        Returns
+        -------
+        tuple[int | None, int | None]
+            Resident set size and memory traced by tracemalloc in bytes (None if
+            not supported or not tracing), to be passed to `record`.
+
+        """
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self._measure()
+
+    def record(
+        self,
+        job: str,
+        start: Measurement,
+        threshold: int = DEFAULT_GROWTH_THRESHOLD,
+    ) -> dict[str, Any]:
+        """
+        Measure memory retained at the end of an execution of a job.
+
+        Parameters
+        ----------
+        job : str
+            Job name.
+        start : tuple[int | None, int | None]
+            Memory used by the process at the start of the execution
+            (returned by `start`).
+        threshold : int, optional
+            Growth in bytes over the baseline which produces a growth report.
+            By default, 32 MiB.
+
+        Returns
+        -------
+        dict[str, Any]
+            'rss' - resident set size in bytes (None if not supported).
+            'traced' - memory traced by tracemalloc in bytes (None if not tracing).
+            'retained' - memory retained by this execution in bytes
+            (not present if it can't be measured).
+            'growth' - memory retained by the job over the baseline in bytes.
+            'executions' - number of executions in the baseline.
+            'growth_report' - present only if growth exceeds the threshold.
+
+        """
+        gc.collect()
+        rss, traced = self._measure()
+        report: dict[str, Any] = {"rss": rss, "traced": traced}
+        start_rss, start_traced = start
+        # Traced memory is exact, while RSS depends on whether the allocator
+        # returned freed memory to the OS, but RSS is the only option without
+        # tracing and it includes memory allocated outside of Python.
+        # Tracing started or stopped during the execution makes it incomparable.
+        if start_traced is not None and traced is not None:
+            source, retained = "traced", traced - start_traced
+        elif start_traced is None and traced is None:
+            if start_rss is None or rss is None:
+                return report
+            source, retained = "rss", rss - start_rss
+        else:
+            return report
+        report["retained"] = retained
+
+        with self._lock:
+            state = self._jobs.get(job)
+            if state is None or state.source != source:
+                # Accumulated memory of the previous source is not comparable
+                state = _JobMemory(self.window, source)
+                self._jobs[job] = state
+            self._jobs.move_to_end(job)
+            while len(self._jobs) > self.maxjobs:
+                self._jobs.popitem(last=False)
+            state.retained += retained
+            growth = 0
+            if state.samples:
+                growth = state.retained - min(state.samples)
+                report.update(growth=growth, executions=len(state.samples))
+            exceeded = growth > threshold
+            if exceeded:
+                # Start over, so the same growth is reported only once
+                state.samples.clear()
+            state.samples.append(state.retained)
+            baseline_sites = state.sites
+
+        # Allocation sites are captured only for the first execution
+        # and when the growth is reported, snapshots are expensive
+        if baseline_sites is None or exceeded:
+            sites = take_allocation_sites()
+            with self._lock:
+                state.sites = sites
+        if exceeded:
+            report["growth_report"] = {
+                "threshold": threshold,
+                "top_sites": (
+                    diff_allocation_sites(baseline_sites, sites, self.top)
+                    if baseline_sites is not None and sites is not None
+                    else None
+                ),
+            }
+            warnings.warn(
+                f"Memory retained by job '{job}' grew by "
+                f"{growth / 1024 / 1024:.1f} MiB over the last "
+                f"{report['executions']} executions"
+            )
+        return report
+
+    def clear(self) -> None:
+        with self._lock:
+            self._jobs.clear()
+
+
+memory_growth_tracker = MemoryGrowthTracker()
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from typing import Any
+
+
+class Metrics:
+    """
+    Counters and gauges of a job execution.
+
+    Counters are accumulated in thread-local dictionaries, so incrementing
+    a counter in a hot loop does not acquire any locks. Per-thread values
+    are merged when a snapshot is taken.
+
+    """
+
+    def __init__(self) -> None:
+        self.start = time.monotonic()
+        self.gauges: dict[str, float] = {}
+        self._local = threading.local()
+        self._counters: list[dict[str, float]] = []
+
+    def _get_counters(self) -> dict[str, float]:
+        counters: dict[str, float] = {}
+        self._local.counters = counters
+        # list.append is atomic, so counters of all threads can be merged later
+        self._counters.append(counters)
+        return counters
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """
+        Increment a counter.
+
+        Parameters
+        ----------
+        name : str
+            Counter name. E.g., 'processed', 'failed', 'skipped'.
+        value : float, optional
+            Value to add to the counter. By default, 1.
+
+        """
+        try:
+            counters = self._local.counters
+        except AttributeError:
+            counters = self._get_counters()
+        counters[name] = counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float) -> None:
+        """
+        Set a gauge to a value.
+
+        Parameters
+        ----------
+        name : str
+            Gauge name. E.g., 'queue_size'.
+        value : float
+            Current value.
+
+        """
+        self.gauges[name] = value
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self._counters) == 0 and len(self.gauges) == 0
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Merge per-thread counters and take a snapshot of all metrics.
+
+        Returns
+        -------
+        dict[str, Any]
+            'counters' - counter totals.
+            'rates' - counter totals per second of execution.
+            'gauges' - latest gauge values.
+            'elapsed' - seconds since the execution started.
+
+        """
+        elapsed = time.monotonic() - self.start
+        counters: dict[str, float] = {}
+        for thread_counters in list(self._counters):
+            for name, value in thread_counters.copy().items():
+                counters[name] = counters.get(name, 0) + value
+        return {
+            "counters": counters,
+            "rates": {
+                name: value / elapsed if elapsed > 0 else 0.0
+                for name, value in counters.items()
+            },
+            "gauges": self.gauges.copy(),
+            "elapsed": elapsed,
+        }
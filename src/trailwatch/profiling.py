@@ -0,0 +1,165 @@
+import collections
+import cProfile
+import itertools
+import marshal
+import sys
+import threading
+import time
+
+from types import CodeType
+
+PROFILE_MODES = ("sampling", "cprofile")
+
+# Number of profiling candidates seen per job, used for 1-in-N sampling
+_job_counters: dict[str, itertools.count] = collections.defaultdict(itertools.count)
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler.
+
+    A background thread periodically samples the call stack of the profiled thread
+    and counts identical stacks. Result is produced in the collapsed-stack format
+    (one 'frame;frame;frame count' line per unique stack) which is understood by
+    flamegraph.pl, speedscope, and similar tools.
+
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """
+        Initialize a SamplingProfiler instance.
+
+        Parameters
+        ----------
+        interval : float, optional
+            Sampling interval in seconds. By default, 5 milliseconds.
+
+        """
+        self.interval = interval
+        self.stacks: collections.Counter[tuple[str, ...]] = collections.Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _sample(self, thread_id: int) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(  # pylint: disable=protected-access
+                thread_id
+            )
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._sample,
+            args=(threading.get_ident(),),
+            name="trailwatch-sampling-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> bytes:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.items()
+        ).encode(encoding="utf-8")
+
+
+class ExecutionProfiler:
+    """
+    This is used to profile a job execution.
+
+    Supports sampling (low overhead, suitable for long jobs) and deterministic
+    cProfile (accurate call counts, suitable for short jobs) profilers.
+    Only the thread which entered the execution context is profiled.
+
+    """
+
+    def __init__(
+        self,
+        job: str,
+        mode: str,
+        sample_rate: int = 1,
+        threshold: float | None = None,
+    ) -> None:
+        """
+        Initialize an ExecutionProfiler instance.
+
+        Parameters
+        ----------
+        job : str
+            Job name. Used to count executions for 1-in-N sampling.
+        mode : str
+            Profiler to use: 'sampling' or 'cprofile'.
+        sample_rate : int, optional
+            Profile only 1 in `sample_rate` executions of the job.
+            By default, every execution is profiled.
+        threshold : float, optional
+            Upload profile only if execution takes longer than this many seconds.
+            By default, profile is always uploaded.
+
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"'profile' must be one of {PROFILE_MODES}, not '{mode}'")
+        if sample_rate < 1:
+            raise ValueError("'profile_sample_rate' must be a positive integer")
+        self.mode = mode
+        self.threshold = threshold
+        self.enabled = next(_job_counters[job]) % sample_rate == 0
+        self._profiler: SamplingProfiler | cProfile.Profile | None = None
+        self._start = 0.0
+
+    @property
+    def filename(self) -> str:
+        return "profile.collapsed" if self.mode == "sampling" else "profile.pstats"
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        if self.mode == "sampling":
+            self._profiler = SamplingProfiler()
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start = time.monotonic()
+
+    def stop(self) -> bytes | None:
+        """
+        Stop profiler.
+
+        Returns
+        -------
+        bytes | None
+            Profile content (collapsed stacks or marshalled pstats data which can be
+            loaded with `pstats.Stats` after writing it to a file).
+            None if this execution was not profiled or it finished faster
+            than the threshold.
+
+        """
+        if self._profiler is None:
+            return None
+        duration = time.monotonic() - self._start
+        if isinstance(self._profiler, SamplingProfiler):
+            content = self._profiler.stop()
+        else:
+            self._profiler.disable()
+            self._profiler.create_stats()
+            content = marshal.dumps(self._profiler.stats)  # type: ignore
+        self._profiler = None
+        if self.threshold is not None and duration < self.threshold:
+            return None
+        return content
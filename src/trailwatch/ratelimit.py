@@ -0,0 +1,140 @@
+import logging
+import time
+
+from typing import Any
+
+# Maximum number of call sites tracked by a rate limiter,
+# records from call sites over this limit are not rate limited
+DEFAULT_MAX_CALL_SITES = 10_000
+
+# Indexes in bucket lists
+_TOKENS = 0
+_UPDATED = 1
+_SUPPRESSED = 2
+_LAST_RECORD = 3
+
+
+class CallSiteRateLimiter:
+    """
+    Token bucket rate limiter for log records keyed by call site.
+
+    Call site is identified by logger name, line number, and message template
+    (before arguments are substituted), so a message logged in a loop with
+    different arguments is limited as one call site. Each call site may send
+    up to `burst` records at once and `rate` records per second on average.
+    Records over the limit are suppressed and counted; use `collect_summaries`
+    to get records summarizing suppressed messages.
+
+    Buckets are stored in nested dictionaries, so checking a record costs
+    a few dictionary lookups without acquiring locks or allocating keys.
+    The check is not atomic; concurrent threads may occasionally let
+    a record over the limit through.
+
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 100,
+        summary_interval: float = 60.0,
+        max_call_sites: int = DEFAULT_MAX_CALL_SITES,
+    ) -> None:
+        """
+        Initialize a CallSiteRateLimiter instance.
+
+        Parameters
+        ----------
+        rate : float
+            Records per second allowed for each call site.
+        burst : int, optional
+            Maximum number of records sent at once from a call site. By default, 100.
+        summary_interval : float, optional
+            Minimum interval in seconds between summaries of suppressed messages.
+            By default, 60 seconds.
+        max_call_sites : int, optional
+            Maximum number of tracked call sites. By default, 10,000.
+
+        """
+        self.rate = rate
+        self.burst = burst
+        self.summary_interval = summary_interval
+        self.max_call_sites = max_call_sites
+        # Logger name -> line number -> message template -> bucket
+        self._buckets: dict[str, dict[int, dict[Any, list]]] = {}
+        self._call_sites = 0
+        self._next_summary = time.time() + summary_interval
+
+    def _create_bucket(self, record: logging.LogRecord) -> list | None:
+        if self._call_sites >= self.max_call_sites:
+            return None
+        bucket = [float(self.burst), record.created, 0, None]
+        self._buckets.setdefault(record.name, {}).setdefault(record.lineno, {})[
+            record.msg
+        ] = bucket
+        self._call_sites += 1
+        return bucket
+
+    def allow(self, record: logging.LogRecord) -> bool:
+        """Return True if the record should be sent, False if it is suppressed."""
+        bucket: list | None
+        try:
+            bucket = self._buckets[record.name][record.lineno][record.msg]
+        except KeyError:
+            try:
+                bucket = self._create_bucket(record)
+            except TypeError:
+                # Unhashable message
+                return True
+            if bucket is None:
+                return True
+        except TypeError:
+            # Unhashable message
+            return True
+        tokens = bucket[_TOKENS] + (record.created - bucket[_UPDATED]) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        bucket[_UPDATED] = record.created
+        if tokens >= 1:
+            bucket[_TOKENS] = tokens - 1
+            return True
+        bucket[_TOKENS] = tokens
+        bucket[_SUPPRESSED] += 1
+        bucket[_LAST_RECORD] = record
+        return False
+
+    @property
+    def summary_due(self) -> bool:
+        return time.time() >= self._next_summary
+
+    def collect_summaries(self) -> list[logging.LogRecord]:
+        """
+        Get records summarizing messages suppressed since the last call.
+
+        Returns
+        -------
+        list[logging.LogRecord]
+            One record per call site with suppressed messages, logged with
+            the level and location of the last suppressed message.
+
+        """
+        self._next_summary = time.time() + self.summary_interval
+        summaries = []
+        for lines in list(self._buckets.values()):
+            for templates in list(lines.values()):
+                for bucket in list(templates.values()):
+                    count, record = bucket[_SUPPRESSED], bucket[_LAST_RECORD]
+                    if count == 0 or record is None:
+                        continue
+                    bucket[_SUPPRESSED] -= count
+                    summary = logging.LogRecord(
+                        name=record.name,
+                        level=record.levelno,
+                        pathname=record.pathname,
+                        lineno=record.lineno,
+                        msg="%d similar messages suppressed: %s",
+                        args=(count, record.msg),
+                        exc_info=None,
+                        func=record.funcName,
+                    )
+                    summaries.append(summary)
+        return summaries
@@ -0,0 +1,206 @@
+import dataclasses
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # Not available on Windows
+    resource = None  # type: ignore
+
+
+@dataclasses.dataclass(frozen=True)
+class ResourceProfile:
+    """
+    Resources consumed by a job execution.
+
+    Attributes
+    ----------
+    wall_time : float
+        Wall clock duration in seconds measured using a monotonic clock.
+    cpu_user : float
+        User CPU time in seconds consumed by the process during the execution.
+    cpu_system : float
+        System CPU time in seconds consumed by the process during the execution.
+    max_rss : int | None
+        Peak resident set size of the process in bytes (process lifetime peak).
+        None if not supported by the platform.
+    tracemalloc_peak : int | None
+        Peak size in bytes of memory blocks traced by tracemalloc
+        during the execution. None if memory tracing was not enabled.
+    gc_collections : int
+        Number of garbage collector runs during the execution.
+    gc_pause : float
+        Total time in seconds spent in the garbage collector during the execution.
+    thread_count : int
+        Number of alive threads when the execution finished.
+    overlapping : bool
+        Whether other executions were monitored in the process at the same time.
+        CPU time and garbage collection are measured for the whole process,
+        so they include activity of the overlapping executions.
+
+    """
+
+    wall_time: float
+    cpu_user: float
+    cpu_system: float
+    max_rss: int | None
+    tracemalloc_peak: int | None
+    gc_collections: int
+    gc_pause: float
+    thread_count: int
+    overlapping: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
+
+
+def get_max_rss() -> int | None:
+    """Get peak resident set size of the current process in bytes."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class _GcStatistics:
+    """
+    Process-wide garbage collector statistics.
+
+    A single callback is registered while any monitor is running, monitors
+    take differences of the totals, so each collection is timed once
+    regardless of the number of running monitors.
+
+    """
+
+    def __init__(self) -> None:
+        self.collections = 0
+        self.pause = 0.0
+        self._start: float | None = None
+        # Reentrant, a collection may be triggered while the lock is held
+        self._lock = threading.RLock()
+        self._monitors = 0
+        self.starts = 0
+
+    def _callback(self, phase: str, info: dict[str, int]) -> None:
+        # Called by the collector while holding the GIL, no lock is needed
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.collections += 1
+            self.pause += time.perf_counter() - self._start
+            self._start = None
+
+    def attach(self) -> tuple[bool, int]:
+        """
+        Register a monitor.
+
+        Return whether other monitors are running and the number of monitors
+        registered so far (including this one).
+
+        """
+        with self._lock:
+            self._monitors += 1
+            self.starts += 1
+            if self._monitors == 1:
+                gc.callbacks.append(self._callback)
+            return self._monitors > 1, self.starts
+
+    def detach(self) -> tuple[bool, int]:
+        """
+        Unregister a monitor.
+
+        Return whether other monitors are running and the number of monitors
+        registered so far.
+
+        """
+        with self._lock:
+            self._monitors -= 1
+            if self._monitors == 0 and self._callback in gc.callbacks:
+                gc.callbacks.remove(self._callback)
+                self._start = None
+            return self._monitors > 0, self.starts
+
+
+_gc_statistics = _GcStatistics()
+
+
+class ResourceMonitor:
+    """
+    This is used to measure resources consumed by a job execution.
+
+    Measurements are taken only at the start and end of the execution
+    (plus a garbage collector callback), so the overhead is negligible.
+    CPU time and garbage collection are measured for the whole process;
+    profiles of executions which overlap in time are flagged as such.
+
+    """
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        """
+        Initialize a ResourceMonitor instance.
+
+        Parameters
+        ----------
+        trace_memory : bool, optional
+            Trace Python memory allocations using tracemalloc to measure
+            peak memory usage during the execution. This has a noticeable
+            performance impact. By default, False.
+
+        """
+        self.trace_memory = trace_memory
+        self._started_tracemalloc = False
+        self._start_wall = 0.0
+        self._start_times: os.times_result | None = None
+        self._start_gc_collections = 0
+        self._start_gc_pause = 0.0
+        self._start_monitors = 0
+        self._overlapping = False
+
+    def start(self) -> None:
+        if self.trace_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                self._started_tracemalloc = True
+        self._overlapping, self._start_monitors = _gc_statistics.attach()
+        self._start_gc_collections = _gc_statistics.collections
+        self._start_gc_pause = _gc_statistics.pause
+        self._start_times = os.times()
+        self._start_wall = time.monotonic()
+
+    def stop(self) -> ResourceProfile:
+        wall_time = time.monotonic() - self._start_wall
+        end_times = os.times()
+        assert self._start_times is not None
+        gc_collections = _gc_statistics.collections - self._start_gc_collections
+        gc_pause = _gc_statistics.pause - self._start_gc_pause
+        running, monitors = _gc_statistics.detach()
+        # Another monitor was running at the start, at the end, or started
+        # (and possibly stopped) in between
+        overlapping = self._overlapping or running or monitors != self._start_monitors
+        tracemalloc_peak = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        return ResourceProfile(
+            wall_time=wall_time,
+            cpu_user=end_times.user - self._start_times.user,
+            cpu_system=end_times.system - self._start_times.system,
+            max_rss=get_max_rss(),
+            tracemalloc_peak=tracemalloc_peak,
+            gc_collections=gc_collections,
+            gc_pause=gc_pause,
+            thread_count=threading.active_count(),
+            overlapping=overlapping,
+        )
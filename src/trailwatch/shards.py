@@ -0,0 +1,164 @@
+import datetime
+import os
+import socket
+
+from dataclasses import dataclass
+from typing import Any
+
+# Environment variables used to join a parent execution, so shards started
+# by an orchestrator (e.g., container or batch job array) don't need code changes
+PARENT_EXECUTION_ID_VARIABLE = "TRAILWATCH_PARENT_EXECUTION_ID"
+SHARD_VARIABLE = "TRAILWATCH_SHARD"
+SHARDS_VARIABLE = "TRAILWATCH_SHARDS"
+
+
+@dataclass(frozen=True)
+class ShardInfo:
+    """Identifies an execution as one of the shards of a parent execution."""
+
+    parent_execution_id: str
+    shard: str
+    shards: int | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "parent_execution_id": self.parent_execution_id,
+            "shard": self.shard,
+            "shards": self.shards,
+        }
+
+
+def get_shard_info(
+    parent_execution_id: str | None = None,
+    shard: str | int | None = None,
+    shards: int | None = None,
+) -> ShardInfo | None:
+    """
+    Resolve shard information from arguments and environment variables.
+
+    Arguments take precedence over the 'TRAILWATCH_PARENT_EXECUTION_ID',
+    'TRAILWATCH_SHARD', and 'TRAILWATCH_SHARDS' environment variables.
+
+    Parameters
+    ----------
+    parent_execution_id : str, optional
+        ID of the parent execution shared by all shards.
+    shard : str | int, optional
+        Name or index of this shard. By default, '<hostname>-<pid>'.
+    shards : int, optional
+        Total number of shards, if known.
+
+    Returns
+    -------
+    ShardInfo | None
+        Shard information or None if the execution is not a shard.
+
+    """
+    parent_execution_id = parent_execution_id or os.environ.get(
+        PARENT_EXECUTION_ID_VARIABLE
+    )
+    if not parent_execution_id:
+        return None
+    if shard is None:
+        shard = os.environ.get(SHARD_VARIABLE) or (
+            f"{socket.gethostname()}-{os.getpid()}"
+        )
+    if shards is None and os.environ.get(SHARDS_VARIABLE):
+        try:
+            shards = int(os.environ[SHARDS_VARIABLE])
+        except ValueError as error:
+            raise ValueError(
+                f"{SHARDS_VARIABLE} must be an integer, "
+                f"got '{os.environ[SHARDS_VARIABLE]}'"
+            ) from error
+    if shards is not None and shards < 1:
+        raise ValueError(f"Number of shards must be positive, got {shards}")
+    return ShardInfo(str(parent_execution_id), str(shard), shards)
+
+
+def aggregate_status(statuses: list[str], shards: int | None = None) -> str:
+    """
+    Get status of a parent execution from statuses of its shards.
+
+    Parent is 'running' while any shard is running (or fewer than `shards` shards
+    have reported), 'success' if all shards succeeded, 'timeout' if all shards
+    were timed out, 'failure' if all shards failed, and 'partial' otherwise.
+
+    """
+    if not statuses or "running" in statuses:
+        return "running"
+    if shards is not None and len(statuses) < shards:
+        return "running"
+    if all(status == "success" for status in statuses):
+        return "success"
+    if all(status == "timeout" for status in statuses):
+        return "timeout"
+    if all(status in ("failure", "timeout") for status in statuses):
+        return "failure"
+    return "partial"
+
+
+def aggregate_shards(
+    executions: list[dict[str, Any]],
+    shards: int | None = None,
+) -> dict[str, Any]:
+    """
+    Aggregate shard executions into a single view of the parent execution.
+
+    Parameters
+    ----------
+    executions : list[dict[str, Any]]
+        Shard execution records with 'status', 'start', 'end' (ISO timestamps),
+        and optional 'metadata' with counters sent by `TrailwatchContext.increment`.
+    shards : int, optional
+        Expected number of shards. By default, taken from the shard records.
+
+    Returns
+    -------
+    dict[str, Any]
+        Parent status, start and end (earliest start and latest end of shards),
+        duration in seconds, shard counts by status, and summed counters.
+
+    """
+    if shards is None:
+        shards = max(
+            (
+                execution["shards"]
+                for execution in executions
+                if execution.get("shards")
+            ),
+            default=None,
+        )
+    statuses = [execution.get("status") or "running" for execution in executions]
+    starts = [execution["start"] for execution in executions if execution.get("start")]
+    ends = [execution["end"] for execution in executions if execution.get("end")]
+    status = aggregate_status(statuses, shards)
+    start = min(starts) if starts else None
+    end = max(ends) if ends and status != "running" else None
+    counters: dict[str, float] = {}
+    for execution in executions:
+        metrics = (execution.get("metadata") or {}).get("metrics") or {}
+        for name, value in (metrics.get("counters") or {}).items():
+            counters[name] = counters.get(name, 0) + value
+    shard_counts: dict[str, int] = {}
+    for shard_status in statuses:
+        shard_counts[shard_status] = shard_counts.get(shard_status, 0) + 1
+    return {
+        "status": status,
+        "start": start,
+        "end": end,
+        "duration": (
+            (
+                datetime.datetime.fromisoformat(end)
+                - datetime.datetime.fromisoformat(start)
+            ).total_seconds()
+            if start is not None and end is not None
+            else None
+        ),
+        "shards": {
+            "expected": shards,
+            "reported": len(executions),
+            **shard_counts,
+        },
+        "counters": counters,
+    }
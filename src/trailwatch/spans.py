@@ -0,0 +1,152 @@
+import array
+import contextlib
+import threading
+import time
+
+from types import TracebackType
+from typing import Any, Type
+
+DEFAULT_SPAN_CAPACITY = 10_000
+
+
+class SpanRecorder:
+    """
+    Records durations of (nested) steps of a job execution.
+
+    Spans are written into preallocated buffers, so recording a span does not
+    allocate memory for the span itself. Only the span index is allocated under
+    a lock, which is held for a single increment.
+    When the buffer is full, individual spans are dropped, but they are still
+    counted in the per-step summary.
+
+    """
+
+    def __init__(self, capacity: int = DEFAULT_SPAN_CAPACITY) -> None:
+        """
+        Initialize a SpanRecorder instance.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            Maximum number of individual spans to keep.
+
+        """
+        self.capacity = capacity
+        self.origin = time.perf_counter()
+        self.names: list[str | None] = [None] * capacity
+        self.parents = array.array("q", [-1]) * capacity
+        self.starts = array.array("d", [0.0]) * capacity
+        self.durations = array.array("d", [-1.0]) * capacity
+        # Number of spans opened so far (including dropped ones)
+        self._count = 0
+        self._count_lock = threading.Lock()
+        self._local = threading.local()
+        self._summaries: list[dict[str, list[float]]] = []
+
+    def _get_state(self) -> tuple[list[tuple[int, str, float]], dict[str, list[float]]]:
+        try:
+            return self._local.stack, self._local.summary
+        except AttributeError:
+            self._local.stack = []
+            self._local.summary = {}
+            # list.append is atomic, so summaries of all threads can be merged later
+            self._summaries.append(self._local.summary)
+            return self._local.stack, self._local.summary
+
+    def open(self, name: str) -> None:
+        stack, _ = self._get_state()
+        if stack:
+            parent, parent_path, _ = stack[-1]
+            path = f"{parent_path}/{name}"
+        else:
+            parent, path = -1, name
+        with self._count_lock:
+            index = self._count
+            self._count += 1
+        start = time.perf_counter()
+        if index < self.capacity:
+            self.names[index] = name
+            self.parents[index] = parent
+            self.starts[index] = start - self.origin
+        stack.append((index, path, start))
+
+    def close(self) -> None:
+        end = time.perf_counter()
+        stack, summary = self._get_state()
+        index, path, start = stack.pop()
+        duration = end - start
+        if index < self.capacity:
+            self.durations[index] = duration
+        totals = summary.get(path)
+        if totals is None:
+            summary[path] = [1, duration]
+        else:
+            totals[0] += 1
+            totals[1] += duration
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Convert recorded spans to a JSON-serializable dictionary.
+
+        Returns
+        -------
+        dict[str, Any]
+            'spans' - individual spans with start offset (from the recorder creation)
+                and duration in seconds. Duration is None for spans which are
+                still open. Parent is the index of the enclosing span or None.
+            'summary' - count and total duration per step path
+                (e.g., 'extract/download').
+            'dropped' - number of spans which didn't fit into the buffer.
+
+        """
+        with self._count_lock:
+            count = self._count
+        spans = []
+        for index in range(min(count, self.capacity)):
+            parent = self.parents[index]
+            duration = self.durations[index]
+            spans.append(
+                {
+                    "name": self.names[index],
+                    "parent": parent if parent >= 0 else None,
+                    "start": self.starts[index],
+                    "duration": duration if duration >= 0 else None,
+                }
+            )
+        summary: dict[str, dict[str, float]] = {}
+        for thread_summary in list(self._summaries):
+            for path, (path_count, total) in list(thread_summary.items()):
+                merged = summary.setdefault(path, {"count": 0, "total": 0.0})
+                merged["count"] += path_count
+                merged["total"] += total
+        return {
+            "spans": spans,
+            "summary": summary,
+            "dropped": max(count - self.capacity, 0),
+        }
+
+
+class Span(contextlib.ContextDecorator):
+    """
+    Step of a job execution.
+
+    Can be used as a context manager or as a decorator. The same instance can be
+    reused and shared between threads: state of open spans is kept per thread.
+
+    """
+
+    def __init__(self, recorder: SpanRecorder, name: str) -> None:
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self) -> "Span":
+        self.recorder.open(self.name)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Type[Exception] | None,
+        exc_value: Exception | None,
+        exc_traceback: TracebackType | None,
+    ) -> None:
+        self.recorder.close()
@@ -0,0 +1,49 @@
+import datetime
+import sys
+import threading
+import traceback
+
+from types import FrameType
+
+
+def format_stacks(current_frame: FrameType | None = None) -> str:
+    """
+    Format stacks of all running threads.
+
+    Uses `sys._current_frames`, so (unlike `faulthandler`) thread names
+    and source lines are included and the output can be sent as a file.
+
+    Parameters
+    ----------
+    current_frame : FrameType, optional
+        Frame to use for the calling thread instead of its current frame
+        (e.g., frame interrupted by a signal, so the signal handler itself
+        is not shown). By default, the calling thread is omitted.
+
+    Returns
+    -------
+    str
+        Stack of each thread, the most recent call last.
+
+    """
+    threads = {thread.ident: thread for thread in threading.enumerate()}
+    current_ident = threading.get_ident()
+    # pylint: disable=protected-access
+    frames = sys._current_frames()
+    timestamp = datetime.datetime.utcnow().isoformat()
+    sections = []
+    for ident, frame in frames.items():
+        if ident == current_ident:
+            if current_frame is None:
+                continue
+            frame = current_frame
+        thread = threads.get(ident)
+        name = thread.name if thread is not None else "<unknown>"
+        daemon = ", daemon" if thread is not None and thread.daemon else ""
+        sections.append(
+            f'Thread "{name}" ({ident}{daemon}), most recent call last:\n'
+            + "".join(traceback.format_stack(frame))
+        )
+    header = f"Stacks of {len(sections)} threads at {timestamp} (UTC)"
+    # Formatted stacks end with a newline
+    return "\n".join([f"{header}\n", *sections])
@@ -0,0 +1,40 @@
+import threading
+
+
+class SdkStats:
+    """
+    Process-level statistics of the SDK itself (uploads, etc.).
+
+    Used to observe the overhead and throughput of TrailWatch telemetry.
+
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+
+    def get(self, name: str) -> float:
+        return self._values.get(name, 0)
+
+    @property
+    def upload_throughput(self) -> float:
+        """Average upload throughput in bytes per second."""
+        seconds = self.get("upload_seconds")
+        return self.get("upload_bytes") / seconds if seconds > 0 else 0.0
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            values = dict(self._values)
+        values["upload_throughput"] = self.upload_throughput
+        return values
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+sdk_stats = SdkStats()
@@ -0,0 +1,45 @@
+import os
+import threading
+import time
+
+# Crockford's Base32 alphabet
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+_lock = threading.Lock()
+_last_timestamp = -1
+_last_randomness = 0
+
+
+def _encode(value: int, length: int) -> str:
+    characters = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        characters.append(ALPHABET[index])
+    return "".join(reversed(characters))
+
+
+def new_ulid() -> str:
+    """
+    Generate a ULID (Universally Unique Lexicographically Sortable Identifier).
+
+    ULID is a 26-character string consisting of a 48-bit millisecond timestamp
+    and 80 random bits. IDs are generated locally without any network calls,
+    sort in the order of creation, and are monotonic within a process
+    (IDs generated within the same millisecond increment the random part).
+
+    Returns
+    -------
+    str
+        ULID. E.g., '01HF8Z4Y7N5QK3T0W1V2X3Y4Z5'.
+
+    """
+    global _last_timestamp, _last_randomness  # pylint: disable=global-statement
+    timestamp = time.time_ns() // 1_000_000
+    with _lock:
+        if timestamp <= _last_timestamp:
+            timestamp = _last_timestamp
+            randomness = (_last_randomness + 1) & ((1 << 80) - 1)
+        else:
+            randomness = int.from_bytes(os.urandom(10), "big")
+        _last_timestamp, _last_randomness = timestamp, randomness
+    return _encode(timestamp, 10) + _encode(randomness, 16)
@@ -0,0 +1,26 @@
+import pytest
+
+import trailwatch
+
+from trailwatch.connectors.sqlite import SqliteConnectorFactory
+
+
+@pytest.fixture
+def database(request, tmp_path):
+    """
+    Configure SQLite connector and return its path.
+
+    Files are limited to 10 bytes, parametrize the fixture indirectly
+    with a different maximum file size if needed.
+
+    """
+    path = tmp_path / "trailwatch.sqlite"
+    trailwatch.configure(
+        project="project",
+        project_description="Project",
+        environment="test",
+        connectors=[
+            SqliteConnectorFactory(path, max_file_size=getattr(request, "param", 10))
+        ],
+    )
+    return path
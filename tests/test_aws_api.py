@@ -0,0 +1,595 @@
+import datetime
+import decimal
+import hashlib
+import io
+import json
+import json as jsonlib
+import logging
+import threading
+import time
+
+import pytest
+
+import trailwatch
+
+from trailwatch import TrailwatchContext
+from trailwatch.config import TrailwatchConfig
+from trailwatch.connectors.aws import AwsConnectorFactory
+from trailwatch.connectors.aws import api as api_module
+from trailwatch.connectors.aws import dedupe as dedupe_module
+from trailwatch.connectors.aws import multipart as multipart_module
+from trailwatch.connectors.aws.api import TrailwatchApi
+from trailwatch.connectors.aws.dedupe import UploadCache, hash_file
+from trailwatch.connectors.aws.handler import AwsHandler, BufferedAwsHandler
+from trailwatch.connectors.aws.transport import Transport, TransportResponse
+from trailwatch.fingerprint import fingerprint_cache
+from trailwatch.ratelimit import CallSiteRateLimiter
+
+
+class FakeTransport(Transport):
+    """Records requests and responds using `respond` (an empty JSON by default)."""
+
+    def __init__(self, respond=None) -> None:
+        self.requests: list[dict] = []
+        self.lock = threading.Lock()
+        self.respond = respond or (lambda method, url, body: {})
+
+    def request(
+        self,
+        method,
+        url,
+        headers=None,
+        json=None,
+        data=None,
+        files=None,
+        timeout=30,
+    ):
+        with self.lock:
+            self.requests.append(
+                {
+                    "method": method,
+                    "url": url,
+                    "headers": headers or {},
+                    # Serialized like a real transport would
+                    "json": None if json is None else _roundtrip(json),
+                    "data": data,
+                }
+            )
+        response = self.respond(method, url, json if data is None else data)
+        if isinstance(response, TransportResponse):
+            return response
+        return TransportResponse(200, {}, jsonlib.dumps(response).encode(), url)
+
+
+def _roundtrip(value):
+    return json.loads(json.dumps(value))
+
+
+def make_api(transport, **kwargs):
+    return TrailwatchApi(transport, "https://trailwatch.test", "key", **kwargs)
+
+
+def test_metadata_with_values_not_serializable_as_json_is_sent():
+    transport = FakeTransport()
+    api = make_api(transport)
+    api.update_execution(
+        "execution",
+        "success",
+        datetime.datetime(2026, 1, 1),
+        metadata={"total": decimal.Decimal("1.5"), "count": 1},
+    )
+    (request,) = transport.requests
+    assert request["json"]["metadata"] == {"total": "1.5", "count": 1}
+
+
+def test_parts_of_split_log_message_share_log_id():
+    transport = FakeTransport()
+    api = make_api(transport, max_request_size=4096)
+    api.create_log(
+        "execution",
+        datetime.datetime(2026, 1, 1),
+        "logger",
+        20,
+        1,
+        "x" * 3000,
+        "func",
+        None,
+    )
+    ids = [request["json"]["id"] for request in transport.requests]
+    assert len(ids) > 1
+    log_id = ids[0].rsplit("-", 1)[0]
+    assert ids == [f"{log_id}-{number}" for number in range(1, len(ids) + 1)]
+    assert [
+        request["headers"]["Idempotency-Key"] for request in transport.requests
+    ] == ids
+
+
+class FakeMultipartBackend:
+    """Responds to multipart upload requests, failing uploads of chosen parts."""
+
+    def __init__(self, failing_parts=()):
+        self.failing_parts = set(failing_parts)
+        self.uploads = 0
+
+    def __call__(self, method, url, body):
+        if url.endswith("/files/multipart"):
+            upload_id = body["upload_id"]
+            if upload_id is None:
+                self.uploads += 1
+                upload_id = f"upload-{self.uploads}"
+            return {
+                "upload_id": upload_id,
+                "urls": [f"https://s3.test/{number}" for number in range(1, 4)],
+            }
+        if url.startswith("https://s3.test/"):
+            number = int(url.rsplit("/", 1)[1])
+            if number in self.failing_parts:
+                return TransportResponse(403, {}, b"", url)
+            return TransportResponse(200, {"ETag": f'"etag-{number}"'}, b"", url)
+        return {}
+
+
+@pytest.fixture
+def multipart(monkeypatch, tmp_path):
+    monkeypatch.setattr(multipart_module, "STATE_DIRECTORY", tmp_path)
+    monkeypatch.setattr(api_module, "DEFAULT_PART_RETRIES", 0)
+
+
+def upload(api, content):
+    file = io.BytesIO(content)
+    return api.upload_file_multipart(
+        "execution", "file.bin", file, len(content), hash_file(file)
+    )
+
+
+def uploaded_parts(transport):
+    return [
+        request["url"].rsplit("/", 1)[1]
+        for request in transport.requests
+        if request["url"].startswith("https://s3.test/")
+    ]
+
+
+def test_multipart_upload_resumes_only_same_content(multipart):
+    backend = FakeMultipartBackend(failing_parts=[2])
+    transport = FakeTransport(backend)
+    api = make_api(transport, multipart_part_size=4)
+    with pytest.warns(UserWarning, match="2 of 3 parts uploaded"):
+        assert not upload(api, b"aaaabbbbcc")
+
+    # Different content of the same size doesn't reuse uploaded parts
+    backend.failing_parts.clear()
+    transport.requests.clear()
+    assert upload(api, b"xxxxyyyyzz")
+    assert uploaded_parts(transport) == ["1", "2", "3"]
+
+    # Same content resumes the upload
+    transport.requests.clear()
+    assert upload(api, b"aaaabbbbcc")
+    assert uploaded_parts(transport) == ["2"]
+    complete = transport.requests[-1]["json"]
+    assert complete["upload_id"] == "upload-1"
+    assert [part["etag"] for part in complete["parts"]] == [
+        '"etag-1"',
+        '"etag-2"',
+        '"etag-3"',
+    ]
+
+
+def test_multipart_upload_verifies_parts_before_reuse(multipart, tmp_path):
+    backend = FakeMultipartBackend(failing_parts=[3])
+    transport = FakeTransport(backend)
+    api = make_api(transport, multipart_part_size=4)
+    with pytest.warns(UserWarning):
+        assert not upload(api, b"aaaabbbbcc")
+    (path,) = tmp_path.glob("*.json")
+    state = json.loads(path.read_text())
+    state["parts"]["1"]["sha256"] = "0" * 64
+    path.write_text(json.dumps(state))
+
+    backend.failing_parts.clear()
+    transport.requests.clear()
+    assert upload(api, b"aaaabbbbcc")
+    assert uploaded_parts(transport) == ["1", "3"]
+
+
+@pytest.mark.filterwarnings("ignore:Failed to make 'POST' request")
+def test_execution_is_created_in_background_and_retried_on_failure(monkeypatch):
+    created = threading.Event()
+    attempts = []
+
+    def respond(method, url, body):
+        if url.endswith("/api/v1/executions") and method == "POST":
+            attempts.append(body["id"])
+            # Backend is slow and fails the first attempt
+            created.wait(5)
+            if len(attempts) == 1:
+                return TransportResponse(400, {}, b"", url)
+        return {}
+
+    monkeypatch.setattr(api_module.time, "sleep", lambda seconds: None)
+    transport = FakeTransport(respond)
+    factory = AwsConnectorFactory(
+        url="https://trailwatch.test", api_key="key", transport=transport
+    )
+    trailwatch.configure(
+        project="project",
+        project_description="Project",
+        environment="test",
+        connectors=[factory],
+    )
+    connector = factory(TrailwatchConfig(job="job", job_description="Job"))
+
+    start = time.monotonic()
+    connector.start_execution()
+    assert time.monotonic() - start < 1
+    execution_id = connector.execution_id
+    assert execution_id is not None
+
+    created.set()
+    connector.finalize_execution("success", datetime.datetime.utcnow())
+    assert attempts == [execution_id, execution_id]
+    assert connector.execution_id == execution_id
+    (update,) = [
+        request for request in transport.requests if request["method"] == "PATCH"
+    ]
+    assert update["url"].endswith(f"/executions/{execution_id}")
+
+
+def test_execution_id_assigned_by_backend_is_adopted():
+    created = threading.Event()
+
+    def respond(method, url, body):
+        if url.endswith("/api/v1/executions") and method == "POST":
+            created.wait(5)
+            return {"id": "server-id"}
+        return {}
+
+    transport = FakeTransport(respond)
+    factory = AwsConnectorFactory(
+        url="https://trailwatch.test",
+        api_key="key",
+        transport=transport,
+        buffer_logs=True,
+    )
+    trailwatch.configure(
+        project="project",
+        project_description="Project",
+        environment="test",
+        connectors=[factory],
+        loggers=["test_aws_api_id"],
+    )
+    connector = factory(TrailwatchConfig(job="job", job_description="Job"))
+    logger = logging.getLogger("test_aws_api_id")
+    logger.setLevel(logging.INFO)
+
+    connector.start_execution()
+    logger.info("before creation")
+    created.set()
+    assert connector.execution_url == "https://trailwatch.test/executions/server-id"
+    connector.finalize_execution("success", datetime.datetime.utcnow())
+
+    (batch,) = [
+        request["json"]
+        for request in transport.requests
+        if request["url"].endswith("/api/v1/logs/batch")
+    ]
+    assert [log["execution_id"] for log in batch["logs"]] == ["server-id"]
+    (update,) = [
+        request for request in transport.requests if request["method"] == "PATCH"
+    ]
+    assert update["url"].endswith("/executions/server-id")
+
+
+@pytest.mark.filterwarnings("ignore:Failed to make 'POST' request")
+def test_execution_url_is_not_available_if_creation_failed(monkeypatch):
+    def respond(method, url, body):
+        if url.endswith("/api/v1/executions") and method == "POST":
+            return TransportResponse(400, {}, b"", url)
+        return {}
+
+    monkeypatch.setattr(api_module.time, "sleep", lambda seconds: None)
+    factory = AwsConnectorFactory(
+        url="https://trailwatch.test",
+        api_key="key",
+        transport=FakeTransport(respond),
+    )
+    connector = factory(TrailwatchConfig(job="job", job_description="Job"))
+    connector.start_execution()
+    assert connector.execution_url is None
+    connector.detach_handlers()
+
+
+def test_logged_exception_keeps_traceback_of_error_record():
+    transport = FakeTransport()
+    factory = AwsConnectorFactory(
+        url="https://trailwatch.test", api_key="key", transport=transport
+    )
+    trailwatch.configure(
+        project="project",
+        project_description="Project",
+        environment="test",
+        connectors=[factory],
+        loggers=["test_aws_api"],
+    )
+    fingerprint_cache.clear()
+    logger = logging.getLogger("test_aws_api")
+
+    with pytest.raises(ValueError):
+        with TrailwatchContext(job="job", job_description="Job"):
+            try:
+                raise ValueError("failed")
+            except ValueError:
+                logger.exception("Processing failed")
+                raise
+
+    (log,) = [
+        request["json"]
+        for request in transport.requests
+        if request["url"].endswith("/api/v1/logs")
+    ]
+    assert log["msg"] == "Processing failed"
+    (error,) = [
+        request["json"]
+        for request in transport.requests
+        if request["url"].endswith("/api/v1/errors")
+    ]
+    assert "raise ValueError" in error["traceback"]
+
+
+def make_record(msg, created, name="test_aws_handler"):
+    record = logging.LogRecord(name, logging.INFO, __file__, 1, msg, None, None)
+    record.created = created
+    return record
+
+
+def shipped_messages(transport):
+    return [
+        [log["msg"] for log in request["json"]["logs"]]
+        for request in transport.requests
+        if request["url"].endswith("/api/v1/logs/batch")
+    ]
+
+
+def test_buffered_handler_merges_thread_buffers_in_time_order():
+    transport = FakeTransport()
+    handler = BufferedAwsHandler("execution", make_api(transport), flush_interval=3600)
+
+    def log(records):
+        for record in records:
+            handler.handle(record)
+
+    threads = [
+        threading.Thread(
+            target=log, args=([make_record("a1", 1), make_record("a3", 3)],)
+        ),
+        threading.Thread(
+            target=log, args=([make_record("b2", 2), make_record("b4", 4)],)
+        ),
+    ]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    # Each logging thread appends to its own buffer
+    assert len(handler._buffers) == 2
+    assert transport.requests == []
+
+    handler.flush()
+    assert shipped_messages(transport) == [["a1", "b2", "a3", "b4"]]
+    # Buffers of finished threads are released once they are found empty
+    handler.close()
+    assert handler._buffers == {}
+    assert len(shipped_messages(transport)) == 1
+
+
+def test_buffered_handler_ships_records_in_batches_when_closed():
+    transport = FakeTransport()
+    handler = BufferedAwsHandler(
+        "execution", make_api(transport), flush_interval=3600, max_batch_size=2
+    )
+    for number in range(5):
+        handler.handle(make_record(str(number), number))
+    assert transport.requests == []
+    handler.close()
+    assert not handler._thread.is_alive()
+    assert shipped_messages(transport) == [["0", "1"], ["2", "3"], ["4"]]
+
+
+def test_buffered_handler_ships_records_from_background_thread():
+    transport = FakeTransport()
+    handler = BufferedAwsHandler("execution", make_api(transport), flush_interval=0.01)
+    try:
+        handler.handle(make_record("shipped", 1))
+        deadline = time.monotonic() + 5
+        while not shipped_messages(transport) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert shipped_messages(transport) == [["shipped"]]
+    finally:
+        handler.close()
+
+
+def test_buffered_handler_drops_oldest_records_over_limit():
+    transport = FakeTransport()
+    handler = BufferedAwsHandler(
+        "execution", make_api(transport), flush_interval=3600, max_buffered=2
+    )
+    for number in range(4):
+        handler.handle(make_record(str(number), number))
+    handler.close()
+    assert shipped_messages(transport) == [["2", "3"]]
+
+
+def test_buffered_handler_drops_records_if_execution_was_not_created():
+    transport = FakeTransport()
+    handler = BufferedAwsHandler(
+        "execution",
+        make_api(transport),
+        flush_interval=3600,
+        wait_for_execution=lambda: False,
+    )
+    handler.handle(make_record("dropped", 1))
+    handler.close()
+    assert transport.requests == []
+
+
+def test_handler_sends_summary_of_rate_limited_records():
+    transport = FakeTransport()
+    handler = AwsHandler(
+        "execution",
+        make_api(transport),
+        rate_limiter=CallSiteRateLimiter(rate=0.001, burst=1),
+    )
+    logger = logging.getLogger("test_aws_rate_limit")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for number in range(3):
+            logger.warning("Processed %d", number)
+    finally:
+        logger.removeHandler(handler)
+    handler.close()
+    messages = [
+        request["json"]["msg"]
+        for request in transport.requests
+        if request["url"].endswith("/api/v1/logs")
+    ]
+    assert messages == [
+        "Processed 0",
+        "2 similar messages suppressed: Processed %d",
+    ]
+
+
+def test_repeated_errors_are_sent_without_traceback():
+    transport = FakeTransport()
+    trailwatch.configure(
+        project="project",
+        project_description="Project",
+        environment="test",
+        connectors=[
+            AwsConnectorFactory(
+                url="https://trailwatch.test", api_key="key", transport=transport
+            )
+        ],
+        error_dedup_window=60,
+    )
+    fingerprint_cache.clear()
+
+    for number in range(2):
+        with pytest.raises(ValueError):
+            with TrailwatchContext(job="job", job_description="Job"):
+                raise ValueError(f"record {number}")
+
+    first, second = [
+        request["json"]
+        for request in transport.requests
+        if request["url"].endswith("/api/v1/errors")
+    ]
+    assert first["fingerprint"] == second["fingerprint"]
+    assert (first["count"], second["count"]) == (1, 2)
+    assert "raise ValueError" in first["traceback"]
+    assert second["traceback"] is None
+    assert second["msg"] == "record 1"
+
+
+class FakeUploadBackend:
+    """Responds to single file uploads, remembering uploaded content hashes."""
+
+    def __init__(self):
+        self.hashes = set()
+
+    def __call__(self, method, url, body):
+        if url.endswith("/files/reference"):
+            return {"exists": body["sha256"] in self.hashes}
+        if url.endswith("/files"):
+            if body["sha256"] in self.hashes:
+                return {"exists": True}
+            self.hashes.add(body["sha256"])
+            return {"url": "https://s3.test/upload", "fields": {"key": body["file"]}}
+        return TransportResponse(204, {}, b"", url)
+
+
+@pytest.fixture
+def upload_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(dedupe_module, "STATE_DIRECTORY", tmp_path)
+    monkeypatch.setattr(dedupe_module, "_caches", {})
+
+
+def requested_paths(transport):
+    return [request["url"].split("/api/v1/", 1)[-1] for request in transport.requests]
+
+
+def test_hash_file_keeps_file_position():
+    file = io.BytesIO(b"skipped content")
+    file.seek(8)
+    assert hash_file(file) == hashlib.sha256(b"content").hexdigest()
+    assert file.tell() == 8
+
+
+def test_upload_cache_is_shared_between_processes(upload_cache):
+    cache = UploadCache("project")
+    cache.add("hash")
+    assert "hash" in UploadCache("project")
+    assert "hash" not in UploadCache("other project")
+    cache.discard("hash")
+    assert "hash" not in cache
+    # Discarded only in this process
+    assert "hash" in UploadCache("project")
+
+
+def test_uploaded_content_is_referenced_instead_of_uploaded_again(upload_cache):
+    transport = FakeTransport(FakeUploadBackend())
+    api = make_api(transport)
+    assert api.upload_file("first", "a.txt", io.BytesIO(b"content"), "project")
+    assert requested_paths(transport) == [
+        "executions/first/files",
+        "https://s3.test/upload",
+    ]
+
+    transport.requests.clear()
+    assert api.upload_file("second", "b.txt", io.BytesIO(b"content"), "project")
+    assert requested_paths(transport) == ["executions/second/files/reference"]
+    assert transport.requests[0]["json"] == {
+        "file": "b.txt",
+        "sha256": hashlib.sha256(b"content").hexdigest(),
+    }
+
+
+def test_content_missing_in_backend_is_uploaded_again(upload_cache):
+    backend = FakeUploadBackend()
+    transport = FakeTransport(backend)
+    api = make_api(transport)
+    assert api.upload_file("first", "a.txt", io.BytesIO(b"content"), "project")
+    backend.hashes.clear()
+
+    transport.requests.clear()
+    assert api.upload_file("second", "a.txt", io.BytesIO(b"content"), "project")
+    assert requested_paths(transport) == [
+        "executions/second/files/reference",
+        "executions/second/files",
+        "https://s3.test/upload",
+    ]
+
+
+def test_content_known_to_backend_is_not_uploaded(upload_cache):
+    backend = FakeUploadBackend()
+    backend.hashes.add(hashlib.sha256(b"content").hexdigest())
+    transport = FakeTransport(backend)
+    api = make_api(transport)
+    assert api.upload_file("first", "a.txt", io.BytesIO(b"content"), "project")
+    assert requested_paths(transport) == ["executions/first/files"]
+    # Cached, so the next upload only registers a reference
+    assert hashlib.sha256(b"content").hexdigest() in UploadCache("project")
+
+
+def test_streams_are_uploaded_without_hash(upload_cache):
+    class Stream(io.RawIOBase):
+        def readable(self):
+            return True
+
+        def seekable(self):
+            return False
+
+    transport = FakeTransport(FakeUploadBackend())
+    api = make_api(transport)
+    assert api.upload_file("first", "a.txt", Stream(), "project")
+    assert transport.requests[0]["json"]["sha256"] is None
@@ -0,0 +1,27 @@
+import logging
+
+import trailwatch
+
+from trailwatch import TrailwatchContext
+from trailwatch.connectors.sqlite.store import get_store
+
+
+def test_logs_after_exit_are_not_attributed_to_execution(database):
+    logger = logging.getLogger("test_background_finalize")
+    logger.setLevel(logging.INFO)
+
+    with TrailwatchContext(
+        job="job",
+        job_description="Job",
+        loggers=["test_background_finalize"],
+        background_finalize=True,
+    ):
+        logger.info("inside")
+    logger.info("after exit")
+    assert trailwatch.flush(deadline=10)
+
+    store = get_store(database)
+    (execution,) = store.executions()
+    assert execution["status"] == "success"
+    assert [log["msg"] for log in store.logs(execution["id"])] == ["inside"]
+    assert logger.handlers == []
@@ -0,0 +1,46 @@
+import logging
+import signal
+import time
+
+from trailwatch.cli import run_command
+
+logger = logging.getLogger("test_cli")
+
+
+def test_run_command_logs_output_lines(caplog):
+    with caplog.at_level(logging.INFO, logger="test_cli"):
+        returncode, timed_out = run_command(
+            ["sh", "-c", "echo out; echo err >&2; exit 3"], logger, echo=False
+        )
+    assert (returncode, timed_out) == (3, False)
+    # Order of lines from stdout and stderr is not defined
+    assert {(record.levelno, record.getMessage()) for record in caplog.records} == {
+        (logging.INFO, "out"),
+        (logging.WARNING, "err"),
+    }
+
+
+def test_run_command_times_out_after_output_is_closed():
+    start = time.monotonic()
+    returncode, timed_out = run_command(
+        ["sh", "-c", "exec >/dev/null 2>&1; sleep 4"],
+        logger,
+        timeout=1,
+        kill_grace_period=1,
+        echo=False,
+    )
+    assert (returncode, timed_out) == (-signal.SIGTERM, True)
+    assert time.monotonic() - start < 3
+
+
+def test_run_command_kills_command_ignoring_sigterm():
+    start = time.monotonic()
+    returncode, timed_out = run_command(
+        ["sh", "-c", "exec >/dev/null 2>&1; trap '' TERM; sleep 4"],
+        logger,
+        timeout=0.5,
+        kill_grace_period=0.5,
+        echo=False,
+    )
+    assert (returncode, timed_out) == (-signal.SIGKILL, True)
+    assert time.monotonic() - start < 3
@@ -0,0 +1,83 @@
+import sys
+
+from trailwatch import fingerprint as fingerprint_module
+from trailwatch.fingerprint import (
+    FingerprintCache,
+    _normalize_filename,
+    fingerprint_exception,
+)
+
+
+def fail(message, error_type=ValueError):
+    raise error_type(message)
+
+
+def capture(function, *args):
+    try:
+        function(*args)
+    except Exception:  # pylint: disable=broad-except
+        return sys.exc_info()
+    raise AssertionError("Function did not raise")
+
+
+def wrap(message, error_type=ValueError):
+    try:
+        fail(message, error_type)
+    except error_type as error:
+        raise RuntimeError("wrapped") from error
+
+
+def test_fingerprint_ignores_messages():
+    assert fingerprint_exception(*capture(fail, "record 1")) == fingerprint_exception(
+        *capture(fail, "record 2")
+    )
+
+
+def test_fingerprint_depends_on_type_and_frames():
+    fingerprint = fingerprint_exception(*capture(fail, "message"))
+    assert fingerprint != fingerprint_exception(*capture(fail, "message", KeyError))
+    assert fingerprint != fingerprint_exception(*capture(wrap, "message"))
+
+
+def test_fingerprint_includes_chained_exceptions():
+    assert fingerprint_exception(*capture(wrap, "message")) == fingerprint_exception(
+        *capture(wrap, "other")
+    )
+    # Only the cause differs
+    assert fingerprint_exception(*capture(wrap, "message")) != fingerprint_exception(
+        *capture(wrap, "message", KeyError)
+    )
+
+
+def test_filenames_are_normalized():
+    assert _normalize_filename("/srv/venv/lib/site-packages/pkg/module.py") == (
+        "pkg/module.py"
+    )
+    assert _normalize_filename("C:\\app\\pkg\\module.py") == "pkg/module.py"
+
+
+def test_cache_counts_occurrences_within_window(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(fingerprint_module.time, "monotonic", lambda: now[0])
+    cache = FingerprintCache()
+    assert [cache.record("a", 60) for _ in range(3)] == [1, 2, 3]
+    assert cache.record("b", 60) == 1
+    now[0] = 60.0
+    # Window expired, details are sent again
+    assert cache.record("a", 60) == 1
+    assert cache.record("a", 60) == 2
+
+
+def test_cache_without_window_never_deduplicates():
+    cache = FingerprintCache()
+    assert [cache.record("a", None) for _ in range(3)] == [1, 1, 1]
+
+
+def test_cache_evicts_least_recently_seen_fingerprints():
+    cache = FingerprintCache(maxsize=2)
+    cache.record("a", 60)
+    cache.record("b", 60)
+    cache.record("a", 60)
+    cache.record("c", 60)
+    assert cache.record("a", 60) == 3
+    assert cache.record("b", 60) == 1
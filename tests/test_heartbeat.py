@@ -0,0 +1,65 @@
+import pytest
+
+from trailwatch.heartbeat import Heartbeat
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("trailwatch.heartbeat.time.monotonic", clock)
+    return clock
+
+
+def run(heartbeat, clock, until):
+    heartbeat._schedule(clock.now)
+    while True:
+        clock.now += heartbeat._get_delay()
+        if clock.now > until:
+            break
+        heartbeat.report()
+
+
+def test_heartbeat_and_metrics_are_scheduled_independently(clock):
+    state = {"counters": 0}
+    sent = []
+
+    def collect():
+        state["counters"] += 1
+        return dict(state)
+
+    heartbeat = Heartbeat(
+        collect,
+        lambda data, timestamp: sent.append((clock.now, timestamp is not None)),
+        heartbeat_interval=600,
+        metrics_interval=60,
+    )
+    run(heartbeat, clock, until=1200)
+    assert [now for now, is_heartbeat in sent if is_heartbeat] == [600, 1200]
+    assert [now for now, is_heartbeat in sent if not is_heartbeat] == [
+        60 * i for i in range(1, 21) if i not in (10, 20)
+    ]
+
+
+def test_unchanged_metrics_are_sent_only_with_heartbeats(clock):
+    sent = []
+    heartbeat = Heartbeat(
+        lambda: {"counters": 1},
+        lambda data, timestamp: sent.append((clock.now, data.get("idle"))),
+        heartbeat_interval=90,
+        metrics_interval=60,
+    )
+    run(heartbeat, clock, until=180)
+    assert sent == [(60, None), (90, 30), (180, 120)]
+
+
+def test_interval_is_required():
+    with pytest.raises(ValueError):
+        Heartbeat(dict, lambda data, timestamp: None)
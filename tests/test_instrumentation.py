@@ -0,0 +1,58 @@
+import functools
+
+import pytest
+
+from urllib3.connectionpool import HTTPConnectionPool
+
+from trailwatch.instrumentation import HttpRecorder
+
+
+class FakeResponse:
+    status = 200
+    headers = {"Content-Length": "5"}
+
+
+@pytest.fixture
+def original_make_request(monkeypatch):
+    calls = []
+
+    def make_request(self, conn, method, url, *args, **kwargs):
+        calls.append(url)
+        return FakeResponse()
+
+    monkeypatch.setattr(HTTPConnectionPool, "_make_request", make_request)
+    monkeypatch.setattr("trailwatch.instrumentation._original_make_request", None)
+    return calls
+
+
+def request(url="/"):
+    pool = HTTPConnectionPool("example.com")
+    return HTTPConnectionPool._make_request(pool, None, "GET", url)
+
+
+def test_records_calls_through_patches_applied_by_other_libraries(
+    original_make_request, monkeypatch
+):
+    recorder = HttpRecorder()
+    recorder.start()
+    patched = HTTPConnectionPool._make_request
+    foreign_calls = []
+
+    @functools.wraps(patched)
+    def foreign_make_request(*args, **kwargs):
+        foreign_calls.append(args[3])
+        return patched(*args, **kwargs)
+
+    monkeypatch.setattr(HTTPConnectionPool, "_make_request", foreign_make_request)
+    recorder.stop()
+    request("/first")
+
+    recorder = HttpRecorder()
+    recorder.start()
+    request("/second")
+    recorder.stop()
+
+    assert foreign_calls == ["/first", "/second"]
+    assert original_make_request == ["/first", "/second"]
+    assert recorder.to_dict()["calls"] == 1
+    assert recorder.to_dict()["hosts"]["example.com"]["status"] == {"200": 1}
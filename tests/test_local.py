@@ -0,0 +1,114 @@
+import datetime
+import io
+import logging
+import subprocess
+import sys
+import textwrap
+
+from pathlib import Path
+
+import pytest
+
+import trailwatch
+
+from trailwatch import TrailwatchContext
+from trailwatch.connectors.local import LocalConnectorFactory
+from trailwatch.connectors.local.handler import LocalHandler
+from trailwatch.connectors.local.reader import LocalReader
+from trailwatch.connectors.local.storage import SegmentWriter
+
+
+@pytest.fixture
+def directory(tmp_path):
+    directory = tmp_path / "trailwatch"
+    trailwatch.configure(
+        project="project",
+        project_description="Project",
+        environment="test",
+        connectors=[LocalConnectorFactory(directory)],
+    )
+    return directory
+
+
+def test_files_with_colliding_names_are_kept(directory):
+    with TrailwatchContext(job="job", job_description="Job") as context:
+        context.send_file_content("report/1.txt", b"first")
+        context.send_file_content("report_1.txt", b"second")
+        context.send_file_content("report/1.txt", b"third")
+
+    reader = LocalReader(directory)
+    (execution,) = reader.executions()
+    files = reader.files(execution["execution_id"])
+    assert [file["name"] for file in files] == [
+        "report/1.txt",
+        "report_1.txt",
+        "report/1.txt",
+    ]
+    assert len({file["path"] for file in files}) == 3
+    assert [Path(file["path"]).read_bytes() for file in files] == [
+        b"first",
+        b"second",
+        b"third",
+    ]
+
+
+def test_write_errors_do_not_break_the_job(directory, tmp_path):
+    broken_directory = tmp_path / "broken"
+    broken_writer = SegmentWriter(broken_directory)
+    broken_directory.rmdir()
+    with TrailwatchContext(job="job", job_description="Job") as context:
+        connector = context.connectors[0]
+        connector.writer = broken_writer
+        connector.files_directory = tmp_path / "file"
+        connector.files_directory.write_bytes(b"")
+        with pytest.warns(UserWarning, match="Unable to report progress locally"):
+            connector.report_progress({"progress": 1})
+        with pytest.warns(UserWarning, match="Unable to send file 'file.txt'"):
+            assert not connector.send_fileobj("file.txt", io.BytesIO(b"x"))
+        with pytest.warns(UserWarning, match="Unable to finalize execution locally"):
+            connector.finalize_execution("success", datetime.datetime.utcnow())
+        connector.execution_id = None
+
+
+def test_log_write_errors_do_not_raise(tmp_path, capsys):
+    broken_directory = tmp_path / "broken"
+    broken_writer = SegmentWriter(broken_directory)
+    broken_directory.rmdir()
+    logger = logging.getLogger("test_local_broken")
+    logger.propagate = False
+    handler = LocalHandler("execution", broken_writer)
+    logger.addHandler(handler)
+    try:
+        logger.warning("not written")
+    finally:
+        logger.removeHandler(handler)
+    assert "No such file or directory" in capsys.readouterr().err
+
+
+def test_background_finalize_completes_before_writers_are_closed(tmp_path):
+    directory = tmp_path / "trailwatch"
+    script = textwrap.dedent(f"""
+        import trailwatch
+        from trailwatch.connectors.local import LocalConnectorFactory
+
+        trailwatch.configure(
+            project="project",
+            project_description="Project",
+            environment="test",
+            connectors=[LocalConnectorFactory({str(directory)!r})],
+        )
+        with trailwatch.TrailwatchContext(
+            job="job", job_description="Job", background_finalize=True
+        ):
+            pass
+        """)
+    result = subprocess.run(
+        [sys.executable, "-W", "error", "-c", script],
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    (execution,) = LocalReader(directory).executions()
+    assert execution["status"] == "success"
@@ -0,0 +1,56 @@
+import tracemalloc
+
+import pytest
+
+from trailwatch.memory import MemoryGrowthTracker
+
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def tracing():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+def test_retained_memory_is_measured_like_for_like(tracing):
+    tracker = MemoryGrowthTracker()
+    retained = []
+
+    start = tracker.start()
+    retained.append(bytearray(MIB))
+    report = tracker.record("job", start, threshold=10 * MIB)
+    assert report["traced"] is not None
+    assert report["retained"] == pytest.approx(MIB, rel=0.25)
+
+    start = tracker.start()
+    retained.append(bytearray(MIB))
+    report = tracker.record("job", start, threshold=10 * MIB)
+    assert report["growth"] == pytest.approx(MIB, rel=0.25)
+    assert report["executions"] == 1
+
+
+def test_execution_is_skipped_if_tracing_started_during_it():
+    tracker = MemoryGrowthTracker()
+    start = tracker.start()
+    assert start[1] is None
+    tracemalloc.start()
+    try:
+        report = tracker.record("job", start)
+    finally:
+        tracemalloc.stop()
+    assert "retained" not in report
+    assert "growth" not in report
+
+
+def test_job_baseline_is_reset_when_source_changes(tracing):
+    tracker = MemoryGrowthTracker()
+    tracker.record("job", (None, 0))
+    report = tracker.record("job", (None, 0))
+    assert report["executions"] == 1
+
+    tracemalloc.stop()
+    report = tracker.record("job", (0, None))
+    assert "growth" not in report
+    tracemalloc.start()
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from trailwatch import TrailwatchContext
+from trailwatch.connectors.sqlite.store import get_store
+from trailwatch.metrics import Metrics
+
+
+def test_counters_of_all_threads_are_merged():
+    metrics = Metrics()
+    assert metrics.is_empty
+
+    def work():
+        for _ in range(1000):
+            metrics.increment("processed")
+        metrics.increment("failed", 2)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.increment("processed", 0.5)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {"processed": 4000.5, "failed": 8}
+    assert snapshot["rates"]["processed"] == (
+        snapshot["counters"]["processed"] / snapshot["elapsed"]
+    )
+    assert not metrics.is_empty
+
+
+def test_gauges_keep_latest_value():
+    metrics = Metrics()
+    metrics.gauge("queue_size", 10)
+    metrics.gauge("queue_size", 3)
+    assert not metrics.is_empty
+    snapshot = metrics.snapshot()
+    assert snapshot["gauges"] == {"queue_size": 3}
+    assert snapshot["counters"] == {}
+    # Snapshots are not affected by later changes
+    metrics.gauge("queue_size", 5)
+    assert snapshot["gauges"] == {"queue_size": 3}
+
+
+def test_metrics_are_sent_with_execution(database):
+    with TrailwatchContext(job="job", job_description="Job") as context:
+        context.increment("processed", 3)
+        context.gauge("queue_size", 7)
+    (execution,) = get_store(database).executions()
+    metrics = execution["metadata"]["metrics"]
+    assert metrics["counters"] == {"processed": 3}
+    assert metrics["gauges"] == {"queue_size": 7}
+
+
+def test_metrics_are_sent_at_interval_while_running(database):
+    store = get_store(database)
+    with TrailwatchContext(
+        job="job", job_description="Job", metrics_interval=0.01
+    ) as context:
+        context.increment("processed")
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            (execution,) = store.executions()
+            if (execution["metadata"] or {}).get("metrics"):
+                break
+            time.sleep(0.01)
+        assert execution["status"] == "running"
+        assert execution["metadata"]["metrics"]["counters"] == {"processed": 1}
+        # Only heartbeats record liveness
+        assert execution["heartbeat"] is None
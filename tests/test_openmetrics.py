@@ -0,0 +1,187 @@
+import os
+import stat
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from trailwatch.connectors.openmetrics.registry import MetricsRegistry
+
+LABELS = (("project", "project"), ("environment", "test"), ("job", "job"))
+
+
+def test_background_finalize_completes_before_registries_are_flushed(tmp_path):
+    path = tmp_path / "trailwatch.prom"
+    script = textwrap.dedent(f"""
+        import trailwatch
+        from trailwatch.connectors.openmetrics import OpenMetricsConnectorFactory
+
+        trailwatch.configure(
+            project="project",
+            project_description="Project",
+            environment="test",
+            connectors=[
+                OpenMetricsConnectorFactory({str(path)!r}, min_interval=3600)
+            ],
+        )
+        with trailwatch.TrailwatchContext(
+            job="job", job_description="Job", background_finalize=True
+        ):
+            pass
+        """)
+    result = subprocess.run(
+        [sys.executable, "-W", "error", "-c", script],
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'status="success"' in path.read_text()
+
+
+def make_registry(path, **kwargs):
+    return MetricsRegistry(path, min_interval=3600, duration_buckets=(1, 10), **kwargs)
+
+
+def test_metrics_are_rendered_in_prometheus_text_format(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "trailwatch.connectors.openmetrics.registry.time.time", lambda: 100
+    )
+    registry = make_registry(tmp_path / "metrics.prom")
+    registry.execution_started(LABELS)
+    registry.execution_finished(LABELS, "failure", 2.5, {"ERROR": 2})
+    registry.add_error(LABELS, 'Error "quoted"\n')
+    registry.execution_started(LABELS)
+
+    labels = 'project="project",environment="test",job="job"'
+    assert registry.render().splitlines() == [
+        "# HELP trailwatch_executions_total Finished executions by status.",
+        "# TYPE trailwatch_executions_total counter",
+        f'trailwatch_executions_total{{{labels},status="failure"}} 1',
+        "# HELP trailwatch_execution_duration_seconds Duration of finished executions.",
+        "# TYPE trailwatch_execution_duration_seconds histogram",
+        f'trailwatch_execution_duration_seconds_bucket{{{labels},le="1"}} 0',
+        f'trailwatch_execution_duration_seconds_bucket{{{labels},le="10"}} 1',
+        f'trailwatch_execution_duration_seconds_bucket{{{labels},le="+Inf"}} 1',
+        f"trailwatch_execution_duration_seconds_count{{{labels}}} 1",
+        f"trailwatch_execution_duration_seconds_sum{{{labels}}} 2.5",
+        "# HELP trailwatch_errors_total Exceptions which failed executions.",
+        "# TYPE trailwatch_errors_total counter",
+        f'trailwatch_errors_total{{{labels},exception="Error \\"quoted\\"\\n"}} 1',
+        "# HELP trailwatch_log_records_total Log records by level.",
+        "# TYPE trailwatch_log_records_total counter",
+        f'trailwatch_log_records_total{{{labels},level="ERROR"}} 2',
+        "# HELP trailwatch_running_executions Currently running executions.",
+        "# TYPE trailwatch_running_executions gauge",
+        f"trailwatch_running_executions{{{labels}}} 1",
+        "# HELP trailwatch_last_execution_timestamp_seconds "
+        "Unix time when the last execution with this status finished.",
+        "# TYPE trailwatch_last_execution_timestamp_seconds gauge",
+        f'trailwatch_last_execution_timestamp_seconds{{{labels},status="failure"}} 100',
+    ]
+
+
+def test_samples_belong_to_declared_families(tmp_path):
+    # The textfile collector exports samples whose name doesn't match the
+    # declared family (or its histogram suffixes) as untyped metrics
+    registry = make_registry(tmp_path / "metrics.prom")
+    registry.execution_started(LABELS)
+    registry.execution_finished(LABELS, "success", 1, {"INFO": 1})
+    registry.add_error(LABELS, "ValueError")
+    declared = {}
+    for line in registry.render().splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, metric_type = line.split()
+            declared[name] = metric_type
+            continue
+        if line.startswith("# HELP "):
+            continue
+        name = line.split("{", 1)[0].split(" ", 1)[0]
+        family = next(
+            (
+                family
+                for family, metric_type in declared.items()
+                if name == family
+                or metric_type == "histogram"
+                and name in (f"{family}_bucket", f"{family}_count", f"{family}_sum")
+            ),
+            None,
+        )
+        assert family is not None, name
+        if declared[family] == "counter":
+            assert name.endswith("_total")
+
+
+def test_values_are_loaded_from_existing_file(tmp_path):
+    path = tmp_path / "metrics.prom"
+    registry = make_registry(path)
+    registry.execution_started(LABELS)
+    registry.execution_finished(LABELS, "success", 2)
+    registry.add_error(LABELS, 'Error "quoted"')
+    registry.execution_started(LABELS)
+    registry.flush()
+
+    reloaded = make_registry(path)
+    reloaded.execution_started(LABELS)
+    reloaded.execution_finished(LABELS, "success", 20)
+    rendered = reloaded.render()
+    assert 'status="success"} 2\n' in rendered
+    assert 'exception="Error \\"quoted\\""} 1\n' in rendered
+    assert 'le="10"} 1\n' in rendered
+    assert 'le="+Inf"} 2\n' in rendered
+    # Running executions of the previous process are not restored
+    assert (
+        'trailwatch_running_executions{project="project",environment="test",job="job"} 0\n'
+        in rendered
+    )
+
+
+def test_values_are_loaded_from_file_in_openmetrics_format(tmp_path):
+    path = tmp_path / "metrics.prom"
+    path.write_text(
+        "# TYPE trailwatch_executions counter\n"
+        'trailwatch_executions_total{job="job",status="success"} 3\n'
+        "# EOF\n"
+    )
+    registry = make_registry(path)
+    registry.execution_finished((("job", "job"),), "success", 1)
+    assert 'trailwatch_executions_total{job="job",status="success"} 4\n' in (
+        registry.render()
+    )
+
+
+def test_file_is_replaced_atomically(tmp_path, monkeypatch):
+    path = tmp_path / "metrics" / "metrics.prom"
+    registry = make_registry(path)
+    registry.execution_started(LABELS)
+    # First write is not delayed
+    assert path.read_text() == registry.render()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+    replaced = []
+    replace = os.replace
+    monkeypatch.setattr(
+        "trailwatch.connectors.openmetrics.registry.os.replace",
+        lambda source, target: replaced.append(
+            (os.path.basename(source), open(source).read())
+        )
+        or replace(source, target),
+    )
+    registry.execution_finished(LABELS, "success", 1)
+    # Later writes are rate limited
+    assert "trailwatch_executions_total" not in path.read_text()
+    registry.flush()
+    ((name, content),) = replaced
+    # Written completely under a name ignored by the collector, then renamed
+    assert name.startswith(".metrics.prom.") and not name.endswith(".prom")
+    assert content == path.read_text() == registry.render()
+    assert os.listdir(path.parent) == ["metrics.prom"]
+
+
+def test_write_errors_are_reported_as_warnings(tmp_path):
+    (tmp_path / "file").write_text("")
+    registry = make_registry(tmp_path / "file" / "metrics.prom")
+    with pytest.warns(UserWarning, match="Unable to write metrics"):
+        registry.execution_started(LABELS)
@@ -0,0 +1,87 @@
+import marshal
+import pstats
+import time
+
+import pytest
+
+from trailwatch import TrailwatchContext
+from trailwatch.connectors.sqlite.store import get_store
+from trailwatch.profiling import ExecutionProfiler, SamplingProfiler
+
+
+def busy(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_sampling_profiler_counts_stacks_of_profiled_thread():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    busy(0.1)
+    lines = profiler.stop().decode().splitlines()
+    assert lines
+    stacks = {}
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        stacks[stack] = int(count)
+    busy_samples = sum(
+        count
+        for stack, count in stacks.items()
+        if stack.split(";")[-1].startswith("busy ")
+    )
+    assert busy_samples > 0
+
+
+def test_cprofile_produces_pstats_data(tmp_path):
+    profiler = ExecutionProfiler("cprofile job", "cprofile")
+    profiler.start()
+    busy(0.01)
+    content = profiler.stop()
+    assert profiler.filename == "profile.pstats"
+    path = tmp_path / profiler.filename
+    path.write_bytes(content)
+    stats = pstats.Stats(str(path))
+    assert any(function == "busy" for _, _, function in stats.stats)
+    assert isinstance(marshal.loads(content), dict)
+
+
+def test_one_in_n_executions_of_job_is_profiled():
+    enabled = [
+        ExecutionProfiler("sampled job", "sampling", sample_rate=3).enabled
+        for _ in range(7)
+    ]
+    assert enabled == [True, False, False, True, False, False, True]
+    # Executions are counted per job
+    assert ExecutionProfiler("other job", "sampling", sample_rate=3).enabled
+
+
+def test_profile_of_fast_execution_is_dropped():
+    profiler = ExecutionProfiler("threshold job", "cprofile", threshold=60)
+    profiler.start()
+    assert profiler.stop() is None
+
+
+def test_executions_which_are_not_sampled_are_not_profiled():
+    ExecutionProfiler("skipped job", "sampling", sample_rate=2)
+    profiler = ExecutionProfiler("skipped job", "sampling", sample_rate=2)
+    assert not profiler.enabled
+    profiler.start()
+    assert profiler.stop() is None
+
+
+def test_invalid_arguments_are_rejected():
+    with pytest.raises(ValueError, match="'profile' must be one of"):
+        ExecutionProfiler("job", "tracing")
+    with pytest.raises(ValueError, match="positive integer"):
+        ExecutionProfiler("job", "sampling", sample_rate=0)
+
+
+@pytest.mark.parametrize("database", [1024 * 1024], indirect=True)
+def test_profile_is_sent_as_execution_file(database):
+    with TrailwatchContext(
+        job="profiled job", job_description="Job", profile="sampling"
+    ):
+        busy(0.05)
+    (file,) = get_store(database).connection.execute("SELECT name FROM files")
+    assert file["name"] == "profile.collapsed"
@@ -0,0 +1,79 @@
+import logging
+
+from trailwatch import ratelimit
+from trailwatch.ratelimit import CallSiteRateLimiter
+
+
+def make_record(
+    created,
+    msg="Processed %s",
+    args=("item",),
+    name="test_ratelimit",
+    lineno=1,
+    level=logging.INFO,
+):
+    record = logging.LogRecord(name, level, __file__, lineno, msg, args, None)
+    record.created = created
+    return record
+
+
+def test_burst_is_allowed_and_tokens_refill_at_rate():
+    limiter = CallSiteRateLimiter(rate=2, burst=3)
+    assert [limiter.allow(make_record(0)) for _ in range(4)] == [
+        True,
+        True,
+        True,
+        False,
+    ]
+    # Half a second refills one token
+    assert limiter.allow(make_record(0.5))
+    assert not limiter.allow(make_record(0.5))
+    # Tokens never exceed the burst
+    assert [limiter.allow(make_record(100)) for _ in range(4)] == [
+        True,
+        True,
+        True,
+        False,
+    ]
+
+
+def test_call_sites_are_limited_independently():
+    limiter = CallSiteRateLimiter(rate=1, burst=1)
+    assert limiter.allow(make_record(0, args=("first",)))
+    # Same template with different arguments is the same call site
+    assert not limiter.allow(make_record(0, args=("second",)))
+    assert limiter.allow(make_record(0, msg="Other %s"))
+    assert limiter.allow(make_record(0, lineno=2))
+    assert limiter.allow(make_record(0, name="other"))
+
+
+def test_call_sites_over_limit_are_not_limited():
+    limiter = CallSiteRateLimiter(rate=1, burst=1, max_call_sites=1)
+    assert limiter.allow(make_record(0))
+    assert not limiter.allow(make_record(0))
+    assert all(limiter.allow(make_record(0, lineno=2)) for _ in range(3))
+
+
+def test_unhashable_messages_are_not_limited():
+    limiter = CallSiteRateLimiter(rate=1, burst=1)
+    assert all(limiter.allow(make_record(0, msg=["unhashable"])) for _ in range(3))
+
+
+def test_suppressed_messages_are_summarized(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "time", lambda: now[0])
+    limiter = CallSiteRateLimiter(rate=1, burst=1, summary_interval=60)
+    limiter.allow(make_record(0))
+    limiter.allow(make_record(0, level=logging.INFO))
+    limiter.allow(make_record(0, level=logging.WARNING))
+    assert not limiter.summary_due
+
+    now[0] += 60
+    assert limiter.summary_due
+    (summary,) = limiter.collect_summaries()
+    assert summary.getMessage() == "2 similar messages suppressed: Processed %s"
+    assert summary.levelno == logging.WARNING
+    assert (summary.name, summary.lineno) == ("test_ratelimit", 1)
+    assert not limiter.summary_due
+    # Each suppressed message is summarized once
+    assert limiter.collect_summaries() == []
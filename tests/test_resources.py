@@ -0,0 +1,72 @@
+import gc
+import time
+import tracemalloc
+
+from trailwatch import TrailwatchContext
+from trailwatch.connectors.sqlite.store import get_store
+from trailwatch.resources import ResourceMonitor, _gc_statistics
+
+
+def test_resources_consumed_by_execution_are_measured():
+    monitor = ResourceMonitor()
+    monitor.start()
+    time.sleep(0.01)
+    gc.collect()
+    sum(range(100_000))
+    profile = monitor.stop()
+    assert profile.wall_time >= 0.01
+    assert profile.cpu_user + profile.cpu_system >= 0
+    assert profile.gc_collections >= 1
+    assert profile.gc_pause > 0
+    assert profile.thread_count >= 1
+    assert not profile.overlapping
+    assert _gc_statistics._callback not in gc.callbacks
+
+
+def test_peak_traced_memory_is_measured():
+    tracing = tracemalloc.is_tracing()
+    monitor = ResourceMonitor(trace_memory=True)
+    monitor.start()
+    data = bytearray(1024 * 1024)
+    del data
+    profile = monitor.stop()
+    assert profile.tracemalloc_peak >= 1024 * 1024
+    # Tracing started by the monitor is stopped
+    assert tracemalloc.is_tracing() == tracing
+
+
+def test_collections_are_counted_once_by_overlapping_monitors():
+    first, second = ResourceMonitor(), ResourceMonitor()
+    first.start()
+    second.start()
+    assert gc.callbacks.count(_gc_statistics._callback) == 1
+    gc.collect()
+    second_profile = second.stop()
+    gc.collect()
+    first_profile = first.stop()
+    assert first_profile.gc_collections == second_profile.gc_collections + 1
+    assert first_profile.overlapping and second_profile.overlapping
+    assert _gc_statistics._callback not in gc.callbacks
+
+
+def test_monitor_started_and_stopped_in_between_overlaps():
+    first, second = ResourceMonitor(), ResourceMonitor()
+    first.start()
+    second.start()
+    assert second.stop().overlapping
+    assert first.stop().overlapping
+
+    # Sequential monitors don't overlap
+    first.start()
+    assert not first.stop().overlapping
+
+
+def test_resources_are_sent_with_execution(database):
+    with TrailwatchContext(
+        job="job", job_description="Job", track_resources=True
+    ) as context:
+        pass
+    assert context.resources is not None
+    (execution,) = get_store(database).executions()
+    assert execution["metadata"]["resources"] == context.resources.to_dict()
+    assert execution["metadata"]["resources"]["overlapping"] is False
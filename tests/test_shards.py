@@ -0,0 +1,152 @@
+import sqlite3
+
+import pytest
+
+import trailwatch
+
+from trailwatch import TrailwatchContext
+from trailwatch.connectors.sqlite import SqliteConnectorFactory
+from trailwatch.connectors.sqlite.store import SqliteStore, get_store
+from trailwatch.shards import aggregate_shards, aggregate_status, get_shard_info
+
+
+@pytest.mark.parametrize(
+    ["statuses", "shards", "expected"],
+    [
+        (["success", "success"], None, "success"),
+        (["timeout", "timeout"], None, "timeout"),
+        (["failure", "timeout"], None, "failure"),
+        (["failure", "failure"], None, "failure"),
+        (["success", "failure"], None, "partial"),
+        (["success", "timeout"], None, "partial"),
+        (["success", "running"], None, "running"),
+        (["success", "success"], 3, "running"),
+        (["success", "success", "failure"], 3, "partial"),
+        ([], None, "running"),
+    ],
+)
+def test_aggregate_status(statuses, shards, expected):
+    assert aggregate_status(statuses, shards) == expected
+
+
+def test_aggregate_shards():
+    parent = aggregate_shards(
+        [
+            {
+                "status": "success",
+                "start": "2026-01-01T00:00:00",
+                "end": "2026-01-01T00:01:00",
+                "shards": 2,
+                "metadata": {"metrics": {"counters": {"processed": 10}}},
+            },
+            {
+                "status": "failure",
+                "start": "2026-01-01T00:00:30",
+                "end": "2026-01-01T00:02:00",
+                "shards": 2,
+                "metadata": {"metrics": {"counters": {"processed": 5, "failed": 1}}},
+            },
+        ]
+    )
+    assert parent == {
+        "status": "partial",
+        "start": "2026-01-01T00:00:00",
+        "end": "2026-01-01T00:02:00",
+        "duration": 120.0,
+        "shards": {"expected": 2, "reported": 2, "success": 1, "failure": 1},
+        "counters": {"processed": 15, "failed": 1},
+    }
+
+
+def test_running_parent_has_no_end():
+    parent = aggregate_shards(
+        [{"status": "success", "start": "2026-01-01T00:00:00", "end": None}],
+        shards=2,
+    )
+    assert parent["status"] == "running"
+    assert parent["end"] is None
+    assert parent["duration"] is None
+
+
+def test_get_shard_info_from_environment(monkeypatch):
+    monkeypatch.setenv("TRAILWATCH_PARENT_EXECUTION_ID", "parent")
+    monkeypatch.setenv("TRAILWATCH_SHARD", "3")
+    monkeypatch.setenv("TRAILWATCH_SHARDS", "4")
+    info = get_shard_info()
+    assert info is not None
+    assert info.to_dict() == {
+        "parent_execution_id": "parent",
+        "shard": "3",
+        "shards": 4,
+    }
+    assert get_shard_info(shard="other").shard == "other"  # type: ignore
+    monkeypatch.setenv("TRAILWATCH_SHARDS", "many")
+    with pytest.raises(ValueError, match="must be an integer"):
+        get_shard_info()
+
+
+def test_sqlite_database_created_before_shards_is_migrated(tmp_path):
+    path = tmp_path / "trailwatch.sqlite"
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE executions (
+            id TEXT PRIMARY KEY,
+            project TEXT NOT NULL,
+            environment TEXT NOT NULL,
+            job TEXT NOT NULL,
+            status TEXT NOT NULL,
+            start TEXT NOT NULL,
+            end TEXT,
+            duration REAL,
+            heartbeat TEXT,
+            metadata TEXT,
+            ttl INTEGER
+        );
+        INSERT INTO executions (id, project, environment, job, status, start)
+        VALUES ('old', 'project', 'test', 'job', 'success', '2026-01-01T00:00:00');
+        """)
+    connection.commit()
+    connection.close()
+
+    store = SqliteStore(path)
+    try:
+        columns = {
+            row["name"]
+            for row in store.connection.execute("PRAGMA table_info(executions)")
+        }
+        assert {"parent_id", "shard", "shards"} <= columns
+        (execution,) = store.executions()
+        assert execution["id"] == "old"
+        assert execution["parent_id"] is None
+    finally:
+        store.close()
+    # Opening a migrated database again doesn't fail
+    SqliteStore(path).close()
+
+
+def test_sqlite_parent_execution_is_aggregated_from_shards(tmp_path):
+    path = tmp_path / "trailwatch.sqlite"
+    trailwatch.configure(
+        project="project",
+        project_description="Project",
+        environment="test",
+        connectors=[SqliteConnectorFactory(path)],
+    )
+    for shard in range(2):
+        with TrailwatchContext(
+            job="job",
+            job_description="Job",
+            parent_execution_id="parent",
+            shard=shard,
+            shards=3,
+        ) as context:
+            context.increment("processed", 10)
+
+    store = get_store(path)
+    assert [execution["shard"] for execution in store.shards("parent")] == ["0", "1"]
+    parent = store.parent_execution("parent")
+    assert parent is not None
+    assert parent["status"] == "running"
+    assert parent["shards"]["expected"] == 3
+    assert parent["counters"] == {"processed": 20}
+    assert store.parent_execution("unknown") is None
@@ -0,0 +1,19 @@
+from trailwatch.spans import Span, SpanRecorder
+
+
+def test_to_dict_does_not_consume_span_indexes():
+    recorder = SpanRecorder(capacity=2)
+    with Span(recorder, "extract"):
+        with Span(recorder, "download"):
+            recorder.to_dict()
+    data = recorder.to_dict()
+    assert [span["name"] for span in data["spans"]] == ["extract", "download"]
+    assert data["spans"][1]["parent"] == 0
+    assert data["dropped"] == 0
+    assert data["summary"]["extract/download"]["count"] == 1
+
+    with Span(recorder, "load"):
+        pass
+    data = recorder.to_dict()
+    assert data["dropped"] == 1
+    assert data["summary"]["load"]["count"] == 1
@@ -0,0 +1,117 @@
+import io
+import logging
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import warnings
+
+import pytest
+
+import trailwatch
+
+from trailwatch import TrailwatchContext
+from trailwatch.connectors.local import LocalConnectorFactory
+from trailwatch.connectors.sqlite import SqliteConnectorFactory
+from trailwatch.connectors.sqlite.handler import SqliteHandler
+from trailwatch.connectors.sqlite.store import SqliteStore, get_store
+from trailwatch.fanout import DEFAULT_CHUNK_SIZE
+
+
+def test_background_finalize_completes_before_store_is_closed(tmp_path):
+    path = tmp_path / "trailwatch.sqlite"
+    script = textwrap.dedent(f"""
+        import trailwatch
+        from trailwatch.connectors.sqlite import SqliteConnectorFactory
+
+        trailwatch.configure(
+            project="project",
+            project_description="Project",
+            environment="test",
+            connectors=[SqliteConnectorFactory({str(path)!r})],
+        )
+        with trailwatch.TrailwatchContext(
+            job="job", job_description="Job", background_finalize=True
+        ):
+            pass
+        """)
+    result = subprocess.run(
+        [sys.executable, "-W", "error", "-c", script],
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "closed database" not in result.stderr
+    (execution,) = SqliteStore(path).executions()
+    assert execution["status"] == "success"
+
+
+def test_report_progress_does_not_raise(database, tmp_path):
+    closed_store = SqliteStore(tmp_path / "closed.sqlite")
+    closed_store.close()
+    with TrailwatchContext(job="job", job_description="Job") as context:
+        connector = context.connectors[0]
+        store, connector.store = connector.store, closed_store
+        with pytest.warns(UserWarning, match="Unable to report progress"):
+            connector.report_progress({"progress": 1})
+        with pytest.warns(UserWarning, match="Unable to send file"):
+            connector.send_fileobj("file.txt", io.BytesIO(b"x"))
+        connector.store = store
+
+
+def test_send_fileobj_rejects_large_files(database):
+    with TrailwatchContext(job="job", job_description="Job") as context:
+        with pytest.warns(UserWarning, match="larger than 10 bytes"):
+            context.send_fileobj("large.txt", io.BytesIO(b"x" * 11))
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            context.send_fileobj("small.txt", io.BytesIO(b"x" * 10))
+    store = get_store(database)
+    names = [
+        row["name"]
+        for row in store.connection.execute("SELECT name FROM files").fetchall()
+    ]
+    assert names == ["small.txt"]
+
+
+def test_send_fileobj_reads_whole_fanned_out_file(tmp_path):
+    path = tmp_path / "trailwatch.sqlite"
+    trailwatch.configure(
+        project="project",
+        project_description="Project",
+        environment="test",
+        connectors=[
+            SqliteConnectorFactory(path),
+            LocalConnectorFactory(tmp_path / "trailwatch"),
+        ],
+    )
+    content = b"x" * (3 * DEFAULT_CHUNK_SIZE + 5)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with TrailwatchContext(job="job", job_description="Job") as context:
+            context.send_fileobj("large.txt", io.BytesIO(content))
+    (stored,) = get_store(path).connection.execute("SELECT content FROM files")
+    assert stored["content"] == content
+
+
+def test_failed_log_writes_do_not_raise_and_are_retried(tmp_path, capsys):
+    path = tmp_path / "trailwatch.sqlite"
+    store = SqliteStore(path, batch_size=1)
+    store.connection.execute("PRAGMA busy_timeout = 0")
+    logger = logging.getLogger("test_sqlite_locked")
+    logger.propagate = False
+    handler = SqliteHandler("execution", store)
+    logger.addHandler(handler)
+    other = sqlite3.connect(path, isolation_level=None)
+    try:
+        other.execute("BEGIN EXCLUSIVE")
+        logger.warning("while locked")
+        other.execute("COMMIT")
+    finally:
+        logger.removeHandler(handler)
+        other.close()
+    assert "database is locked" in capsys.readouterr().err
+    assert [log["msg"] for log in store.logs("execution")] == ["while locked"]
+    store.close()
@@ -0,0 +1,24 @@
+import time
+
+import pytest
+
+from trailwatch import TrailwatchContext
+from trailwatch.connectors.sqlite.store import get_store
+
+
+def test_soft_timeout_stacks_captured_during_exit_are_sent(database, monkeypatch):
+    def format_stacks():
+        # Still capturing stacks when the context is exited
+        time.sleep(0.3)
+        return "stacks"
+
+    monkeypatch.setattr("trailwatch.context.format_stacks", format_stacks)
+    with pytest.warns(UserWarning, match="longer than the soft timeout"):
+        with TrailwatchContext(job="job", job_description="Job", soft_timeout=0.05):
+            time.sleep(0.1)
+
+    store = get_store(database)
+    files = store.connection.execute("SELECT name, content FROM files").fetchall()
+    assert [(row["name"], bytes(row["content"])) for row in files] == [
+        ("soft-timeout-stacks.txt", b"stacks")
+    ]
@@ -0,0 +1,147 @@
+import email.parser
+import email.policy
+import io
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from trailwatch.connectors.aws.transport import (
+    HTTPError,
+    RequestsTransport,
+    Urllib3Transport,
+)
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """Records requests and responds with the status code given in the path."""
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.server.requests.append(
+            {
+                "method": self.command,
+                "path": self.path,
+                "headers": dict(self.headers),
+                "body": self.rfile.read(length),
+            }
+        )
+        status = int(self.path.rsplit("/", 1)[-1]) if self.path[-3:].isdigit() else 200
+        body = json.dumps({"status": status}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 302:
+            self.send_header("Location", "/redirected")
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = _respond
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=[Urllib3Transport, RequestsTransport])
+def transport(request, server):
+    server.requests.clear()
+    transport = request.param()
+    yield transport
+    transport.close()
+
+
+def get_url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def parse_multipart(request):
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {request['headers']['Content-Type']}\r\n\r\n".encode()
+        + request["body"]
+    )
+    return {
+        part.get_param("name", header="content-disposition"): (
+            part.get_filename(),
+            part.get_payload(decode=True),
+        )
+        for part in message.iter_parts()
+    }
+
+
+def test_json_body_is_encoded(server, transport):
+    response = transport.request(
+        "POST",
+        get_url(server, "/api"),
+        headers={"x-api-key": "key"},
+        json={"name": "value"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"status": 200}
+    assert response.headers["Content-Type"] == "application/json"
+    (request,) = server.requests
+    assert request["method"] == "POST"
+    assert request["headers"]["x-api-key"] == "key"
+    assert request["headers"]["Content-Type"] == "application/json"
+    assert json.loads(request["body"]) == {"name": "value"}
+
+
+def test_raw_body_is_sent_as_is(server, transport):
+    transport.request("PUT", get_url(server, "/part"), data=b"\x00binary")
+    (request,) = server.requests
+    assert request["method"] == "PUT"
+    assert request["body"] == b"\x00binary"
+
+
+def test_form_fields_are_urlencoded(server, transport):
+    transport.request("POST", get_url(server, "/form"), data={"key": "a b&c"})
+    (request,) = server.requests
+    assert request["headers"]["Content-Type"] == "application/x-www-form-urlencoded"
+    assert parse_qs(request["body"].decode()) == {"key": ["a b&c"]}
+
+
+def test_files_are_sent_as_multipart_form_data(server, transport, tmp_path):
+    path = tmp_path / "report.csv"
+    path.write_bytes(b"a,b\n")
+    with open(path, "rb") as file:
+        transport.request(
+            "POST",
+            get_url(server, "/upload"),
+            data={"key": "uploads/report.csv"},
+            files={"file": file, "other": ("named.txt", io.BytesIO(b"other"))},
+        )
+    (request,) = server.requests
+    assert request["headers"]["Content-Type"].startswith("multipart/form-data")
+    assert parse_multipart(request) == {
+        "key": (None, b"uploads/report.csv"),
+        "file": ("report.csv", b"a,b\n"),
+        "other": ("named.txt", b"other"),
+    }
+
+
+def test_error_status_is_returned_and_raised_on_demand(server, transport):
+    response = transport.request("GET", get_url(server, "/missing/404"))
+    assert response.status_code == 404
+    with pytest.raises(HTTPError, match="404 Error"):
+        response.raise_for_status()
+
+
+def test_urllib3_transport_does_not_follow_redirects(server):
+    transport = Urllib3Transport()
+    response = transport.request("GET", get_url(server, "/moved/302"))
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/redirected"
+    transport.close()
@@ -0,0 +1,36 @@
+import io
+
+import pytest
+
+from trailwatch import TrailwatchContext
+from trailwatch.connectors.sqlite.store import get_store
+from trailwatch.fanout import fan_out
+
+
+def test_failed_background_upload_fails_future(database):
+    with pytest.warns(UserWarning, match="Failed to send file 'large.txt'"):
+        with TrailwatchContext(
+            job="job",
+            job_description="Job",
+            background_uploads=2,
+        ) as context:
+            small = context.send_file_content("small.txt", b"x" * 10)
+            large = context.send_file_content("large.txt", b"x" * 11)
+            assert small is not None and large is not None
+            assert small.result(timeout=10) is None
+            assert isinstance(large.exception(timeout=10), RuntimeError)
+
+    (execution,) = get_store(database).executions()
+    assert execution["metadata"]["failed_uploads"] == ["large.txt"]
+
+
+def test_fan_out_returns_consumer_results():
+    def fail(file):
+        raise ValueError("failed")
+
+    with pytest.warns(UserWarning, match="Failed to consume file"):
+        results = fan_out(
+            io.BytesIO(b"content"),
+            [lambda file: file.read() == b"content", fail, lambda file: None],
+        )
+    assert results == [True, False, None]
@@ -0,0 +1,199 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from trailwatch import TrailwatchContext, watch
+from trailwatch.connectors.sqlite.store import get_store
+from trailwatch.histogram import Histogram
+
+
+def get_execution(database):
+    (execution,) = get_store(database).executions()
+    return execution
+
+
+def test_generator_is_watched_until_exhausted(database):
+    @watch(job="job", job_description="Job")
+    def generate():
+        yield 1
+        yield 2
+        yield 3
+        return "done"
+
+    def delegate():
+        result = yield from generate()
+        return result
+
+    iterator = delegate()
+    assert [next(iterator), next(iterator), next(iterator)] == [1, 2, 3]
+    with pytest.raises(StopIteration) as stop:
+        next(iterator)
+    assert stop.value.value == "done"
+
+    execution = get_execution(database)
+    assert execution["status"] == "success"
+    items = execution["metadata"]["items"]
+    assert items["count"] == 3
+    assert items["rate"] > 0
+    assert items["latency"]["count"] == 3
+    assert set(items["latency"]) >= {"mean", "min", "max", "p50", "p90", "p99"}
+
+
+def test_generator_stopped_early_is_successful(database):
+    closed = []
+
+    @watch(job="job", job_description="Job")
+    def generate():
+        try:
+            yield from range(10)
+        finally:
+            closed.append(True)
+
+    for item in generate():
+        if item == 1:
+            break
+    assert closed == [True]
+
+    execution = get_execution(database)
+    assert execution["status"] == "success"
+    assert execution["metadata"]["items"]["count"] == 2
+
+
+def test_closed_generator_is_successful(database):
+    @watch(job="job", job_description="Job")
+    def generate():
+        yield 1
+        yield 2
+
+    generator = generate()
+    assert next(generator) == 1
+    generator.close()
+    assert get_execution(database)["status"] == "success"
+
+
+def test_exceptions_are_thrown_into_generator(database):
+    handled = []
+
+    @watch(job="job", job_description="Job")
+    def generate():
+        while True:
+            try:
+                yield len(handled)
+            except KeyError as error:
+                handled.append(error)
+
+    generator = generate()
+    assert next(generator) == 0
+    assert generator.throw(KeyError("handled")) == 1
+    with pytest.raises(ValueError, match="unhandled"):
+        generator.throw(ValueError("unhandled"))
+
+    assert [str(error) for error in handled] == ["'handled'"]
+    execution = get_execution(database)
+    assert execution["status"] == "failure"
+    assert execution["metadata"]["items"]["count"] == 2
+
+
+def test_sent_values_are_passed_to_generator(database):
+    @watch(job="job", job_description="Job")
+    def echo():
+        value = yield "ready"
+        while True:
+            value = yield value * 2
+
+    generator = echo()
+    assert next(generator) == "ready"
+    assert generator.send(2) == 4
+    assert generator.send(5) == 10
+    generator.close()
+    assert get_execution(database)["status"] == "success"
+
+
+def test_async_generator_is_watched(database):
+    @watch(job="job", job_description="Job")
+    async def generate():
+        for item in range(3):
+            await asyncio.sleep(0)
+            yield item
+
+    async def consume():
+        return [item async for item in generate()]
+
+    assert asyncio.run(consume()) == [0, 1, 2]
+    execution = get_execution(database)
+    assert execution["status"] == "success"
+    assert execution["metadata"]["items"]["count"] == 3
+
+
+def test_async_generator_stopped_early_is_successful(database):
+    closed = []
+
+    @watch(job="job", job_description="Job")
+    async def generate():
+        try:
+            for item in range(10):
+                yield item
+        finally:
+            closed.append(True)
+
+    async def consume():
+        generator = generate()
+        async for item in generator:
+            if item == 1:
+                break
+        await generator.aclose()
+
+    asyncio.run(consume())
+    assert closed == [True]
+    execution = get_execution(database)
+    assert execution["status"] == "success"
+    assert execution["metadata"]["items"]["count"] == 2
+
+
+def test_exceptions_are_thrown_into_async_generator(database):
+    @watch(job="job", job_description="Job")
+    async def generate():
+        try:
+            yield 1
+        except KeyError:
+            yield "handled"
+
+    async def consume():
+        generator = generate()
+        assert await generator.__anext__() == 1
+        assert await generator.athrow(KeyError()) == "handled"
+        with pytest.raises(ValueError):
+            await generator.athrow(ValueError())
+
+    asyncio.run(consume())
+    assert get_execution(database)["status"] == "failure"
+
+
+def test_coroutine_functions_are_not_supported():
+    with pytest.raises(NotImplementedError):
+
+        @watch(job="job", job_description="Job")
+        async def run():
+            pass
+
+
+def test_items_are_not_read_while_recorded(database):
+    recording = threading.Event()
+
+    class SlowHistogram(Histogram):
+        def record(self, value):
+            recording.set()
+            time.sleep(0.05)
+            super().record(value)
+
+    with TrailwatchContext(job="job", job_description="Job") as context:
+        context.item_latency = SlowHistogram()
+        thread = threading.Thread(target=context.record_item, args=(0.001,))
+        thread.start()
+        recording.wait(5)
+        # Heartbeats read items from another thread than the one recording them
+        items = context._collect_progress()["items"]
+        thread.join()
+    assert items["count"] == items["latency"]["count"] == 1